@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Las vistas del dashboard son async (core/supabase_async.py): servidas por ASGI,
+p.ej. `uvicorn core.asgi:application --workers 2`, cada worker atiende muchas
+consultas a Supabase a la vez y reutiliza sus conexiones HTTP/2.
 """
 
 import os
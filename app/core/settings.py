@@ -86,6 +86,31 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Por defecto un LRU en memoria por proceso; con CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# y CACHE_LOCATION=/ruta/compartida los workers de gunicorn comparten el mismo caché local.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'dashboard'),
+        'TIMEOUT': int(os.environ.get('CACHE_TTL', 3600)),
+    }
+}
+if CACHE_BACKEND.endswith(('LocMemCache', 'FileBasedCache')):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 5000))}
+
+# Versión de los datos cargados en Supabase: `python manage.py bump_data_version` después de
+# cada carga invalida todo el caché del dashboard a la vez
+DASHBOARD_DATA_VERSION_FILE = os.environ.get('DASHBOARD_DATA_VERSION_FILE', str(BASE_DIR / 'data_version'))
+
+# max-age de Cache-Control para el navegador; después revalida con ETag
+DASHBOARD_HTTP_MAX_AGE = int(os.environ.get('DASHBOARD_HTTP_MAX_AGE', 60))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
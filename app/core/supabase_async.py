@@ -0,0 +1,159 @@
+"""
+Acceso asíncrono a Supabase (PostgREST) para las vistas async del dashboard.
+
+Bajo ASGI (core/asgi.py) un worker atiende muchas consultas a la vez: mientras
+una espera la respuesta de Supabase el event loop sigue con las demás. Cada
+event loop tiene un httpx.AsyncClient con pool de conexiones HTTP/2 que se
+reutiliza entre peticiones; se crea en el primer uso y se vuelve a crear si se
+cerró. Servidas por WSGI, cada petición corre en su propio event loop y usa un
+cliente nuevo.
+
+Cada consulta tiene timeout propio (`execute(timeout=...)`) y se reintenta con
+backoff exponencial ante errores de red, 429 y 5xx. Los métodos de consulta
+son los de supabase-py (select/eq/gt/or_/order/limit/execute), así que los
+filtros se comparten con el cliente sync.
+"""
+import asyncio
+import os
+import random
+import weakref
+
+import httpx
+
+from core.supabase_client import supabase_settings
+
+TIMEOUT = float(os.environ.get('SUPABASE_TIMEOUT', 10))
+CONNECT_TIMEOUT = float(os.environ.get('SUPABASE_CONNECT_TIMEOUT', 5))
+RETRIES = int(os.environ.get('SUPABASE_RETRIES', 2))
+BACKOFF = float(os.environ.get('SUPABASE_BACKOFF', 0.2))
+MAX_CONNECTIONS = int(os.environ.get('SUPABASE_MAX_CONNECTIONS', 20))
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class Result:
+    """Como el APIResponse de supabase-py: filas en `data` y conteo en `count`."""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def parse_count(content_range):
+    # Content-Range de PostgREST: '0-19/1234' o '*/1234' ('*' si no se pidió conteo)
+    total = (content_range or '').rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+
+class Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.method = 'GET'
+        self.params = []
+        self.orders = []
+        self.headers = {}
+
+    def select(self, columns='*', count=None, head=False):
+        self.params.append(('select', columns))
+        if count:
+            self.headers['Prefer'] = f'count={count}'
+        if head:
+            self.method = 'HEAD'
+        return self
+
+    def filter(self, column, operator, value):
+        self.params.append((column, f'{operator}.{value}'))
+        return self
+
+    def eq(self, column, value):
+        return self.filter(column, 'eq', value)
+
+    def gt(self, column, value):
+        return self.filter(column, 'gt', value)
+
+    def lt(self, column, value):
+        return self.filter(column, 'lt', value)
+
+    def or_(self, filters):
+        self.params.append(('or', f'({filters})'))
+        return self
+
+    def order(self, column, desc=False):
+        # Varios order() se acumulan en un solo parámetro, como en supabase-py
+        self.orders.append(f"{column}.{'desc' if desc else 'asc'}")
+        return self
+
+    def limit(self, size):
+        self.params.append(('limit', str(size)))
+        return self
+
+    async def execute(self, timeout=None):
+        params = self.params + ([('order', ','.join(self.orders))] if self.orders else [])
+        response = await self.client.request(self.method, self.table, params, self.headers, timeout)
+        data = None if self.method == 'HEAD' else response.json()
+        return Result(data, parse_count(response.headers.get('content-range')))
+
+
+class AsyncSupabase:
+    def __init__(self, url, key):
+        self.base_url = f"{url.rstrip('/')}/rest/v1/"
+        self.headers = {'apikey': key, 'Authorization': f'Bearer {key}'}
+        # Un cliente por event loop: las conexiones de httpx no se pueden usar desde otro loop
+        self.clients = weakref.WeakKeyDictionary()
+
+    def table(self, name):
+        return Query(self, name)
+
+    def http(self):
+        """Cliente HTTP/2 del event loop actual; se crea en el primer uso o si se cerró."""
+        loop = asyncio.get_running_loop()
+        client = self.clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                http2=True,
+                timeout=httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            )
+            self.clients[loop] = client
+        return client
+
+    async def request(self, method, path, params, headers=None, timeout=None):
+        """
+        Petición con reintentos: errores de red, timeouts, 429 y 5xx se reintentan
+        con backoff exponencial (con jitter); el último error se propaga.
+        """
+        timeout = httpx.Timeout(timeout, connect=CONNECT_TIMEOUT) if timeout is not None else httpx.USE_CLIENT_DEFAULT
+        for attempt in range(RETRIES + 1):
+            last = attempt == RETRIES
+            try:
+                response = await self.http().request(method, path, params=params, headers=headers, timeout=timeout)
+            except httpx.TransportError:
+                if last:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS or last:
+                    response.raise_for_status()
+                    return response
+            await asyncio.sleep(BACKOFF * 2 ** attempt * (0.5 + random.random()))
+
+    async def aclose(self):
+        client = self.clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_client = {'value': None, 'warned': False}
+
+
+def get_async_supabase():
+    """Cliente async compartido por el proceso; None si Supabase no está configurado."""
+    if _client['value'] is None:
+        try:
+            _client['value'] = AsyncSupabase(*supabase_settings())
+        except ValueError as e:
+            if not _client['warned']:
+                print(f"WARNING: Could not connect to Supabase: {e}")
+                _client['warned'] = True
+    return _client['value']
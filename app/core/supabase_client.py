@@ -1,16 +1,41 @@
 import os
+import time
+
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
 load_dotenv()
 
-url: str = os.environ.get("SUPABASE_URL")
-key: str = os.environ.get("SUPABASE_KEY")
+# Segundos antes de volver a intentar crear el cliente después de un fallo
+RETRY_SECONDS = 30
+
+_client = {'value': None, 'failed_at': None}
+
 
-try:
-    if not url or "your_supabase_url" in url:
+def supabase_settings():
+    """(url, key) de Supabase; ValueError si no están configurados."""
+    url: str = os.environ.get("SUPABASE_URL")
+    key: str = os.environ.get("SUPABASE_KEY")
+    if not url or "your_supabase_url" in url or not key:
         raise ValueError("Supabase URL not configured")
-    supabase: Client = create_client(url, key)
-except Exception as e:
-    print(f"WARNING: Could not connect to Supabase: {e}")
-    supabase = None
+    return url, key
+
+
+def get_supabase() -> Client:
+    """
+    Cliente sync de Supabase, creado en el primer uso. Si falla devuelve None y
+    se vuelve a intentar después de RETRY_SECONDS, en lugar de quedarse en None
+    hasta reiniciar el proceso.
+    """
+    if _client['value'] is not None:
+        return _client['value']
+    failed_at = _client['failed_at']
+    if failed_at is not None and time.monotonic() - failed_at < RETRY_SECONDS:
+        return None
+    try:
+        _client['value'] = create_client(*supabase_settings())
+        _client['failed_at'] = None
+    except Exception as e:
+        print(f"WARNING: Could not connect to Supabase: {e}")
+        _client['failed_at'] = time.monotonic()
+    return _client['value']
@@ -0,0 +1,98 @@
+"""
+Caché de las consultas a Supabase del dashboard.
+
+Los datos solo cambian cuando se recargan las tablas, así que cada resultado se
+guarda en el caché de Django con una llave que incluye la versión de datos. La
+versión vive en un archivo (DASHBOARD_DATA_VERSION_FILE) que todos los procesos
+del servidor leen, y `manage.py bump_data_version` la cambia después de cada
+carga: todas las llaves anteriores dejan de usarse a la vez y expiran solas.
+"""
+import hashlib
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+_version = {'mtime': None, 'value': '0'}
+
+
+def data_version():
+    """Versión de datos vigente; solo se relee el archivo cuando cambia su mtime."""
+    path = settings.DASHBOARD_DATA_VERSION_FILE
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return '0'
+    if mtime != _version['mtime']:
+        with open(path, 'r', encoding='utf-8') as f:
+            _version['value'] = f.read().strip() or '0'
+        _version['mtime'] = mtime
+    return _version['value']
+
+
+def bump_data_version():
+    """Escribe una versión nueva (de forma atómica) y la devuelve."""
+    path = settings.DASHBOARD_DATA_VERSION_FILE
+    version = format(time.time_ns(), 'x')
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_path, path)
+    return version
+
+
+def _digest(*parts):
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def cache_key(name, *params):
+    # Los parámetros (p.ej. nombres de institución) se resumen en un hash para
+    # que la llave sea válida en cualquier backend
+    return f"dashboard:{data_version()}:{name}:{_digest(*params)}"
+
+
+def cached_query(name, params, fetch):
+    """
+    Devuelve el resultado de `fetch()` para (name, params) desde el caché o lo
+    consulta y lo guarda. Si `fetch` falla no se guarda nada y la excepción sigue.
+    """
+    key = cache_key(name, *params)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit['value']
+    value = fetch()
+    cache.set(key, {'value': value})
+    return value
+
+
+async def acached_query(name, params, fetch):
+    """Como cached_query, para vistas async: `fetch` es una función async."""
+    key = cache_key(name, *params)
+    hit = await cache.aget(key)
+    if hit is not None:
+        return hit['value']
+    value = await fetch()
+    await cache.aset(key, {'value': value})
+    return value
+
+
+def response_etag(name, *params):
+    return f'"{_digest(data_version(), name, *params)}"'
+
+
+def not_modified(request, etag):
+    """Respuesta 304 si el cliente ya tiene esta versión; None en otro caso."""
+    return get_conditional_response(request, etag=etag)
+
+
+def set_cache_headers(response, etag=None):
+    """ETag y Cache-Control para respuestas exitosas; sin ETag la respuesta no se guarda."""
+    if etag is None:
+        patch_cache_control(response, no_store=True)
+        return response
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.DASHBOARD_HTTP_MAX_AGE)
+    return response
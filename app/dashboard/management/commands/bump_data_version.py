@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.cache import bump_data_version
+
+
+class Command(BaseCommand):
+    help = "Cambia la versión de datos del dashboard; correr después de cada carga a Supabase."
+
+    def handle(self, *args, **options):
+        version = bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"✅ Versión de datos: {version} (caché del dashboard invalidado)"))
@@ -1,6 +1,9 @@
+import asyncio
+
 from django.shortcuts import render
 from django.http import JsonResponse
-from core.supabase_client import supabase
+from core.supabase_async import get_async_supabase
+from .cache import acached_query, not_modified, response_etag, set_cache_headers
 
 def index(request):
     """
@@ -15,61 +18,158 @@ def index(request):
     }
     return render(request, 'dashboard/index.html', context)
 
-def get_institutions(request):
+async def get_institutions(request):
     entidad_cd = request.GET.get('entidad_cd')
+    etag = response_etag('institutions', entidad_cd)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    supabase = get_async_supabase()
+
+    async def fetch():
+        response = await supabase.table('resumen_declaraciones_institucion_anual').select("*").eq('entidad_cd', entidad_cd).order('total_declaraciones', desc=True).execute()
+        return response.data
+
     institutions = []
+    ok = False
     if supabase and entidad_cd:
         try:
-            response = supabase.table('resumen_declaraciones_institucion_anual').select("*").eq('entidad_cd', entidad_cd).order('total_declaraciones', desc=True).execute()
-            institutions = response.data
+            institutions = await acached_query('institutions', (entidad_cd,), fetch)
+            ok = True
         except Exception as e:
             print(f"Error fetching data from Supabase: {e}")
-    
-    return JsonResponse({'institutions': institutions})
 
-def institution_detail(request, institution_name):
+    response = JsonResponse({'institutions': institutions})
+    # Los errores no llevan ETag para que no se queden en el caché del navegador
+    return set_cache_headers(response, etag if ok else None)
+
+# Orden del detalle: diferencia_ingresos desc con el id como desempate, para que
+# el cursor (diferencia, id) identifique una posición única
+SORT_COLUMN = 'diferencia_ingresos'
+ID_COLUMN = 'DECLARACION_ID'
+PAGE_SIZE = 20
+
+
+def parse_cursor(value):
+    """'<diferencia>,<id>' -> (float, str); None si falta o no es válido."""
+    if not value or ',' not in value:
+        return None
+    number, _, declaration_id = value.partition(',')
+    try:
+        return float(number), declaration_id
+    except ValueError:
+        return None
+
+
+def format_cursor(declaration):
+    return f"{declaration.get(SORT_COLUMN) or 0},{declaration.get(ID_COLUMN)}"
+
+
+def quote_value(value):
+    # Valores entre comillas dentro de un filtro or=(...) de PostgREST
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def filtered_declarations(query, entidad_cd, institution_name):
+    # Mismos filtros que el índice parcial idx_declaracion_keyset (supabase_all_indexes.sql)
+    return query\
+        .eq('ENTIDAD_CD', entidad_cd)\
+        .eq('INSTITUCION', institution_name)\
+        .gt('REMUNERACION_ANUAL_CARGO_PUBLICO', 0)\
+        .gt('INGRESO_ANUAL_NETO_DECLARANTE', 0)
+
+
+async def fetch_declarations_page(supabase, entidad_cd, institution_name, cursor, backwards):
+    """
+    Una página por keyset: las filas después (o antes, si backwards) del cursor
+    en el orden (diferencia_ingresos desc, id desc). Pide una fila de más para
+    saber si hay otra página en esa dirección; el costo no depende de la página.
+    """
+    query = filtered_declarations(
+        supabase.table('declaracion_individual').select(f"*,{SORT_COLUMN}"), entidad_cd, institution_name)
+    if cursor:
+        number, declaration_id = cursor
+        op = 'gt' if backwards else 'lt'
+        query = query.or_(f"{SORT_COLUMN}.{op}.{number},"
+                          f"and({SORT_COLUMN}.eq.{number},{ID_COLUMN}.{op}.{quote_value(declaration_id)})")
+    response = await query\
+        .order(SORT_COLUMN, desc=not backwards)\
+        .order(ID_COLUMN, desc=not backwards)\
+        .limit(PAGE_SIZE + 1)\
+        .execute()
+    rows = response.data
+    more = len(rows) > PAGE_SIZE
+    rows = rows[:PAGE_SIZE]
+    if backwards:
+        rows.reverse()
+    return {'declarations': rows, 'more': more}
+
+
+async def fetch_declarations_count(supabase, entidad_cd, institution_name):
+    # Solo el conteo (sin filas); se guarda en caché una vez por institución y versión de datos
+    response = await filtered_declarations(
+        supabase.table('declaracion_individual').select(ID_COLUMN, count='exact', head=True),
+        entidad_cd, institution_name).execute()
+    return response.count or 0
+
+
+async def institution_detail(request, institution_name):
     """
     Detalle de las declaraciones de esa institucion:
     - Lista de declaraciones
     - Grafico de barras apiladas (Stacked bar)
     - Composicion de la Declaracion seleccionada
+
+    La paginación es por cursor: ?after=<diferencia>,<id> (siguiente) o
+    ?before=<diferencia>,<id> (anterior); `page` solo se usa para mostrar la posición.
+    La página y el conteo se consultan a la vez.
     """
     entidad_cd = request.GET.get('entidad_cd')
+    after = parse_cursor(request.GET.get('after'))
+    before = parse_cursor(request.GET.get('before'))
     try:
-        page = int(request.GET.get('page', 1))
+        page = max(int(request.GET.get('page', 1)), 1)
     except ValueError:
         page = 1
-        
-    page_size = 20
+    if not after and not before:
+        page = 1
+
+    cursor = before or after
+    backwards = before is not None
+    etag = response_etag('institution_detail', entidad_cd, institution_name, page, cursor, backwards)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    supabase = get_async_supabase()
     declarations = []
     total_count = 0
-    
+    more = False
+    ok = False
     if supabase and entidad_cd:
         try:
-            start = (page - 1) * page_size
-            end = start + page_size - 1
-            
-            # Filter by ENTIDAD_CD and INSTITUCION
-            response = supabase.table('declaracion_individual')\
-                .select("*,diferencia_ingresos", count='exact')\
-                .eq('ENTIDAD_CD', entidad_cd)\
-                .eq('INSTITUCION', institution_name)\
-                .gt('REMUNERACION_ANUAL_CARGO_PUBLICO', 0)\
-                .gt('INGRESO_ANUAL_NETO_DECLARANTE', 0)\
-                .order('diferencia_ingresos', desc=True)\
-                .range(start, end)\
-                .execute()
-            
-            declarations = response.data
-            total_count = response.count if response.count else 0
-            
+            result, total_count = await asyncio.gather(
+                acached_query('institution_detail', (entidad_cd, institution_name, cursor, backwards),
+                              lambda: fetch_declarations_page(supabase, entidad_cd, institution_name, cursor, backwards)),
+                acached_query('institution_count', (entidad_cd, institution_name),
+                              lambda: fetch_declarations_count(supabase, entidad_cd, institution_name)),
+            )
+            declarations = result['declarations']
+            more = result['more']
+            ok = True
         except Exception as e:
             print(f"Error fetching declarations: {e}")
 
-    total_pages = (total_count + page_size - 1) // page_size
-    
+    total_pages = (total_count + PAGE_SIZE - 1) // PAGE_SIZE
+    page = min(page, max(total_pages, 1))
+
     # Calculate offset for the counter
-    page_offset = (page - 1) * page_size
+    page_offset = (page - 1) * PAGE_SIZE
+
+    # Al retroceder, `more` indica si hay páginas anteriores; al avanzar, siguientes
+    has_previous = bool(declarations) and (more if backwards else page > 1)
+    has_next = bool(declarations) and (True if backwards else more)
 
     context = {
         'institution_name': institution_name,
@@ -78,9 +178,12 @@ def institution_detail(request, institution_name):
         'current_page': page,
         'total_pages': total_pages,
         'page_offset': page_offset,
-        'has_previous': page > 1,
-        'has_next': page < total_pages,
+        'has_previous': has_previous,
+        'has_next': has_next,
         'previous_page_num': page - 1,
         'next_page_num': page + 1,
+        'previous_cursor': format_cursor(declarations[0]) if declarations else '',
+        'next_cursor': format_cursor(declarations[-1]) if declarations else '',
     }
-    return render(request, 'dashboard/detail.html', context)
+    response = render(request, 'dashboard/detail.html', context)
+    return set_cache_headers(response, etag if ok else None)
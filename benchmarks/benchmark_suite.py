@@ -0,0 +1,292 @@
+"""
+Suite de benchmarks del pipeline con datos sintéticos (ver datos_sinteticos.py).
+
+Para cada tamaño (10k, 100k y 1M registros por defecto) genera una muestra
+determinista de declaraciones S1 y de releases OCDS y mide, en este orden:
+
+    s1_extraccion    S1Extractor sobre el JSON de declaraciones
+    ocds_extraccion  OCDSExtractor sobre el JSON de releases
+    ingesta          ingesta_duckdb.run_ingest de las tablas S1 extraídas
+    limpieza         limpieza_ingresos.clean_data_with_audit sobre esa base
+    exportacion      export_to_parquet de las tablas raw
+
+Cada etapa corre en un proceso nuevo, así la RSS pico reportada es solo la de
+esa etapa. Por etapa se guardan registros/s, RSS pico y bytes de entrada y de
+salida en un JSON (benchmarks/resultados/ por defecto); con --baseline se
+compara contra una corrida anterior. Con DATATON_RUN_LOG=<archivo> (y
+DATATON_PROFILE) las etapas internas de cada script quedan en esa bitácora.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+for path in (REPO_ROOT,
+             os.path.join(REPO_ROOT, 'system_1', 'src', 'extraction'),
+             os.path.join(REPO_ROOT, 'system_1', 'src', 'cleaning'),
+             os.path.join(REPO_ROOT, 'system_6', 'src'),
+             os.path.join(REPO_ROOT, 'scripts')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import duckdb
+
+from common.instrumentation import path_bytes
+from common.parallel import peak_rss_mb
+from common.writers import OUTPUT_FORMATS
+from datos_sinteticos import generate
+from export_to_parquet import export_to_parquet, load_state
+from ingesta_duckdb import run_ingest
+from limpieza_ingresos import clean_data_with_audit
+from procesar_masivo import OCDSExtractor
+from procesar_masivo_s1 import S1Extractor, S1_SCHEMAS
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'resultados')
+STATE = 'Sintetico'
+DB_NAME = 'dataton_s1.duckdb'
+
+
+def count_rows(db_path, schema):
+    con = duckdb.connect(db_path, read_only=True)
+    try:
+        return sum(con.execute(f'SELECT count(*) FROM {schema}."{name}"').fetchone()[0] for name in S1_SCHEMAS)
+    finally:
+        con.close()
+
+
+def stage_s1_extraction(task):
+    shutil.rmtree(os.path.join(task['s1_dir'], STATE), ignore_errors=True)
+    extractor = S1Extractor(task['s1_input'], task['s1_dir'], STATE, stream=task['stream'],
+                            output_format=task['format'])
+    if not extractor.extract_all():
+        raise RuntimeError("La extracción S1 no terminó correctamente")
+    return {'records': extractor.stats['records'], 'rows': sum(extractor.stats['rows'].values()),
+            'input_bytes': path_bytes(task['s1_input']),
+            'output_bytes': path_bytes(os.path.join(task['s1_dir'], STATE))}
+
+
+def stage_ocds_extraction(task):
+    shutil.rmtree(os.path.join(task['ocds_dir'], STATE), ignore_errors=True)
+    extractor = OCDSExtractor(task['ocds_input'], task['ocds_dir'], STATE, output_format=task['format'])
+    if not extractor.extract_all():
+        raise RuntimeError("La extracción OCDS no terminó correctamente")
+    return {'records': extractor.stats['records'], 'rows': sum(extractor.stats['rows'].values()),
+            'input_bytes': path_bytes(task['ocds_input']),
+            'output_bytes': path_bytes(os.path.join(task['ocds_dir'], STATE))}
+
+
+def stage_ingest(task):
+    db_path = os.path.join(task['s1_dir'], DB_NAME)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    if run_ingest(task['s1_dir'], db_path):
+        raise RuntimeError("La ingesta terminó con errores")
+    rows = count_rows(db_path, 'raw')
+    return {'records': rows, 'rows': rows,
+            'input_bytes': path_bytes(os.path.join(task['s1_dir'], STATE)), 'output_bytes': path_bytes(db_path)}
+
+
+def stage_cleaning(task):
+    db_path = os.path.join(task['s1_dir'], DB_NAME)
+    if not os.path.exists(db_path):
+        raise RuntimeError("Falta la base de la ingesta (correr también la etapa ingesta)")
+    output_dir = os.path.join(task['work_dir'], 'clean_data')
+    shutil.rmtree(output_dir, ignore_errors=True)
+    rows = count_rows(db_path, 'vigente')
+    stats = clean_data_with_audit(task['s1_dir'], output_dir, output_format=task['format'])
+    rejected = int(stats['rechazos'].sum())
+    return {'records': rows, 'rows': rows - rejected, 'rejected': rejected,
+            'input_bytes': path_bytes(db_path), 'output_bytes': path_bytes(output_dir)}
+
+
+def stage_export(task):
+    db_path = os.path.join(task['s1_dir'], DB_NAME)
+    if not os.path.exists(db_path):
+        raise RuntimeError("Falta la base de la ingesta (correr también la etapa ingesta)")
+    output_dir = os.path.join(task['work_dir'], 'parquet')
+    shutil.rmtree(output_dir, ignore_errors=True)
+    tables = list(S1_SCHEMAS)
+    config = {name: {'query': f'SELECT * FROM raw."{name}"'} for name in tables}
+    failed = export_to_parquet(db_path, output_dir, tables, config=config, force=True)
+    if failed:
+        raise RuntimeError(f"Falló la exportación de: {', '.join(failed)}")
+    rows = sum(entry['rows'] for entry in load_state(output_dir).values())
+    return {'records': rows, 'rows': rows,
+            'input_bytes': path_bytes(db_path), 'output_bytes': path_bytes(output_dir)}
+
+
+# Etapas en orden de ejecución; ingesta, limpieza y exportacion dependen de las anteriores
+STAGES = {
+    's1_extraccion': stage_s1_extraction,
+    'ocds_extraccion': stage_ocds_extraction,
+    'ingesta': stage_ingest,
+    'limpieza': stage_cleaning,
+    'exportacion': stage_export,
+}
+
+
+def run_stage(stage, task):
+    """Corre una etapa con su salida en un log y devuelve su reporte (aun si falla)."""
+    report = {'stage': stage, 'size': task['size'], 'status': 'ok'}
+    log_path = os.path.join(task['work_dir'], f"{stage}.log")
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            report.update(STAGES[stage](task))
+        except Exception as e:
+            report.update(status='error', error=f"{type(e).__name__}: {e}")
+    seconds = time.perf_counter() - start
+    report['seconds'] = round(seconds, 3)
+    report['records_per_second'] = round(report.get('records', 0) / seconds, 1) if seconds else None
+    report['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    report['log'] = log_path
+    return report
+
+
+def run_isolated(stage, task):
+    """Corre la etapa en un proceso nuevo (spawn) para medir solo su RSS pico."""
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+        try:
+            return pool.submit(run_stage, stage, task).result()
+        except Exception as e:
+            # El proceso murió (p.ej. OOM killer) antes de devolver un reporte
+            return {'stage': stage, 'size': task['size'], 'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+
+
+def prepare_inputs(data_dir, size, seed, kinds):
+    """Genera (o reutiliza si ya existen en data_dir) las muestras sintéticas de un tamaño."""
+    inputs = {}
+    for kind in kinds:
+        path = os.path.join(data_dir, f"{kind}_{size}_seed{seed}.json")
+        if os.path.exists(path):
+            print(f"   ♻️  {os.path.basename(path)} ya existe")
+            inputs[kind] = {'path': path, 'bytes': path_bytes(path), 'seconds': None}
+            continue
+        start = time.perf_counter()
+        generate(kind, size, path, seed)
+        seconds = time.perf_counter() - start
+        print(f"   🧪 {os.path.basename(path)}: {path_bytes(path) / 1e6:,.1f} MB en {seconds:.1f} s")
+        inputs[kind] = {'path': path, 'bytes': path_bytes(path), 'seconds': round(seconds, 3)}
+    return inputs
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    if report['status'] != 'ok':
+        print(f"   ❌ {report['stage']:<16} {report.get('error', '')}")
+        return
+    line = (f"   ✅ {report['stage']:<16} {report['records']:>12,} reg {report['seconds']:>9.2f} s "
+            f"{report['records_per_second']:>12,.0f} reg/s {report['peak_rss_mb']:>8,.0f} MB RSS "
+            f"{report['output_bytes'] / 1e6:>9,.1f} MB salida")
+    previous = (baseline or {}).get((report['stage'], report['size']))
+    if previous and previous.get('status') == 'ok' and previous.get('records_per_second'):
+        line += (f"  ({report['records_per_second'] / previous['records_per_second']:.2f}x reg/s, "
+                 f"{report['peak_rss_mb'] - previous['peak_rss_mb']:+,.0f} MB RSS vs base)")
+    print(line)
+
+
+def load_baseline(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return {(r['stage'], r['size']): r for r in json.load(f)['results']}
+
+
+def run_suite(sizes, stages, output_format='csv', stream=True, seed=0, work_dir=None, data_dir=None,
+              output=None, baseline=None, keep=False):
+    """Corre las etapas para cada tamaño y guarda los reportes en `output`. Devuelve el resultado."""
+    own_work_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix='dataton_benchmark_')
+    data_dir = data_dir or os.path.join(work_dir, 'datos')
+    os.makedirs(data_dir, exist_ok=True)
+    baseline = load_baseline(baseline) if baseline else None
+    kinds = [kind for kind, needed in (('s1', 's1_extraccion'), ('ocds', 'ocds_extraccion')) if needed in stages]
+
+    result = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'parameters': {'sizes': sizes, 'stages': stages, 'format': output_format, 'stream': stream, 'seed': seed},
+        'inputs': {},
+        'results': [],
+    }
+    start = time.perf_counter()
+    try:
+        for size in sizes:
+            print(f"\n📏 {size:,} registros")
+            inputs = prepare_inputs(data_dir, size, seed, kinds)
+            result['inputs'][str(size)] = {kind: {k: v for k, v in info.items() if k != 'path'}
+                                           for kind, info in inputs.items()}
+            size_dir = os.path.join(work_dir, str(size))
+            task = {
+                'size': size,
+                'work_dir': size_dir,
+                's1_input': inputs.get('s1', {}).get('path'),
+                'ocds_input': inputs.get('ocds', {}).get('path'),
+                's1_dir': os.path.join(size_dir, 's1'),
+                'ocds_dir': os.path.join(size_dir, 'ocds'),
+                'format': output_format,
+                'stream': stream,
+            }
+            for directory in (task['s1_dir'], task['ocds_dir']):
+                os.makedirs(directory, exist_ok=True)
+            for stage in stages:
+                report = run_isolated(stage, task)
+                result['results'].append(report)
+                print_report(report, baseline)
+    finally:
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        output = output or os.path.join(RESULTS_DIR, f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n📄 Resultados en {output}")
+        if own_work_dir and not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        else:
+            print(f"📁 Datos y salidas en {work_dir}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de extracción, ingesta, limpieza y exportación "
+                                                 "con datos sintéticos.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Registros por muestra (default: 10000 100000 1000000)")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES),
+                        help="Etapas a medir (default: todas, en orden)")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                        help="Formato de salida de los extractores y la limpieza (default: csv)")
+    parser.add_argument('--no-stream', dest='stream', action='store_false',
+                        help="Extraer el S1 con json.load en lugar del modo streaming")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla de los datos sintéticos (default: 0)")
+    parser.add_argument('--work-dir', default=None, help="Carpeta de trabajo (default: temporal, se borra al final)")
+    parser.add_argument('--data-dir', default=None,
+                        help="Carpeta para guardar y reutilizar las muestras sintéticas entre corridas")
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados (default: benchmarks/resultados/)")
+    parser.add_argument('--baseline', default=None, help="JSON de una corrida anterior para comparar")
+    parser.add_argument('--keep', action='store_true', help="No borrar la carpeta de trabajo temporal")
+    args = parser.parse_args()
+
+    stages = [stage for stage in STAGES if stage in args.stages]
+    result = run_suite(args.sizes, stages, args.format, args.stream, args.seed, args.work_dir, args.data_dir,
+                       args.output, args.baseline, args.keep)
+    sys.exit(1 if any(r['status'] != 'ok' for r in result['results']) else 0)
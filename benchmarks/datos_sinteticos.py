@@ -0,0 +1,388 @@
+"""
+Generador determinista de declaraciones del S1 y releases OCDS sintéticos.
+
+Los registros siguen las formas del esquema que manejan los mapeos de
+system_1/src/extraction/mapeo_s1.py y system_6/src/mapeo_ocds.py, incluidas
+las variantes reales de la PDN:
+
+- listas bajo distintas claves ('experiencia' o la lista directa,
+  'bienInmueble'/'bienesInmuebles', 'vehiculo'/'vehiculos', ...) y
+  'inversionesCuentasValores' o 'inversiones';
+- montos como {valor, moneda} o como número, catálogos como {clave, valor} o
+  como texto, rfc y correoElectronico como dict o texto;
+- datosEmpleoCargoComision como dict o lista, datosPareja con 'ninguno';
+- un porcentaje pequeño de valores que rechazan las reglas de calidad
+  (montos negativos, fechas futuras, declaraciones sin id).
+
+Cada registro sale de un generador sembrado con (seed, índice), así el
+registro i es el mismo sin importar cuántos se generen: la muestra de 10k es
+el inicio de la de 100k. Los releases OCDS vienen en grupos de RELEASES_PER_OCID
+con el mismo ocid (licitación, adjudicación y contrato).
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import time
+import uuid
+
+RELEASES_PER_OCID = 3
+# Fracción de registros con valores que las reglas de calidad rechazan
+DIRTY_FRACTION = 0.01
+
+NOMBRES = ['JUAN', 'MARIA', 'JOSE', 'GUADALUPE', 'FRANCISCO', 'ANA', 'LUIS', 'SOFIA', 'CARLOS', 'MARTHA',
+           'MIGUEL', 'ROSA', 'JESUS', 'LAURA', 'ALEJANDRO', 'PATRICIA', 'PEDRO', 'VERONICA', 'RAUL', 'ELENA']
+APELLIDOS = ['HERNANDEZ', 'GARCIA', 'MARTINEZ', 'LOPEZ', 'GONZALEZ', 'RODRIGUEZ', 'PEREZ', 'SANCHEZ',
+             'RAMIREZ', 'CRUZ', 'FLORES', 'GOMEZ', 'MORALES', 'VAZQUEZ', 'REYES', 'JIMENEZ', 'TORRES',
+             'DIAZ', 'GUTIERREZ', 'RUIZ', 'MENDOZA', 'AGUILAR', 'ORTIZ', 'CASTILLO', 'ROMERO']
+INSTITUCIONES = [f'{prefijo} {area}' for prefijo in ('SECRETARIA DE', 'INSTITUTO ESTATAL DE', 'COMISION DE')
+                 for area in ('SALUD', 'EDUCACION', 'FINANZAS', 'SEGURIDAD PUBLICA', 'MOVILIDAD',
+                              'DESARROLLO SOCIAL', 'OBRAS PUBLICAS', 'CULTURA', 'TRANSPARENCIA', 'AGUA')]
+CARGOS = ['DIRECTOR DE AREA', 'JEFE DE DEPARTAMENTO', 'ANALISTA', 'SUBDIRECTOR', 'COORDINADOR', 'AUXILIAR',
+          'ENFERMERA', 'DOCENTE', 'POLICIA', 'SECRETARIA']
+NIVELES = ['ESTATAL', 'MUNICIPAL', 'FEDERAL']
+TIPOS_DECLARACION = ['INICIAL', 'MODIFICACIÓN', 'CONCLUSIÓN']
+FORMAS_ADQUISICION = [('CPV', 'COMPRAVENTA'), ('HRN', 'HERENCIA'), ('DNC', 'DONACIÓN'), ('CSN', 'CESIÓN')]
+TIPOS_INMUEBLE = [('CASA', 'CASA'), ('DPTO', 'DEPARTAMENTO'), ('TERR', 'TERRENO'), ('LCOM', 'LOCAL COMERCIAL')]
+TIPOS_BIEN = [('MECA', 'MENAJE DE CASA'), ('JOYA', 'JOYAS'), ('OBRA', 'OBRAS DE ARTE'), ('COLE', 'COLECCIONES')]
+TIPOS_VEHICULO = [('AUMOV', 'AUTOMÓVIL / MOTOCICLETA'), ('AERN', 'AERONAVE'), ('BARYA', 'BARCO / YATE')]
+MARCAS = [('NISSAN', ['VERSA', 'SENTRA', 'MARCH']), ('CHEVROLET', ['AVEO', 'SPARK', 'TRAX']),
+          ('VOLKSWAGEN', ['JETTA', 'VENTO', 'POLO']), ('TOYOTA', ['COROLLA', 'YARIS', 'HILUX'])]
+TIPOS_INVERSION = [('BANC', 'BANCARIA', [('CNOM', 'CUENTA DE NÓMINA'), ('CAHO', 'CUENTA DE AHORRO')]),
+                   ('FINV', 'FONDOS DE INVERSIÓN', [('SOIN', 'SOCIEDADES DE INVERSIÓN')]),
+                   ('SEGR', 'SEGUROS', [('SEGV', 'SEGURO DE VIDA')])]
+BANCOS = ['BBVA MEXICO', 'BANAMEX', 'BANORTE', 'SANTANDER', 'HSBC', 'SCOTIABANK']
+TIPOS_ADEUDO = [('CHIP', 'CRÉDITO HIPOTECARIO'), ('CAUT', 'CRÉDITO AUTOMOTRIZ'), ('TDC', 'TARJETA DE CRÉDITO')]
+PROGRAMAS = ['BECAS BENITO JUAREZ', 'PENSION ADULTOS MAYORES', 'SEMBRANDO VIDA', 'JOVENES CONSTRUYENDO']
+SECTORES = [('AGRI', 'AGRICULTURA'), ('COMER', 'COMERCIO'), ('SFS', 'SERVICIOS FINANCIEROS'), ('CONS', 'CONSTRUCCIÓN')]
+
+OCDS_CATEGORIAS = ['goods', 'services', 'works']
+OCDS_METODOS = [('open', 'Licitación Pública'), ('selective', 'Invitación a cuando menos tres'),
+                ('direct', 'Adjudicación Directa')]
+OCDS_ITEMS = [('42131600', 'Guantes médicos', 'Caja'), ('44121600', 'Papelería', 'Paquete'),
+              ('72101500', 'Mantenimiento de edificios', 'Servicio'), ('25101500', 'Vehículos', 'Pieza'),
+              ('43211500', 'Computadoras', 'Pieza'), ('50202300', 'Agua embotellada', 'Garrafón')]
+ENTIDADES = ['Aguascalientes', 'Jalisco', 'Nuevo León', 'Puebla', 'Yucatán', 'Sonora', 'Oaxaca', 'Chiapas']
+
+
+def record_rng(seed, index):
+    return random.Random(seed * 1_000_003 + index)
+
+
+def catalogo(rng, opciones):
+    """Catálogo como {clave, valor} (esquema nuevo) o como texto (esquema anterior)."""
+    clave, valor = rng.choice(opciones)[:2]
+    return {'clave': clave, 'valor': valor} if rng.random() < 0.85 else valor
+
+
+def monto(rng, low, high, dirty=False):
+    """Monto como {valor, moneda} o como número; con dirty a veces negativo."""
+    value = round(rng.uniform(low, high), 2)
+    if dirty and rng.random() < 0.5:
+        value = -value
+    return {'valor': value, 'moneda': 'MXN' if rng.random() < 0.97 else 'USD'} if rng.random() < 0.9 else value
+
+
+def fecha(rng, start_year=1995, end_year=2024, dirty=False):
+    year = rng.randint(2030, 2035) if dirty and rng.random() < 0.5 else rng.randint(start_year, end_year)
+    return f"{year:04d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def lista(rng, keys, items):
+    """Renglones bajo una de las claves candidatas, o la lista directa si se acepta ('raw')."""
+    key = rng.choice(keys)
+    if key is None:
+        return items
+    return {'ninguno': not items, key: items}
+
+
+def persona(rng):
+    return rng.choice(NOMBRES), rng.choice(APELLIDOS), rng.choice(APELLIDOS)
+
+
+def curp(rng, nombre, paterno, materno):
+    return (f"{paterno[:2]}{materno[0]}{nombre[0]}{rng.randint(50, 99)}{rng.randint(1, 12):02d}"
+            f"{rng.randint(1, 28):02d}{rng.choice('HM')}JC{paterno[2]}{materno[1]}{nombre[1]}0{rng.randint(0, 9)}")
+
+
+def experiencia(rng):
+    return {
+        'ambitoSector': catalogo(rng, [('PUB', 'PÚBLICO'), ('PRV', 'PRIVADO')]),
+        'nivelOrdenGobierno': catalogo(rng, [(n[:3], n) for n in NIVELES]),
+        'ambitoPublico': catalogo(rng, [('EJE', 'EJECUTIVO'), ('LEG', 'LEGISLATIVO'), ('JUD', 'JUDICIAL')]),
+        'nombreEntePublico': rng.choice(INSTITUCIONES),
+        'areaAdscripcion': 'DIRECCION GENERAL',
+        'empleoCargoComision': rng.choice(CARGOS),
+        'fechaIngreso': fecha(rng, 1990, 2004),
+        'fechaEgreso': fecha(rng, 2005, 2020),
+        'ubicacion': catalogo(rng, [('MX', 'MÉXICO'), ('EX', 'EXTRANJERO')]),
+    }
+
+
+def s1_declaration(index, seed=0, state='SINTETICO'):
+    """Una declaración del S1 con la estructura de completo.json."""
+    rng = record_rng(seed, index)
+    dirty = rng.random() < DIRTY_FRACTION
+    nombre, paterno, materno = persona(rng)
+    rfc = f"{paterno[:2]}{materno[0]}{nombre[0]}{rng.randint(50, 99)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+    homoclave = f"{rng.choice('ABCDEFGH')}{rng.randint(0, 9)}{rng.choice('ABCDEFGH')}"
+    correo = f"{nombre.lower()}.{paterno.lower()}{index}@{state.lower()}.gob.mx"
+    institucion = rng.choice(INSTITUCIONES)
+    empleo = {
+        'nombreEntePublico': institucion,
+        'empleoCargoComision': rng.choice(CARGOS),
+        'nivelEmpleoCargoComision': f"{rng.choice('ABCDEFG')}{rng.randint(1, 30)}",
+        'nivelOrdenGobierno': rng.choice(NIVELES),
+    }
+    mensual = rng.uniform(8_000, 120_000)
+    otros = rng.uniform(0, 10_000) if rng.random() < 0.3 else 0
+    if rng.random() < 0.02:
+        mensual *= 1000  # sueldos mal capturados (p.ej. en centavos)
+
+    situacion = {
+        'datosGenerales': {
+            'nombre': nombre,
+            'primerApellido': paterno,
+            'segundoApellido': materno,
+            'curp': curp(rng, nombre, paterno, materno),
+            'rfc': {'rfc': rfc, 'homoClave': homoclave} if rng.random() < 0.8 else rfc + homoclave,
+            'correoElectronico': ({'institucional': correo, 'personal': f"{nombre.lower()}{index}@correo.mx"}
+                                  if rng.random() < 0.8 else correo),
+        },
+        'datosEmpleoCargoComision': empleo if rng.random() < 0.7 else [empleo],
+        'experienciaLaboral': lista(rng, ['experiencia', None],
+                                    [experiencia(rng) for _ in range(rng.randint(0, 3))]),
+        'ingresos': {
+            'remuneracionMensualCargoPublico': monto(rng, mensual * 0.8, mensual),
+            'otrosIngresosMensualesTotal': monto(rng, otros, otros),
+            'ingresoMensualNetoDeclarante': monto(rng, mensual + otros, mensual + otros, dirty),
+            'ingresoAnualNetoDeclarante': monto(rng, (mensual + otros) * 12, (mensual + otros) * 12, dirty),
+        },
+        'bienesInmuebles': lista(rng, ['bienInmueble', 'bienesInmuebles'], [{
+            'tipoInmueble': catalogo(rng, TIPOS_INMUEBLE),
+            'titular': ([{'clave': 'DEC', 'valor': 'DECLARANTE'}] if rng.random() < 0.8 else 'DECLARANTE'),
+            'valorAdquisicion': monto(rng, 300_000, 5_000_000, dirty),
+            'formaAdquisicion': catalogo(rng, FORMAS_ADQUISICION),
+            'fechaAdquisicion': fecha(rng, dirty=dirty),
+        } for _ in range(rng.choice([0, 0, 1, 1, 2]))]),
+        'bienesMuebles': lista(rng, ['bienMueble', 'bienesMuebles'], [{
+            'tipoBien': catalogo(rng, TIPOS_BIEN),
+            'descripcionGeneralBien': 'MUEBLES Y ELECTRODOMESTICOS',
+            'titular': [{'clave': 'DEC', 'valor': 'DECLARANTE'}],
+            'valorAdquisicion': monto(rng, 5_000, 300_000, dirty),
+            'formaAdquisicion': catalogo(rng, FORMAS_ADQUISICION),
+            'fechaAdquisicion': fecha(rng),
+        } for _ in range(rng.choice([0, 1, 2]))]),
+        'vehiculos': lista(rng, ['vehiculo', 'vehiculos'], [
+            vehiculo(rng, dirty) for _ in range(rng.choice([0, 1, 1, 2]))]),
+        inversiones_key(rng): lista(rng, ['inversion', 'inversiones'], [
+            inversion(rng, dirty) for _ in range(rng.choice([0, 1, 2, 3]))]),
+        'adeudosPasivos': lista(rng, ['adeudo', 'adeudos'], [{
+            'tipoAdeudo': catalogo(rng, TIPOS_ADEUDO),
+            'montoOriginal': monto(rng, 10_000, 2_000_000),
+            'saldoInsolutoSituacionActual': monto(rng, 0, 1_000_000, dirty),
+            'fechaAdquisicion': fecha(rng, 2010, 2024),
+            'otorganteCredito': {'nombreInstitucion': rng.choice(BANCOS)},
+        } for _ in range(rng.choice([0, 0, 1]))]),
+        'prestamoOComodato': lista(rng, ['prestamo'], [{
+            'tipoBien': catalogo(rng, [('VEH', 'VEHÍCULO'), ('INM', 'INMUEBLE')]),
+            'marca': 'NISSAN', 'modelo': 'TSURU', 'anio': rng.randint(1995, 2020),
+            'numeroSerieRegistro': f"SR{rng.randint(10 ** 8, 10 ** 9)}",
+            'relacionConDuenio': catalogo(rng, [('FAM', 'FAMILIAR'), ('AMI', 'AMIGO')]),
+            'duenioTitular': {'nombreRazonSocial': ' '.join(persona(rng))},
+        } for _ in range(rng.choice([0, 0, 0, 1]))]),
+    }
+    if rng.random() < 0.6:
+        situacion['datosPareja'] = {'ninguno': True}
+    else:
+        p_nombre, p_paterno, p_materno = persona(rng)
+        situacion['datosPareja'] = {
+            'ninguno': False, 'nombre': p_nombre, 'primerApellido': p_paterno, 'segundoApellido': p_materno,
+            'relacionConDeclarante': catalogo(rng, [('CONY', 'CÓNYUGE'), ('CONC', 'CONCUBINA/CONCUBINARIO')]),
+            'ciudadanoExtranjero': False, 'curp': 'XXXXXXXXXXXXXXXXXX', 'habitaDomicilioDeclarante': True,
+            'actividadLaboralSectorPublico': catalogo(rng, [('PUB', 'PÚBLICO'), ('PRI', 'PRIVADO'), ('NIN', 'NINGUNO')]),
+        }
+    situacion['datosDependientesEconomicos'] = lista(rng, ['dependienteEconomico', 'dependientes'], [{
+        'nombre': persona(rng)[0], 'primerApellido': paterno, 'segundoApellido': materno,
+        'parentescoRelacion': catalogo(rng, [('HIJ', 'HIJO(A)'), ('PAD', 'PADRE'), ('MAD', 'MADRE')]),
+        'ciudadanoExtranjero': False,
+        'actividadLaboralSectorPublico': catalogo(rng, [('NIN', 'NINGUNO'), ('PRI', 'PRIVADO')]),
+    } for _ in range(rng.choice([0, 1, 2, 3]))])
+
+    interes = {
+        'apoyos': lista(rng, ['apoyo', 'apoyos'], [{
+            'beneficiarioPrograma': catalogo(rng, [('DEC', 'DECLARANTE'), ('HIJ', 'HIJO(A)')]),
+            'nombrePrograma': rng.choice(PROGRAMAS),
+            'institucionOtorgante': rng.choice(INSTITUCIONES),
+            'nivelOrdenGobierno': rng.choice(NIVELES),
+            'tipoApoyo': catalogo(rng, [('SUB', 'SUBSIDIO'), ('BEC', 'BECA')]),
+            'formaRecepcion': rng.choice(['MONETARIO', 'ESPECIE']),
+            'montoApoyoMensual': monto(rng, 500, 5_000, dirty),
+        } for _ in range(rng.choice([0, 0, 0, 1]))]),
+        'participacion': lista(rng, ['participacion', 'participaciones'], [{
+            'nombreEmpresaSociedadAsociacion': f"EMPRESA {rng.choice(APELLIDOS)} SA DE CV",
+            'tipoParticipacion': catalogo(rng, [('SOCI', 'SOCIO'), ('ACCI', 'ACCIONISTA')]),
+            'porcentajeParticipacion': rng.randint(150, 200) if dirty else rng.randint(1, 100),
+            'sector': catalogo(rng, SECTORES),
+            'recibeRemuneracion': rng.random() < 0.5,
+        } for _ in range(rng.choice([0, 0, 0, 1]))]),
+    }
+
+    return {
+        'id': None if dirty and rng.random() < 0.2 else str(uuid.UUID(int=rng.getrandbits(128))),
+        'metadata': {
+            'actualizacion': f"{fecha(rng, 2020, 2024, dirty)}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00.000Z",
+            'institucion': institucion,
+            'tipo': rng.choice(TIPOS_DECLARACION),
+        },
+        'declaracion': {'situacionPatrimonial': situacion, 'interes': interes},
+    }
+
+
+def vehiculo(rng, dirty=False):
+    marca, modelos = rng.choice(MARCAS)
+    return {
+        'tipoVehiculo': catalogo(rng, TIPOS_VEHICULO),
+        'marca': marca,
+        'modelo': rng.choice(modelos),
+        'anio': rng.randint(1800, 1850) if dirty and rng.random() < 0.3 else rng.randint(2000, 2024),
+        'valorAdquisicion': monto(rng, 80_000, 900_000, dirty),
+        'formaAdquisicion': catalogo(rng, FORMAS_ADQUISICION),
+        'fechaAdquisicion': fecha(rng, 2000, 2024),
+    }
+
+
+def inversiones_key(rng):
+    return 'inversionesCuentasValores' if rng.random() < 0.8 else 'inversiones'
+
+
+def inversion(rng, dirty=False):
+    clave, valor, subtipos = rng.choice(TIPOS_INVERSION)
+    item = {
+        'tipoInversion': {'clave': clave, 'valor': valor} if rng.random() < 0.85 else valor,
+        'subTipoInversion': catalogo(rng, subtipos),
+        'numeroCuentaContrato': 'XXXXXXXX',
+        'saldoSituacionActual': monto(rng, 0, 800_000, dirty),
+    }
+    banco = rng.choice(BANCOS)
+    if rng.random() < 0.7:
+        # Esquema nuevo: localizacionInversion anidada; el anterior tiene el campo directo
+        item['localizacionInversion'] = {'pais': 'MX', 'institucionRazonSocial': banco}
+    else:
+        item['institucionRazonSocial'] = banco
+    return item
+
+
+def ocds_release(index, seed=0):
+    """
+    Un release OCDS. Los RELEASES_PER_OCID releases de un mismo ocid son las
+    etapas de un proceso: licitación, luego adjudicación y luego contrato.
+    """
+    process, stage = divmod(index, RELEASES_PER_OCID)
+    rng = record_rng(seed, process)  # datos del proceso, iguales en todas sus etapas
+    ocid = f"ocds-sint01-{process:09d}"
+    metodo, detalle = rng.choice(OCDS_METODOS)
+    year = rng.randint(2018, 2024)
+    month = rng.randint(1, 9)
+    items = []
+    for n in range(rng.randint(1, 4)):
+        clave, descripcion, unidad = rng.choice(OCDS_ITEMS)
+        items.append({
+            'id': str(n + 1), 'description': descripcion, 'quantity': rng.randint(1, 500),
+            'classification': {'scheme': 'UNSPSC', 'id': clave, 'description': descripcion},
+            'unit': {'name': unidad, 'value': {'amount': round(rng.uniform(10, 50_000), 2), 'currency': 'MXN'}},
+        })
+    total = round(sum(i['quantity'] * i['unit']['value']['amount'] for i in items), 2)
+    buyer = {'id': f"MX-COMPRADOR-{rng.randint(1, 300):04d}", 'name': rng.choice(INSTITUCIONES)}
+    supplier = {'id': f"MX-RFC-{rng.randint(10 ** 6, 10 ** 7)}", 'name': f"{rng.choice(APELLIDOS)} Y ASOCIADOS SA DE CV"}
+
+    release = {
+        'ocid': ocid,
+        'id': f"{ocid}-{('tender', 'award', 'contract')[stage % 3]}-{stage + 1}",
+        'date': f"{year}-{month + stage:02d}-{rng.randint(1, 28):02d}T12:00:00Z",
+        'tag': [('tender', 'award', 'contract')[stage % 3]],
+        'initiationType': 'tender',
+        'buyer': buyer,
+        'parties': [
+            {'id': buyer['id'], 'name': buyer['name'], 'roles': ['buyer', 'procuringEntity'],
+             'identifier': {'legalName': buyer['name']},
+             'contactPoint': {'name': ' '.join(persona(rng)), 'email': 'compras@gob.mx', 'telephone': '5555555555'},
+             'address': {'region': rng.choice(ENTIDADES), 'locality': 'CENTRO'}},
+        ],
+        'tender': {
+            'id': f"{ocid}-tender",
+            'title': f"Adquisición de {items[0]['description'].lower()}",
+            'description': f"Proceso {process} de {buyer['name'].lower()}",
+            'status': 'active' if stage == 0 else 'complete',
+            'procurementMethod': metodo,
+            'procurementMethodDetails': detalle,
+            'mainProcurementCategory': rng.choice(OCDS_CATEGORIAS),
+            'value': {'amount': total, 'currency': 'MXN'},
+            'tenderPeriod': {'startDate': f"{year}-{month:02d}-01T09:00:00Z",
+                             'endDate': f"{year}-{month:02d}-20T18:00:00Z"},
+            'items': items,
+        },
+    }
+    if stage >= 1:
+        release['parties'].append({'id': supplier['id'], 'name': supplier['name'], 'roles': ['supplier'],
+                                   'identifier': {'legalName': supplier['name']},
+                                   'address': {'region': rng.choice(ENTIDADES)}})
+        release['awards'] = [{
+            'id': f"{ocid}-award-1", 'title': release['tender']['title'], 'status': 'active',
+            'date': f"{year}-{month + 1:02d}-05T12:00:00Z",
+            'value': {'amount': round(total * rng.uniform(0.85, 1.0), 2), 'currency': 'MXN'},
+            'suppliers': [supplier],
+        }]
+    if stage >= 2:
+        release['contracts'] = [{
+            'id': f"{ocid}-contract-1", 'awardID': f"{ocid}-award-1", 'title': release['tender']['title'],
+            'status': 'active', 'value': release['awards'][0]['value'],
+            'dateSigned': f"{year}-{month + 2:02d}-10T12:00:00Z",
+            'period': {'startDate': f"{year}-{month + 2:02d}-11T00:00:00Z", 'endDate': f"{year + 1}-01-31T00:00:00Z"},
+        }]
+    return release
+
+
+GENERATORS = {
+    's1': s1_declaration,
+    'ocds': ocds_release,
+}
+
+
+def write_json_array(records, path):
+    """Escribe los registros como un arreglo JSON (gzip si termina en .gz), uno a la vez."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    opener = gzip.open if path.endswith('.gz') else open
+    kwargs = {'compresslevel': 1} if path.endswith('.gz') else {}
+    count = 0
+    with opener(tmp_path, 'wt', encoding='utf-8', **kwargs) as f:
+        f.write('[')
+        for record in records:
+            f.write(',\n' if count else '\n')
+            f.write(json.dumps(record, ensure_ascii=False))
+            count += 1
+        f.write('\n]\n')
+    os.replace(tmp_path, path)
+    return count
+
+
+def generate(kind, count, path, seed=0):
+    """Genera `count` registros del tipo indicado en `path`. Devuelve el número de registros."""
+    generator = GENERATORS[kind]
+    return write_json_array((generator(i, seed) for i in range(count)), path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera declaraciones S1 o releases OCDS sintéticos.")
+    parser.add_argument('kind', choices=sorted(GENERATORS), help="Tipo de registros")
+    parser.add_argument('count', type=int, help="Número de registros")
+    parser.add_argument('output', help="Archivo de salida (.json o .json.gz)")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla (default: 0)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written = generate(args.kind, args.count, args.output, args.seed)
+    print(f"✅ {written:,} registros {args.kind} en {args.output} "
+          f"({os.path.getsize(args.output) / 1e6:,.1f} MB, {time.perf_counter() - start:.1f} s)")
@@ -0,0 +1,3 @@
+"""
+Utilidades compartidas por los pipelines de extracción (system_1 y system_6).
+"""
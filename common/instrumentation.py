@@ -0,0 +1,201 @@
+"""
+Bitácora de ejecución por etapas (JSON lines).
+
+Cada etapa instrumentada agrega una línea al archivo de la bitácora con su
+tiempo de pared y de CPU, filas de entrada y de salida, bytes escritos y RSS:
+
+    with stage('process_tables', state=estado, tables=tablas) as s:
+        ...
+        s.rows_in, s.rows_out = len(registros), filas
+
+La ruta se toma de DATATON_RUN_LOG; los scripts llaman configure_run_log() con
+su ruta por defecto (p.ej. <salida>/run_log.jsonl), que se guarda en el entorno
+para que los procesos del pool escriban a la misma bitácora. Sin ruta (o con
+DATATON_RUN_LOG vacío) no se escribe nada. Todas las líneas de una corrida
+comparten `run_id`; cada proceso agrega sus líneas con una sola escritura.
+
+cpu_s es el tiempo de CPU del proceso completo (incluye los hilos de DuckDB y
+de descompresión) y peak_rss_mb el máximo del proceso hasta ese momento, no
+solo de la etapa.
+
+Perfilado opcional con DATATON_PROFILE=cprofile, tracemalloc o ambos separados
+por coma. Solo se perfila la etapa más externa de cada hilo: cProfile guarda
+<bitácora>/../profiles/<etapa>_<pid>_<n>.prof (ver con `python -m pstats`) y
+tracemalloc agrega a la línea el pico de memoria de Python y las líneas de
+código que más memoria asignaron.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from common.parallel import peak_rss_mb
+
+RUN_LOG_ENV = 'DATATON_RUN_LOG'
+RUN_ID_ENV = 'DATATON_RUN_ID'
+PROFILE_ENV = 'DATATON_PROFILE'
+TRACEMALLOC_TOP = 15
+
+_lock = threading.Lock()
+_local = threading.local()
+_profiles = {'count': 0}
+
+
+def configure_run_log(default_path):
+    """Usa default_path como bitácora si DATATON_RUN_LOG no está definido. Devuelve la ruta vigente."""
+    if RUN_LOG_ENV not in os.environ:
+        os.environ[RUN_LOG_ENV] = os.path.abspath(default_path)
+    if RUN_ID_ENV not in os.environ:
+        os.environ[RUN_ID_ENV] = f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+    return run_log_path()
+
+
+def run_log_path():
+    return os.environ.get(RUN_LOG_ENV) or None
+
+
+def profile_modes():
+    return {mode.strip() for mode in os.environ.get(PROFILE_ENV, '').lower().split(',') if mode.strip()}
+
+
+def current_rss_mb():
+    """RSS actual del proceso en MB (Linux); None si no se puede leer."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def write_entry(entry):
+    """Agrega una línea a la bitácora (si está configurada)."""
+    path = run_log_path()
+    if not path:
+        return
+    entry = {'run_id': os.environ.get(RUN_ID_ENV), 'script': os.path.basename(sys.argv[0]) or None,
+             'pid': os.getpid(), **entry}
+    line = json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+    with _lock:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def record(name, **fields):
+    """Línea sin medición de tiempo, p.ej. totales por tabla calculados en otro lado."""
+    rss = current_rss_mb()
+    write_entry({'stage': name, 'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+                 **fields, 'rss_mb': round(rss, 1) if rss is not None else None,
+                 'peak_rss_mb': round(peak_rss_mb(), 1)})
+
+
+class Stage:
+    """Datos de una etapa en curso; el código instrumentado llena los conteos."""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.rows_in = None
+        self.rows_out = None
+        self.bytes_written = None
+        # Las funciones que reportan fallas con un valor de retorno la marcan como 'error'
+        self.status = 'ok'
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+
+class _Profiler:
+    """cProfile y/o tracemalloc alrededor de la etapa más externa del hilo."""
+
+    def __init__(self, name, modes):
+        self.name = name
+        self.profile = None
+        self.tracing = False
+        if 'cprofile' in modes:
+            import cProfile
+            self.profile = cProfile.Profile()
+        if 'tracemalloc' in modes:
+            import tracemalloc
+            # tracemalloc es global: solo lo controla la etapa que lo inicia
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.tracing = True
+
+    def start(self):
+        if self.profile is not None:
+            self.profile.enable()
+
+    def stop(self, entry):
+        if self.profile is not None:
+            self.profile.disable()
+            log_path = run_log_path()
+            directory = os.path.join(os.path.dirname(log_path) if log_path else '.', 'profiles')
+            os.makedirs(directory, exist_ok=True)
+            with _lock:
+                _profiles['count'] += 1
+                number = _profiles['count']
+            path = os.path.join(directory, f"{self.name}_{os.getpid()}_{number}.prof")
+            self.profile.dump_stats(path)
+            entry['profile'] = path
+        if self.tracing:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            entry['tracemalloc_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 1)
+            entry['tracemalloc_top'] = [
+                {'line': str(stat.traceback[0]), 'mb': round(stat.size / 1024 ** 2, 2), 'blocks': stat.count}
+                for stat in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]]
+            tracemalloc.stop()
+
+
+@contextmanager
+def stage(name, **fields):
+    """
+    Mide una etapa y escribe su línea al salir, también si falla (status 'error').
+    Sin bitácora configurada solo cuesta un par de llamadas a time.
+    """
+    current = Stage(name, dict(fields))
+    depth = getattr(_local, 'depth', 0)
+    modes = profile_modes() if depth == 0 and run_log_path() else set()
+    profiler = _Profiler(name, modes) if modes else None
+    started_at = datetime.now(timezone.utc)
+    wall, cpu = time.perf_counter(), time.process_time()
+    _local.depth = depth + 1
+    error = None
+    if profiler:
+        profiler.start()
+    try:
+        yield current
+    except BaseException as e:
+        current.status, error = 'error', f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _local.depth = depth
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        entry = {'stage': name, 'ts': started_at.isoformat(timespec='milliseconds'), 'status': current.status,
+                 **current.fields,
+                 'wall_s': round(wall, 4), 'cpu_s': round(cpu, 4),
+                 'rows_in': current.rows_in, 'rows_out': current.rows_out,
+                 'rows_per_s': round((current.rows_in or current.rows_out or 0) / wall, 1) if wall else None,
+                 'bytes_written': current.bytes_written}
+        rss = current_rss_mb()
+        entry['rss_mb'] = round(rss, 1) if rss is not None else None
+        entry['peak_rss_mb'] = round(peak_rss_mb(), 1)
+        if error:
+            entry['error'] = error
+        if profiler:
+            profiler.stop(entry)
+        write_entry(entry)
+
+
+def path_bytes(path):
+    """Tamaño de un archivo o de todos los archivos bajo un directorio (0 si no existe)."""
+    if not os.path.exists(path):
+        return 0
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
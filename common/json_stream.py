@@ -0,0 +1,390 @@
+"""
+Lectura incremental de los archivos JSON masivos de la PDN.
+
+Los archivos por estado son un único arreglo JSON de cientos de MB. En lugar de
+cargarlos completos con json.load, estas utilidades leen el arreglo por bloques
+y entregan un registro a la vez, de modo que la memoria depende del tamaño del
+lote y no del tamaño del archivo.
+"""
+import gzip
+import io
+import json
+import os
+import queue
+import re
+import threading
+
+CHUNK_SIZE = 1 << 20  # 1 MB de texto por lectura
+PREFETCH_CHUNKS = 8  # bloques descomprimidos en espera entre el hilo y el parser
+
+# Extensiones de entrada soportadas, de la preferida a la menos preferida
+SOURCE_EXTENSIONS = ('.json', '.json.gz', '.json.zst')
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Posible inicio de registro: '{' precedido de '}' y ',' (en UTF-8 estos bytes
+# nunca forman parte de un carácter multibyte, así que se buscan en bytes)
+_RECORD_BOUNDARY = re.compile(rb'\}[ \t\n\r]*,[ \t\n\r]*(\{)')
+# Ventana inicial y máxima para decodificar el registro de un candidato
+PROBE_BYTES = 1 << 20
+MAX_PROBE_BYTES = 64 << 20
+
+
+def is_compressed(path):
+    return path.endswith(('.gz', '.zst'))
+
+
+def open_binary(path):
+    """Abre un .json, .json.gz o .json.zst como flujo de bytes ya descomprimido."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("Leer archivos .zst requiere zstandard (pip install zstandard)") from e
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+
+def open_source(path, threaded=None):
+    """
+    Abre un archivo .json, .json.gz o .json.zst como texto UTF-8, sin pasar por
+    disco. Con threaded=True la descompresión corre en un hilo aparte y se
+    traslapa con el parseo (zlib y zstd liberan el GIL mientras descomprimen);
+    por defecto se usa con archivos comprimidos si hay más de un CPU.
+    """
+    raw = open_binary(path)
+    if threaded is None:
+        threaded = is_compressed(path) and (os.cpu_count() or 1) > 1
+    if threaded:
+        raw = io.BufferedReader(ThreadedReader(raw), buffer_size=CHUNK_SIZE)
+    elif not isinstance(raw, io.BufferedIOBase):
+        raw = io.BufferedReader(raw, buffer_size=CHUNK_SIZE)
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+
+class ThreadedReader(io.RawIOBase):
+    """
+    Lee `raw` en un hilo aparte y entrega los bloques por una cola acotada, de
+    modo que a lo más hay PREFETCH_CHUNKS bloques descomprimidos en memoria.
+    Los errores del hilo se relanzan en el lector.
+    """
+
+    def __init__(self, raw, chunk_size=CHUNK_SIZE, prefetch=PREFETCH_CHUNKS):
+        self.raw = raw
+        self.chunks = queue.Queue(maxsize=prefetch)
+        self.pending = memoryview(b'')
+        self.finished = False
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._produce, args=(chunk_size,),
+                                       name='descompresion', daemon=True)
+        self.thread.start()
+
+    def _produce(self, chunk_size):
+        try:
+            while not self.stopping.is_set():
+                chunk = self.raw.read(chunk_size)
+                if not chunk:
+                    break
+                self._put(chunk)
+            self._put(b'')
+        except Exception as e:
+            self._put(e)
+
+    def _put(self, item):
+        # Reintentar con timeout para poder salir si el lector cierra antes de terminar
+        while not self.stopping.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.pending:
+            if self.finished:
+                return 0
+            item = self.chunks.get()
+            if isinstance(item, Exception):
+                self.finished = True
+                raise item
+            if not item:
+                self.finished = True
+                return 0
+            self.pending = memoryview(item)
+        n = min(len(buffer), len(self.pending))
+        buffer[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+    def readall(self):
+        # json.load lee todo de una vez: juntar los bloques completos sin partirlos
+        parts = [bytes(self.pending)]
+        self.pending = memoryview(b'')
+        while not self.finished:
+            item = self.chunks.get()
+            if isinstance(item, Exception):
+                self.finished = True
+                raise item
+            if not item:
+                self.finished = True
+            parts.append(item)
+        return b''.join(parts)
+
+    def close(self):
+        if not self.closed:
+            self.stopping.set()
+            self.thread.join()
+            self.raw.close()
+        super().close()
+
+
+def iter_json_array(fileobj, chunk_size=CHUNK_SIZE):
+    """
+    Genera los elementos del arreglo JSON de primer nivel de `fileobj` uno por uno.
+    Solo mantiene en memoria el bloque leído y el registro en curso.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos < len(buf) or not fill():
+                return
+
+    fill()
+    if buf.startswith('\ufeff'):
+        pos = 1
+    skip_whitespace()
+    if pos >= len(buf) or buf[pos] != '[':
+        raise ValueError("Se esperaba un arreglo JSON en el primer nivel")
+    pos += 1
+
+    skip_whitespace()
+    if pos < len(buf) and buf[pos] == ']':
+        return
+
+    while True:
+        skip_whitespace()
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+            # Un valor que toca el final del bloque puede estar truncado (p.ej. un número)
+            truncated = end >= len(buf) and not eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            truncated = True
+        if truncated:
+            if not fill():
+                # Nada más que leer: el último intento decide
+                obj, end = decoder.raw_decode(buf, pos)
+            else:
+                continue
+        pos = end
+        yield obj
+
+        skip_whitespace()
+        if pos >= len(buf):
+            raise ValueError("Arreglo JSON incompleto: falta ']'")
+        if buf[pos] == ',':
+            pos += 1
+        elif buf[pos] == ']':
+            return
+        else:
+            raise ValueError(f"Carácter inesperado {buf[pos]!r} entre registros")
+
+
+def iter_batches(records, batch_size):
+    """Agrupa un iterable de registros en listas de tamaño `batch_size`."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def probe_record(f, offset, eof_offset):
+    """
+    Decodifica el valor JSON que empieza en `offset` y devuelve (valor, carácter
+    siguiente) o None si no se pudo decodificar dentro de MAX_PROBE_BYTES.
+    """
+    decoder = json.JSONDecoder()
+    window = PROBE_BYTES
+    while True:
+        f.seek(offset)
+        data = f.read(window)
+        # El corte de la ventana puede partir un carácter multibyte al final
+        text = data.decode('utf-8', errors='ignore')
+        try:
+            value, end = decoder.raw_decode(text)
+        except json.JSONDecodeError:
+            if offset + len(data) >= eof_offset or window >= MAX_PROBE_BYTES:
+                return None
+            window *= 2
+            continue
+        rest = text[_WHITESPACE.match(text, end).end():][:1]
+        if not rest and offset + len(data) < eof_offset and window < MAX_PROBE_BYTES:
+            window *= 2
+            continue
+        return value, rest
+
+
+def find_record_start(f, offset, eof_offset, keys):
+    """
+    Primer inicio de registro de primer nivel a partir de `offset`: un '{' tras
+    '},' cuyo objeto comparte más de la mitad de sus llaves con `keys` (las del
+    primer registro) y va seguido de ',' o ']'. Los objetos anidados casi nunca
+    cumplen ambas cosas; si alguno lo hiciera, read_json_shard lo detecta.
+    """
+    carry = b''
+    position = offset
+    while position < eof_offset:
+        f.seek(position)
+        block = f.read(CHUNK_SIZE)
+        if not block:
+            return None
+        data = carry + block
+        base = position - len(carry)
+        for match in _RECORD_BOUNDARY.finditer(data):
+            candidate = base + match.start(1)
+            if candidate < offset:
+                continue
+            probed = probe_record(f, candidate, eof_offset)
+            if probed is None:
+                continue
+            value, following = probed
+            if isinstance(value, dict) and following in (',', ']') and len(keys & value.keys()) * 2 > len(keys):
+                return candidate
+        position += len(block)
+        # Conservar la cola por si el patrón quedó partido entre bloques
+        carry = data[-64:]
+    return None
+
+
+def split_json_array(path, parts):
+    """
+    Divide el arreglo de primer nivel de un .json sin comprimir en hasta `parts`
+    rangos de bytes (inicio, fin) de tamaño parecido, cada uno empezando en un
+    registro. Los rangos se leen con read_json_shard y, concatenados en orden,
+    cubren exactamente los registros del arreglo.
+    """
+    if is_compressed(path):
+        raise ValueError("Solo se pueden dividir archivos .json sin comprimir")
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(PROBE_BYTES)
+        start = head.find(b'[')
+        if start < 0 or head[:start].strip(b' \t\n\r\xef\xbb\xbf'):
+            raise ValueError("Se esperaba un arreglo JSON en el primer nivel")
+        start += 1
+        probed = probe_record(f, start + len(head[start:]) - len(head[start:].lstrip()), size)
+        if probed is None or not isinstance(probed[0], dict):
+            return [(start, size)]
+        keys = set(probed[0])
+        bounds = [start]
+        for i in range(1, parts):
+            target = max(size * i // parts, bounds[-1] + 1)
+            boundary = find_record_start(f, target, size, keys)
+            if boundary is None:
+                break
+            if boundary > bounds[-1]:
+                bounds.append(boundary)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def mean_record_bytes(path, sample_bytes=PROBE_BYTES):
+    """
+    Tamaño promedio en bytes de los registros que caben en los primeros
+    `sample_bytes` de un arreglo JSON sin comprimir, para dimensionar rangos por
+    número de registros. Si ni el primero cabe, devuelve sample_bytes.
+    """
+    with open(path, 'rb') as f:
+        data = f.read(sample_bytes)
+    # El corte puede partir un carácter multibyte al final
+    text = data.decode('utf-8', errors='ignore')
+    decoder = json.JSONDecoder()
+    start = pos = text.find('[') + 1
+    count = 0
+    while True:
+        pos = _WHITESPACE.match(text, pos).end()
+        try:
+            _, end = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            break
+        count += 1
+        pos = _WHITESPACE.match(text, end).end()
+        if text[pos:pos + 1] != ',':
+            break
+        pos += 1
+    if not count:
+        return max(len(data), 1)
+    return len(text[start:pos].encode('utf-8')) / count
+
+
+def read_json_shard(path, start, end, loads=json.loads):
+    """
+    Registros del rango de bytes [start, end) de un arreglo JSON (ver
+    split_json_array), decodificados con `loads` (bytes -> lista; p.ej.
+    common/decoders.py). El rango debe ser una secuencia completa de registros
+    separados por comas; si no lo es (el corte cayó dentro de un registro) se
+    lanza ValueError. Cuando todos los rangos se leen sin error, los cortes son
+    inicios de registro reales: el primero empieza tras '[' y cada rango válido
+    termina justo donde empieza un registro.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start).strip()
+        at_eof = f.read(1) == b''
+    if at_eof:
+        if not data.endswith(b']'):
+            raise ValueError("Arreglo JSON incompleto: falta ']'")
+        data = data[:-1].rstrip()
+    if data.endswith(b','):
+        data = data[:-1]
+    try:
+        return loads(b'[' + data + b']')
+    except ValueError as e:
+        raise ValueError(f"El rango {start}-{end} no es una secuencia de registros completa: {e}") from e
+
+
+def iter_json_ranges(path, range_bytes, loads=json.loads):
+    """
+    Lee un .json sin comprimir como listas de registros de ~range_bytes cada una,
+    en orden. Si un corte cayó dentro de un registro, ese rango se junta con el
+    siguiente y se vuelve a leer, así que el resultado no depende de los cortes.
+    """
+    ranges = split_json_array(path, max(1, -(-os.path.getsize(path) // range_bytes)))
+    i = 0
+    while i < len(ranges):
+        j = i
+        while True:
+            try:
+                records = read_json_shard(path, ranges[i][0], ranges[j][1], loads)
+                break
+            except ValueError:
+                if j + 1 >= len(ranges):
+                    raise
+                j += 1
+        yield records
+        i = j + 1
@@ -0,0 +1,104 @@
+"""
+Manifiesto de extracción incremental.
+
+Por cada estado se guarda la huella del archivo fuente (tamaño, mtime y SHA-256),
+la versión del extractor, el formato y las tablas generadas. Una corrida solo
+reprocesa los estados cuya entrada o versión de extractor cambió. Las salidas se
+escriben en un directorio temporal y se publican con un rename, de modo que una
+caída a medio estado nunca deja un directorio a medias en su lugar.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+
+MANIFEST_NAME = '_manifest.json'
+STAGING_DIR = '.staging'
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path, sha256=None):
+    stat = os.stat(path)
+    return {
+        'path': os.path.abspath(path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': sha256 or file_sha256(path),
+    }
+
+
+def publish_dir(staging_dir, final_dir):
+    """Reemplaza `final_dir` por `staging_dir` con renames dentro del mismo disco."""
+    old_dir = None
+    if os.path.exists(final_dir):
+        old_dir = f"{final_dir}.old-{os.getpid()}"
+        os.replace(final_dir, old_dir)
+    os.replace(staging_dir, final_dir)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+class Manifest:
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.output_dir = output_dir
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('states', {})
+
+    def check(self, name, source_path, version, output_format):
+        """
+        Decide si un estado debe reprocesarse. Devuelve (motivo, sha256); el motivo
+        es None si el estado está al día. El hash solo se calcula cuando tamaño o
+        mtime cambiaron, y se devuelve para no volver a leer el archivo.
+        """
+        entry = self.entries.get(name)
+        if entry is None:
+            return 'nuevo', None
+        if entry.get('extractor_version') != version:
+            return 'cambió la versión del extractor', None
+        if entry.get('format') != output_format:
+            return 'cambió el formato de salida', None
+        state_dir = os.path.join(self.output_dir, name)
+        if not all(os.path.exists(os.path.join(state_dir, f)) for f in entry.get('outputs', [])):
+            return 'faltan archivos de salida', None
+
+        source = entry.get('source', {})
+        stat = os.stat(source_path)
+        if source.get('path') != os.path.abspath(source_path) or source.get('size') != stat.st_size:
+            return 'cambió el archivo fuente', None
+        if source.get('mtime') == stat.st_mtime:
+            return None, None
+
+        # Mismo tamaño pero otro mtime: decidir por contenido
+        sha256 = file_sha256(source_path)
+        if sha256 != source.get('sha256'):
+            return 'cambió el contenido del archivo fuente', sha256
+        source['mtime'] = stat.st_mtime
+        return None, sha256
+
+    def record(self, name, fingerprint, version, output_format, rows, outputs):
+        self.entries[name] = {
+            'source': fingerprint,
+            'extractor_version': version,
+            'format': output_format,
+            'rows': rows,
+            'outputs': outputs,
+            'extracted_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        }
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'states': self.entries}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
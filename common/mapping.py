@@ -0,0 +1,366 @@
+"""
+Motor de mapeo declarativo de JSON a tablas.
+
+Cada tabla de salida se describe con un dict:
+
+    'path'      ruta desde el registro hasta el objeto fuente, p.ej.
+                ('declaracion', 'situacionPatrimonial', 'vehiculos'). El último
+                paso puede ser una tupla de alternativas: se usa la primera que
+                no esté vacía. Los pasos intermedios que no sean dict cuentan como {}.
+    'mode'      cómo se normaliza el objeto fuente:
+                  'dict'     (default) lo que no sea dict cuenta como {}
+                  'raw'      se deja tal cual (p.ej. puede ser directamente la lista)
+                  'first'    si es una lista se toma su primer elemento
+                  'optional' solo genera fila si es un dict no vacío
+    'unless'    con mode='optional', clave que si es verdadera omite la fila ('ninguno')
+    'list'      claves candidatas de la lista de renglones. Sin 'list' se genera
+                una fila por registro a partir del objeto fuente.
+    'any_list'  si ninguna clave candidata existe, usar la primera lista del
+                objeto (default True, como get_list)
+    'columns'   lista de (columna, tipo, expresión); los tipos son los de
+                common/writers.py
+
+Expresiones de columna (se evalúan sobre el renglón, siempre un dict):
+
+    'clave'                          renglon.get('clave')
+    ('get', clave, default)          renglon.get(clave, default)
+    ('valor', clave[, default])      {clave: {valor: X}} o {clave: X}
+    ('moneda', clave)                renglon[clave]['moneda'] si es dict
+    ('path', (k1, k2, ...), default) navegación anidada con default
+    ('join', clave, expr, no_lista)  une con ", " los elementos de una lista
+                                     (expr se aplica a cada elemento dict; None
+                                     toma los textos tal cual); si no es lista
+                                     devuelve no_lista, o str(valor) con 'str'
+    ('or', expr1, expr2)             expr1 or expr2
+    ('within', clave, expr, otra)    expr sobre renglon[clave] si es dict (o no
+                                     existe); si no, otra sobre el renglón
+    ('dict_or_value', clave, sub)    renglon[clave][sub] si es un dict no vacío,
+                                     si no renglon[clave]
+    ('entry', expr)                  expr sobre el registro completo
+    ('at', path, expr[, mode])       expr sobre otro objeto del registro
+    ('state',)                       nombre del estado/archivo
+    ('position',)                    posición del registro en el archivo fuente
+                                     (0, 1, ...; cuenta también los que no son dict)
+    ('const', valor)
+
+La especificación se compila una vez a una función de Python que recorre los
+registros en un solo paso: cada ruta se resuelve una vez por registro aunque la
+usen varias tablas, y las expresiones quedan como accesos directos .get() con
+las claves ya fijas en el código.
+
+field_tree() deriva de la misma especificación qué campos de cada registro se
+leen; common/decoders.py lo usa para decodificar solo esos campos.
+"""
+
+
+def get_list(obj, keys_candidates, any_list=True):
+    """Busca la lista de renglones dentro de un objeto probando varias claves."""
+    if isinstance(obj, list):
+        return obj
+    if isinstance(obj, dict):
+        for k in keys_candidates:
+            value = obj.get(k)
+            if isinstance(value, list):
+                return value
+        if any_list:
+            # Fallback: la primera lista que aparezca
+            for v in obj.values():
+                if isinstance(v, list):
+                    return v
+    return []
+
+
+class FieldTree:
+    """
+    Campos que lee el mapeo bajo un objeto. `full` marca los valores que se usan
+    completos (se escriben tal cual o se revisa si están vacíos) y `whole_lists`
+    los que, si son lista, se usan completos. Para las fuentes de renglones,
+    `items` son los campos de cada renglón y `list_keys` las claves candidatas;
+    con `keep_keys` se conservan todas las claves del objeto (get_list con
+    any_list recorre sus valores, y las alternativas de 'path' revisan si está
+    vacío). Sin `items`, los elementos de una lista usan los campos del objeto
+    (modo 'first').
+    """
+
+    def __init__(self):
+        self.children = {}
+        self.full = False
+        self.whole_lists = False
+        self.keep_keys = False
+        self.list_keys = set()
+        self.items = None
+
+    def child(self, key):
+        return self.children.setdefault(key, FieldTree())
+
+    def at(self, path):
+        node = self
+        for key in path:
+            node = node.child(key)
+        return node
+
+
+def _field_nodes(root, path, mode='dict'):
+    """Nodos del objeto fuente de `path`, como lo resuelve _Codegen.node()."""
+    path = tuple(path)
+    if not path:
+        return [root]
+    parent = root.at(path[:-1])
+    last = path[-1]
+    alternatives = last if isinstance(last, tuple) else (last,)
+    nodes = [parent.child(alt) for alt in alternatives]
+    for node in nodes:
+        if mode == 'optional':
+            # La fila depende de que el objeto no esté vacío y las columnas salen de él
+            node.full = True
+        elif len(nodes) > 1:
+            node.keep_keys = True
+    return nodes
+
+
+def _field_expr(root, expr, nodes):
+    if isinstance(expr, str):
+        for node in nodes:
+            node.child(expr).full = True
+        return
+    kind, args = expr[0], expr[1:]
+    if kind == 'get':
+        _field_expr(root, args[0], nodes)
+    elif kind == 'valor':
+        for node in nodes:
+            value = node.child(args[0])
+            value.child('valor').full = True
+            # Si no es dict se escribe el valor completo
+            value.whole_lists = True
+    elif kind == 'moneda':
+        for node in nodes:
+            node.child(args[0]).child('moneda').full = True
+    elif kind == 'path':
+        for node in nodes:
+            node.at(args[0]).full = True
+    elif kind == 'join':
+        key, item_expr, non_list = args
+        items = [node.child(key) for node in nodes]
+        if non_list == 'str':
+            for node in items:
+                node.full = True
+        elif item_expr is not None:
+            _field_expr(root, item_expr, items)
+    elif kind == 'or':
+        _field_expr(root, args[0], nodes)
+        _field_expr(root, args[1], nodes)
+    elif kind == 'within':
+        key, inner, other = args
+        _field_expr(root, inner, [node.child(key) for node in nodes])
+        _field_expr(root, other, nodes)
+    elif kind == 'dict_or_value':
+        for node in nodes:
+            node.child(args[0]).full = True
+    elif kind == 'entry':
+        _field_expr(root, args[0], [root])
+    elif kind == 'at':
+        _field_expr(root, args[1], _field_nodes(root, args[0], args[2] if len(args) > 2 else 'dict'))
+    elif kind not in ('state', 'position', 'const'):
+        raise ValueError(f"Expresión de mapeo desconocida: {expr!r}")
+
+
+def field_tree(mapping, tables=None):
+    """FieldTree de la raíz de cada registro con los campos que leen las tablas indicadas (default: todas)."""
+    root = FieldTree()
+    for name in tables or mapping:
+        spec = mapping[name]
+        mode = spec.get('mode', 'dict')
+        sources = _field_nodes(root, spec.get('path', ()), mode)
+        if 'list' in spec:
+            for node in sources:
+                node.list_keys.update(spec['list'])
+                node.items = node.items or FieldTree()
+                # get_list puede tomar cualquier lista del objeto
+                node.keep_keys = node.keep_keys or spec.get('any_list', True)
+            rows = [node.items for node in sources] + [node.child(key) for node in sources for key in spec['list']]
+        else:
+            rows = sources
+        for _, _, expr in spec['columns']:
+            _field_expr(root, expr, rows)
+    return root
+
+
+def table_schemas(mapping):
+    """Esquema (columna, tipo) de cada tabla, en el formato de common/writers.py."""
+    return {name: [(column, kind) for column, kind, _ in spec['columns']]
+            for name, spec in mapping.items()}
+
+
+class _Codegen:
+    """Arma el código fuente de la función de extracción para un conjunto de tablas."""
+
+    def __init__(self):
+        self.prelude = []
+        self.nodes = {(): 'entry'}
+        self.counter = 0
+
+    def temp(self):
+        self.counter += 1
+        return f"_t{self.counter}"
+
+    def dict_node(self, path):
+        """Variable con el objeto en `path` (solo claves simples), forzado a dict."""
+        key = ('dict', path)
+        if path == ():
+            return 'entry'
+        if key not in self.nodes:
+            parent = self.dict_node(path[:-1])
+            var = f"_n{len(self.nodes)}"
+            self.prelude.append(f"{var} = {parent}.get({path[-1]!r}, {{}})")
+            self.prelude.append(f"if not isinstance({var}, dict): {var} = {{}}")
+            self.nodes[key] = var
+        return self.nodes[key]
+
+    def node(self, path, mode='dict'):
+        path = tuple(path)
+        if not path:
+            return 'entry'
+        last = path[-1]
+        if mode == 'dict' and not isinstance(last, tuple):
+            return self.dict_node(path)
+        key = (mode, path)
+        if key in self.nodes:
+            return self.nodes[key]
+        parent = self.dict_node(path[:-1])
+        var = f"_n{len(self.nodes)}"
+        alternatives = last if isinstance(last, tuple) else (last,)
+        self.prelude.append(f"{var} = {parent}.get({alternatives[0]!r}, {{}})")
+        for alt in alternatives[1:]:
+            self.prelude.append(f"if not {var}: {var} = {parent}.get({alt!r}, {{}})")
+        if mode == 'first':
+            self.prelude.append(f"if isinstance({var}, list) and {var}: {var} = {var}[0]")
+        if mode in ('dict', 'first'):
+            self.prelude.append(f"if not isinstance({var}, dict): {var} = {{}}")
+        elif mode not in ('raw', 'optional'):
+            raise ValueError(f"Modo de mapeo desconocido: {mode}")
+        self.nodes[key] = var
+        return var
+
+    def expr(self, expr, var):
+        if isinstance(expr, str):
+            return f"{var}.get({expr!r})"
+        kind, args = expr[0], expr[1:]
+        if kind == 'get':
+            return f"{var}.get({args[0]!r}, {args[1]!r})"
+        if kind == 'valor':
+            key, default = args[0], (args[1] if len(args) > 1 else None)
+            t = self.temp()
+            fallback = t if default is None else f"({t} if {t} is not None else {default!r})"
+            get_valor = f"{t}.get('valor')" if default is None else f"{t}.get('valor', {default!r})"
+            return f"({get_valor} if isinstance({t} := {var}.get({key!r}), dict) else {fallback})"
+        if kind == 'moneda':
+            t = self.temp()
+            return f"({t}.get('moneda') if isinstance({t} := {var}.get({args[0]!r}), dict) else None)"
+        if kind == 'path':
+            keys, default = args
+            return self.path_expr(var, tuple(keys), default)
+        if kind == 'join':
+            key, item_expr, non_list = args
+            t, j = self.temp(), self.temp()
+            if item_expr is None:
+                items = f"[{j} for {j} in {t} if isinstance({j}, str)]"
+            else:
+                items = f"[{self.expr(item_expr, j)} for {j} in {t} if isinstance({j}, dict)]"
+            other = f"str({t})" if non_list == 'str' else repr(non_list)
+            return f"(', '.join({items}) if isinstance({t} := {var}.get({key!r}, []), list) else {other})"
+        if kind == 'or':
+            return f"({self.expr(args[0], var)} or {self.expr(args[1], var)})"
+        if kind == 'within':
+            key, inner, other = args
+            t = self.temp()
+            return (f"({self.expr(inner, t)} if isinstance({t} := {var}.get({key!r}, {{}}), dict) "
+                    f"else {self.expr(other, var)})")
+        if kind == 'dict_or_value':
+            key, sub = args
+            t = self.temp()
+            return f"({t}.get({sub!r}) if isinstance({t} := {var}.get({key!r}), dict) and {t} else {var}.get({key!r}))"
+        if kind == 'entry':
+            return self.expr(args[0], 'entry')
+        if kind == 'at':
+            mode = args[2] if len(args) > 2 else 'dict'
+            return self.expr(args[1], self.node(args[0], mode))
+        if kind == 'state':
+            return 'state'
+        if kind == 'position':
+            return 'position'
+        if kind == 'const':
+            return repr(args[0])
+        raise ValueError(f"Expresión de mapeo desconocida: {expr!r}")
+
+    def path_expr(self, var, keys, default):
+        if len(keys) == 1:
+            return f"{var}.get({keys[0]!r}, {default!r})"
+        t = self.temp()
+        inner = self.path_expr(t, keys[1:], default)
+        return f"({inner} if isinstance({t} := {var}.get({keys[0]!r}), dict) else {default!r})"
+
+    def table(self, index, spec):
+        """Líneas del cuerpo del ciclo que agregan las filas de una tabla."""
+        mode = spec.get('mode', 'dict')
+        source = self.node(spec.get('path', ()), mode)
+        if 'list' in spec:
+            lines = [f"for item in get_list({source}, {tuple(spec['list'])!r}, {spec.get('any_list', True)!r}):",
+                     "    if not isinstance(item, dict): continue"]
+            var, indent = 'item', '    '
+        elif mode == 'optional':
+            condition = f"isinstance({source}, dict) and {source}"
+            if spec.get('unless'):
+                condition += f" and not {source}.get({spec['unless']!r})"
+            lines = [f"if {condition}:"]
+            var, indent = source, '    '
+        else:
+            lines = []
+            var, indent = source, ''
+        values = ", ".join(self.expr(expr, var) for _, _, expr in spec['columns'])
+        lines.append(f"{indent}add_{index}(({values},))")
+        return lines
+
+
+def compile_mapping(mapping, tables=None):
+    """
+    Compila las tablas indicadas (default: todas) a una función
+    `extract(records, state, start=0)` que devuelve {tabla: [tuplas]} con las
+    columnas en el orden del esquema. `start` es la posición del primer registro
+    de `records` en el archivo (para ('position',) al procesar por lotes).
+    """
+    names = list(tables or mapping)
+    gen = _Codegen()
+    body = []
+    for i, name in enumerate(names):
+        body.extend(gen.table(i, mapping[name]))
+
+    lines = ["def extract(records, state, start=0):"]
+    for i in range(len(names)):
+        lines.append(f"    out_{i} = []; add_{i} = out_{i}.append")
+    lines.append("    for position, entry in enumerate(records, start):")
+    lines.append("        if not isinstance(entry, dict): continue")
+    lines.extend(f"        {line}" for line in gen.prelude + body)
+    lines.append("    return {" + ", ".join(f"{name!r}: out_{i}" for i, name in enumerate(names)) + "}")
+    source = "\n".join(lines) + "\n"
+
+    namespace = {'get_list': get_list}
+    exec(compile(source, f"<mapeo {', '.join(names)}>", 'exec'), namespace)
+    extract = namespace['extract']
+    extract.source = source
+    return extract
+
+
+class Mapping:
+    """Especificación compilada; guarda una función por cada conjunto de tablas pedido."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.schemas = table_schemas(spec)
+        self.columns = {name: [column for column, _ in schema] for name, schema in self.schemas.items()}
+        self.compiled = {}
+
+    def extract(self, records, state, tables=None, start=0):
+        key = tuple(tables or self.spec)
+        if key not in self.compiled:
+            self.compiled[key] = compile_mapping(self.spec, key)
+        return self.compiled[key](records, state, start)
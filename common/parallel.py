@@ -0,0 +1,133 @@
+"""
+Ejecución de estados en paralelo con un pool de procesos.
+
+El planificador ordena las tareas de mayor a menor memoria estimada y solo lanza
+una tarea nueva si la suma de las estimaciones en curso cabe en el presupuesto
+de memoria (siempre se permite al menos una tarea en ejecución). Cada tarea
+corre en un proceso nuevo para que la memoria se devuelva al sistema al terminar.
+"""
+import json
+import os
+import resource
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# Fracción de la RAM física que se usa como presupuesto por defecto
+MEMORY_FRACTION = 0.75
+
+
+def physical_memory_bytes():
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return 4 * 1024 ** 3
+
+
+def default_memory_budget():
+    return int(physical_memory_bytes() * MEMORY_FRACTION)
+
+
+def peak_rss_mb():
+    """RSS pico del proceso actual en MB (ru_maxrss está en KB en Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_task(worker, task):
+    """Ejecuta una tarea y siempre devuelve un reporte, aun si falla."""
+    start = time.perf_counter()
+    report = {'name': task['name'], 'status': 'error', 'memory_estimate_mb': task['memory'] / 1024 ** 2}
+    try:
+        report.update(worker(task) or {})
+        report.setdefault('status', 'ok')
+        if report['status'] == 'error' and 'error' not in report:
+            report['error'] = 'La extracción no terminó correctamente'
+    except Exception as e:
+        report['status'] = 'error'
+        report['error'] = f"{type(e).__name__}: {e}"
+        report['traceback'] = traceback.format_exc()
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    report['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    return report
+
+
+def run_scheduled(tasks, worker, workers=1, memory_budget=None):
+    """
+    Ejecuta `worker(task)` para cada tarea y genera los reportes conforme terminan.
+
+    Cada tarea es un dict con al menos 'name' y 'memory' (bytes estimados).
+    `worker` debe ser una función de nivel de módulo para poder enviarse al pool.
+    """
+    ordered = sorted(tasks, key=lambda t: t['memory'], reverse=True)
+
+    if workers <= 1:
+        for task in ordered:
+            yield _run_task(worker, task)
+        return
+
+    budget = memory_budget or default_memory_budget()
+    pending = list(ordered)
+    running = {}
+    in_use = 0
+
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        while pending or running:
+            # Lanzar las tareas más grandes que quepan en el presupuesto
+            i = 0
+            while i < len(pending) and len(running) < workers:
+                task = pending[i]
+                if not running or in_use + task['memory'] <= budget:
+                    running[pool.submit(_run_task, worker, task)] = task
+                    in_use += task['memory']
+                    pending.pop(i)
+                else:
+                    i += 1
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                in_use -= task['memory']
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # El proceso murió (p.ej. OOM killer) antes de devolver un reporte
+                    yield {'name': task['name'], 'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+
+
+def run_and_report(tasks, worker, workers=1, memory_budget=None, report_path=None, label='Estados',
+                   on_report=None):
+    """
+    Ejecuta las tareas mostrando el avance combinado, imprime el resumen final y
+    opcionalmente escribe todos los reportes a un JSON. `on_report(report)` se llama
+    en el proceso principal conforme termina cada tarea. Devuelve la lista de reportes.
+    """
+    total = len(tasks)
+    reports = []
+    start = time.perf_counter()
+    for report in run_scheduled(tasks, worker, workers, memory_budget):
+        reports.append(report)
+        if on_report:
+            on_report(report)
+        icon = '✅' if report['status'] == 'ok' else '❌'
+        detail = f"{report.get('records', 0):,} registros" if report['status'] == 'ok' else report.get('error', '')
+        print(f"[{len(reports)}/{total}] {icon} {report['name']} - {detail} "
+              f"({report.get('seconds', 0):.1f} s, RSS pico {report.get('peak_rss_mb', 0):,.0f} MB)")
+    elapsed = time.perf_counter() - start
+
+    failures = [r for r in reports if r['status'] != 'ok']
+    print("\n" + "=" * 50)
+    print(f"RESUMEN: {label}")
+    print("=" * 50)
+    print(f"Procesados:  {total - len(failures)}/{total}")
+    print(f"Registros:   {sum(r.get('records', 0) for r in reports):,}")
+    print(f"Tiempo:      {elapsed:.1f} s con {max(workers, 1)} proceso(s)")
+    if failures:
+        print("Fallidos:")
+        for r in failures:
+            print(f"  - {r['name']}: {r.get('error', 'error desconocido')}")
+
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump({'workers': workers, 'seconds': round(elapsed, 3), 'tasks': reports},
+                      f, ensure_ascii=False, indent=2)
+    return reports
@@ -0,0 +1,122 @@
+"""
+Cuantiles aproximados en streaming con un sketch logarítmico (al estilo DDSketch).
+
+Cada valor x distinto de cero cae en la cubeta ceil(log_gamma(|x|)), con
+gamma = (1 + a) / (1 - a); el cuantil estimado tiene error relativo de a lo más
+`a` (1% por defecto). Solo se guardan conteos por cubeta, así que la memoria
+depende del rango de los valores y no del número de filas, y dos sketches se
+pueden combinar sumando sus cubetas.
+"""
+import math
+
+import numpy as np
+
+RELATIVE_ACCURACY = 0.01
+
+# Las cubetas de un grupo se codifican junto con el código del grupo en un solo entero
+_BIN_OFFSET = 1 << 20
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    def bins(self, magnitudes):
+        return np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64)
+
+    def add(self, values):
+        """Agrega un arreglo de valores; los NaN se ignoran."""
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        self.zeros += int((values == 0).sum())
+        for store, magnitudes in ((self.positive, values[values > 0]), (self.negative, -values[values < 0])):
+            if len(magnitudes):
+                bins, counts = np.unique(self.bins(magnitudes), return_counts=True)
+                add_counts(store, bins.tolist(), counts.tolist())
+        self.count += len(values)
+
+    def merge(self, other):
+        add_counts(self.positive, list(other.positive), list(other.positive.values()))
+        add_counts(self.negative, list(other.negative), list(other.negative.values()))
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def value(self, index):
+        # Punto medio (en escala relativa) de la cubeta (gamma^(i-1), gamma^i]
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def quantile(self, q):
+        """Cuantil q en [0, 1]; None si el sketch está vacío."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        # Del negativo más grande en magnitud al positivo más grande
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self.value(index)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self.value(index)
+        return self.value(max(self.positive)) if self.positive else 0.0
+
+
+def add_counts(store, bins, counts):
+    for index, count in zip(bins, counts):
+        store[index] = store.get(index, 0) + count
+
+
+class GroupedSketches:
+    """
+    Un QuantileSketch por grupo. `add` recibe un lote completo con el código de
+    grupo de cada fila (p.ej. de pd.factorize) y actualiza todos los grupos con
+    una sola pasada vectorizada: las parejas (grupo, cubeta) se cuentan con
+    np.unique y solo se itera sobre las parejas distintas.
+    """
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.sketches = {}
+
+    def sketch(self, key):
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = QuantileSketch(self.relative_accuracy)
+        return sketch
+
+    def add(self, codes, labels, values):
+        """codes[i] es el índice en `labels` (la llave del grupo) de values[i]."""
+        values = np.asarray(values, dtype='float64')
+        codes = np.asarray(codes, dtype=np.int64)
+        valid = ~np.isnan(values) & (codes >= 0)
+        codes, values = codes[valid], values[valid]
+        sketches = [self.sketch(label) for label in labels]
+
+        for code, count in enumerate(np.bincount(codes, minlength=len(labels)).tolist()):
+            sketches[code].count += count
+        for code, count in enumerate(np.bincount(codes[values == 0], minlength=len(labels)).tolist()):
+            sketches[code].zeros += count
+
+        for attr, mask in (('positive', values > 0), ('negative', values < 0)):
+            if not mask.any():
+                continue
+            bins = sketches[0].bins(np.abs(values[mask]))
+            keys, counts = np.unique(codes[mask] * (2 * _BIN_OFFSET) + (bins + _BIN_OFFSET), return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                code, index = divmod(key, 2 * _BIN_OFFSET)
+                store = getattr(sketches[code], attr)
+                index -= _BIN_OFFSET
+                store[index] = store.get(index, 0) + count
+
+    def items(self):
+        return self.sketches.items()
@@ -0,0 +1,42 @@
+"""
+Union-find vectorizado con numpy para agrupar millones de nodos.
+
+Las uniones se aplican por arreglos de aristas: en cada ronda cada raíz apunta
+a la menor raíz con la que comparte una arista y después se comprimen los
+caminos (pointer jumping) hasta que todas las aristas quedan dentro de un mismo
+grupo. El número de rondas depende del diámetro de los grupos, no del número
+de aristas, y cada ronda son operaciones de arreglo.
+"""
+import numpy as np
+
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = np.arange(size, dtype=np.int64)
+
+    def compress(self):
+        while True:
+            grandparent = self.parent[self.parent]
+            if np.array_equal(grandparent, self.parent):
+                return
+            self.parent = grandparent
+
+    def union(self, left, right):
+        """Une los nodos left[i] y right[i] para cada i."""
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        while len(left):
+            self.compress()
+            a, b = self.parent[left], self.parent[right]
+            pending = a != b
+            if not pending.any():
+                return
+            a, b = a[pending], b[pending]
+            left, right = left[pending], right[pending]
+            low, high = np.minimum(a, b), np.maximum(a, b)
+            np.minimum.at(self.parent, high, low)
+
+    def roots(self):
+        """Raíz (el menor nodo) del grupo de cada nodo."""
+        self.compress()
+        return self.parent.copy()
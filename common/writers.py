@@ -0,0 +1,343 @@
+"""
+Escritores de tablas de salida para los extractores.
+
+Cada extractor declara el esquema de sus tablas como una lista de
+(columna, tipo) y entrega DataFrames por lote; el escritor se encarga del
+formato. Tipos soportados:
+
+    'string'      texto
+    'float64'     montos y cantidades
+    'int64'       enteros (p.ej. año del vehículo)
+    'date'        fechas sin hora
+    'timestamp'   fechas con hora (UTC)
+    'dictionary'  texto con pocos valores distintos (estado, moneda, tipo)
+
+En CSV los tipos solo fijan el orden de las columnas; en Parquet se escriben
+tal cual, comprimidos con ZSTD y en row groups de tamaño fijo.
+
+Los extractores no arman la tabla completa: TableBuffers guarda las filas de
+cada tabla por columnas y se las entrega al escritor cada `flush_rows` filas.
+Las columnas son listas de Python y no arreglos tipados: en el CSV cada valor se
+escribe tal como vino en el JSON (un monto con texto llega así a las reglas de
+limpieza), y convertirlo al tipo declarado lo cambiaría. El buffer guarda solo
+referencias a los valores ya decodificados (8 bytes por celda, ~13 MB para
+100,000 filas de s1_resumen); al vaciarlo, el CSV arma un DataFrame de objetos
+del mismo tamaño y el Parquet convierte cada lista directo a un arreglo Arrow
+del tipo declarado, sin DataFrame.
+
+Cada escritor acumula en `seconds` el tiempo de escritura por tabla (conversión,
+compresión y disco); write_stats() lo devuelve junto con los bytes de cada archivo.
+
+merge_outputs() junta en orden las tablas escritas por partes (p.ej. los rangos
+de un archivo extraídos en paralelo) con append_file(), sin pasar por pandas.
+Si cada parte numeró sus registros desde 0, la columna de posición se desplaza
+con el número de registros de las partes anteriores; en CSV debe ser la última
+columna de la tabla.
+"""
+import os
+import shutil
+import time
+
+import pandas as pd
+
+OUTPUT_FORMATS = ('csv', 'parquet')
+ROW_GROUP_SIZE = 100_000
+
+
+def schema_columns(schema):
+    return [name for name, _ in schema]
+
+
+def add_seconds(seconds, name, start):
+    seconds[name] = seconds.get(name, 0.0) + time.perf_counter() - start
+
+
+def write_stats(writer):
+    """{tabla: {'write_s', 'bytes_written'}} de las tablas escritas; llamar después de close()."""
+    return {name: {'write_s': round(elapsed, 4),
+                   'bytes_written': os.path.getsize(writer.path(name)) if os.path.exists(writer.path(name)) else 0}
+            for name, elapsed in writer.seconds.items()}
+
+
+class CsvTableWriter:
+    """Escribe cada tabla a {name}.csv; los lotes posteriores se agregan sin encabezado."""
+
+    extension = 'csv'
+
+    def __init__(self, output_dir, schemas):
+        self.output_dir = output_dir
+        self.schemas = schemas
+        self.written = set()
+        self.seconds = {}
+
+    def path(self, name):
+        return os.path.join(self.output_dir, f"{name}.{self.extension}")
+
+    def write_columns(self, name, columns):
+        # Las columnas ya vienen en el orden del esquema: un solo DataFrame, sin reindex
+        df = pd.DataFrame(columns, copy=False)
+        if not df.empty:
+            start = time.perf_counter()
+            self.write_frame(name, df)
+            add_seconds(self.seconds, name, start)
+
+    def write(self, name, df):
+        if df.empty:
+            return
+        start = time.perf_counter()
+        schema = self.schemas.get(name)
+        if schema:
+            df = df.reindex(columns=schema_columns(schema))
+        self.write_frame(name, df)
+        add_seconds(self.seconds, name, start)
+
+    def write_frame(self, name, df):
+        if name in self.written:
+            df.to_csv(self.path(name), index=False, encoding='utf-8', mode='a', header=False)
+        else:
+            df.to_csv(self.path(name), index=False, encoding='utf-8')
+            self.written.add(name)
+
+    def append_file(self, name, path, offset=0, position_column=None):
+        """
+        Agrega un CSV con el mismo esquema; su encabezado solo se copia si es el
+        primero. Con `offset`, suma offset al entero de `position_column`, que
+        debe ser la última columna.
+        """
+        start = time.perf_counter()
+        if offset and schema_columns(self.schemas[name])[-1] != position_column:
+            raise ValueError(f"{position_column} no es la última columna de {name}")
+        with open(path, 'rb') as source, open(self.path(name), 'ab') as target:
+            header = source.readline()
+            if name not in self.written:
+                target.write(header)
+            if offset:
+                target.writelines(shift_last_column(source, offset))
+            else:
+                shutil.copyfileobj(source, target)
+        self.written.add(name)
+        add_seconds(self.seconds, name, start)
+
+    def close(self):
+        pass
+
+
+class ParquetTableWriter:
+    """
+    Escribe cada tabla a {name}.parquet con tipos explícitos. Los lotes se
+    acumulan hasta `row_group_size` filas y se escriben como un row group, de modo
+    que nunca se arma un DataFrame con la tabla completa.
+    """
+
+    extension = 'parquet'
+
+    def __init__(self, output_dir, schemas, row_group_size=ROW_GROUP_SIZE, compression='zstd'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("La salida Parquet requiere pyarrow (pip install pyarrow)") from e
+        self.pa = pa
+        self.pq = pq
+        self.output_dir = output_dir
+        self.schemas = schemas
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.writers = {}
+        self.pending = {}
+        self.pending_rows = {}
+        self.seconds = {}
+        self.arrow_schemas = {name: self.arrow_schema(schema) for name, schema in schemas.items()}
+
+    def path(self, name):
+        return os.path.join(self.output_dir, f"{name}.{self.extension}")
+
+    def arrow_type(self, kind):
+        pa = self.pa
+        return {
+            'string': pa.string(),
+            'float64': pa.float64(),
+            'int64': pa.int64(),
+            'date': pa.date32(),
+            'timestamp': pa.timestamp('us', tz='UTC'),
+            'dictionary': pa.dictionary(pa.int32(), pa.string()),
+        }[kind]
+
+    def arrow_schema(self, schema):
+        return self.pa.schema([(name, self.arrow_type(kind)) for name, kind in schema])
+
+    def to_arrow(self, name, data, num_rows):
+        """`data` es un DataFrame o un dict columna -> lista de valores."""
+        pa = self.pa
+        arrays = []
+        for column, kind in self.schemas[name]:
+            values = data[column] if column in data else [None] * num_rows
+            arrays.append(convert_column(pa, values, kind, self.arrow_type(kind)))
+        return pa.Table.from_arrays(arrays, schema=self.arrow_schemas[name])
+
+    def write_columns(self, name, columns):
+        # Las listas por columna se convierten directo a arreglos Arrow, sin DataFrame
+        num_rows = len(next(iter(columns.values()), []))
+        if num_rows:
+            start = time.perf_counter()
+            self.add_table(name, self.to_arrow(name, columns, num_rows))
+            add_seconds(self.seconds, name, start)
+
+    def write(self, name, df):
+        if df.empty:
+            return
+        started = time.perf_counter()
+        for start in range(0, len(df), self.row_group_size):
+            chunk = df.iloc[start:start + self.row_group_size]
+            self.add_table(name, self.to_arrow(name, chunk, len(chunk)))
+        add_seconds(self.seconds, name, started)
+
+    def append_file(self, name, path, offset=0, position_column=None):
+        """Agrega las filas de un Parquet con el mismo esquema, un row group a la vez."""
+        start = time.perf_counter()
+        source = self.pq.ParquetFile(path)
+        for i in range(source.num_row_groups):
+            table = source.read_row_group(i).cast(self.arrow_schemas[name])
+            if offset:
+                import pyarrow.compute as pc
+                index = table.schema.get_field_index(position_column)
+                table = table.set_column(index, position_column, pc.add(table.column(index), offset))
+            self.add_table(name, table)
+        add_seconds(self.seconds, name, start)
+
+    def add_table(self, name, table):
+        # Los lotes chicos se acumulan hasta completar un row group
+        self.pending.setdefault(name, []).append(table)
+        self.pending_rows[name] = self.pending_rows.get(name, 0) + table.num_rows
+        if self.pending_rows[name] >= self.row_group_size:
+            self.flush(name)
+
+    def flush(self, name):
+        pending = self.pending.pop(name, None)
+        self.pending_rows.pop(name, None)
+        if not pending:
+            return
+        writer = self.writers.get(name)
+        if writer is None:
+            writer = self.pq.ParquetWriter(self.path(name), self.arrow_schemas[name],
+                                           compression=self.compression)
+            self.writers[name] = writer
+        table = self.pa.concat_tables(pending).unify_dictionaries() if len(pending) > 1 else pending[0]
+        writer.write_table(table, row_group_size=self.row_group_size)
+
+    def close(self):
+        for name in list(self.pending):
+            start = time.perf_counter()
+            self.flush(name)
+            add_seconds(self.seconds, name, start)
+        for name, writer in self.writers.items():
+            start = time.perf_counter()
+            writer.close()
+            add_seconds(self.seconds, name, start)
+        self.writers = {}
+
+
+def shift_last_column(lines, offset):
+    """
+    Filas CSV con `offset` sumado al entero de la última columna. Un campo entre
+    comillas puede tener saltos de línea: la fila termina en la línea donde el
+    número de comillas acumulado es par.
+    """
+    quotes = 0
+    for line in lines:
+        quotes += line.count(b'"')
+        if quotes % 2:
+            yield line
+            continue
+        quotes = 0
+        body = line.rstrip(b'\r\n')
+        cut = body.rfind(b',') + 1
+        yield body[:cut] + str(int(body[cut:]) + offset).encode('ascii') + line[len(body):]
+
+
+def convert_column(pa, values, kind, arrow_type):
+    """Convierte una columna (Series o lista) al tipo declarado; lo que no se pueda convertir queda nulo."""
+    if not isinstance(values, pd.Series):
+        values = pd.Series(values, dtype=object)
+    if kind == 'float64':
+        return pa.array(pd.to_numeric(values, errors='coerce').astype('float64'), type=arrow_type, from_pandas=True)
+    if kind == 'int64':
+        numbers = pd.to_numeric(values, errors='coerce')
+        numbers = numbers.where(numbers.round() == numbers)  # 2015.5 no es un entero válido
+        return pa.array(numbers.astype('Int64'), type=arrow_type, from_pandas=True)
+    if kind in ('date', 'timestamp'):
+        parsed = pd.to_datetime(values, errors='coerce', utc=True, format='ISO8601')
+        array = pa.array(parsed, type=pa.timestamp('us', tz='UTC'), from_pandas=True)
+        return array.cast(arrow_type) if kind == 'date' else array
+    # Texto: se conserva la representación que tendría en el CSV
+    text = [v if v is None or isinstance(v, str) else None if v != v else str(v) for v in values]
+    array = pa.array(text, type=pa.string())
+    return array.dictionary_encode() if kind == 'dictionary' else array
+
+
+class TableBuffers:
+    """
+    Buffer por tabla orientado a columnas. Las filas llegan como tuplas en el
+    orden del esquema, se guardan como una lista por columna y se entregan al
+    escritor cada `flush_rows` filas, así la memoria no crece con el tamaño del
+    archivo y nunca hay una copia fila por fila de la tabla completa.
+    """
+
+    def __init__(self, writer, schemas, flush_rows=ROW_GROUP_SIZE):
+        self.writer = writer
+        self.flush_rows = flush_rows
+        self.columns = {name: schema_columns(schema) for name, schema in schemas.items()}
+        self.data = {name: [[] for _ in columns] for name, columns in self.columns.items()}
+        self.buffered = dict.fromkeys(self.columns, 0)
+        # Filas totales por tabla, para el reporte de ejecución
+        self.rows = dict.fromkeys(self.columns, 0)
+
+    def extend(self, name, rows):
+        if not rows:
+            return
+        for column, values in zip(self.data[name], zip(*rows)):
+            column.extend(values)
+        self.buffered[name] += len(rows)
+        self.rows[name] += len(rows)
+        if self.buffered[name] >= self.flush_rows:
+            self.flush(name)
+
+    def flush(self, name):
+        if not self.buffered[name]:
+            return
+        self.writer.write_columns(name, dict(zip(self.columns[name], self.data[name])))
+        self.data[name] = [[] for _ in self.columns[name]]
+        self.buffered[name] = 0
+
+    def close(self):
+        for name in self.columns:
+            self.flush(name)
+        self.writer.close()
+
+
+def merge_outputs(output_format, part_dirs, output_dir, schemas, offsets=None, position_column=None):
+    """
+    Junta las tablas de `part_dirs` (en ese orden) en output_dir y devuelve el
+    escritor ya cerrado, para write_stats(). `offsets` (uno por parte) se suma a
+    `position_column` en las tablas que la tienen.
+    """
+    writer = make_writer(output_format, output_dir, schemas)
+    offsets = offsets or [0] * len(part_dirs)
+    try:
+        for name, schema in schemas.items():
+            positioned = position_column in schema_columns(schema)
+            for part_dir, offset in zip(part_dirs, offsets):
+                path = os.path.join(part_dir, f"{name}.{writer.extension}")
+                if os.path.exists(path):
+                    writer.append_file(name, path, offset if positioned else 0, position_column)
+    finally:
+        writer.close()
+    return writer
+
+
+def make_writer(output_format, output_dir, schemas):
+    if output_format == 'parquet':
+        return ParquetTableWriter(output_dir, schemas)
+    if output_format == 'csv':
+        return CsvTableWriter(output_dir, schemas)
+    raise ValueError(f"Formato de salida no soportado: {output_format}")
@@ -1,41 +1,338 @@
-import duckdb
+import argparse
+import hashlib
+import json
 import os
+import shutil
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import duckdb
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from common.instrumentation import configure_run_log, stage
+
+# Per-table export options. Any key can be overridden with --config <file.json>,
+# a dict of {table: {option: value}} merged over these defaults:
+#   query             SQL to export instead of SELECT * FROM <table>
+#   partition_by      columns for a hive-partitioned directory (<table>/<col>=<value>/...)
+#   order_by          sort terms, e.g. ["INSTITUCION", "TOTAL DESC"]
+#   row_group_size    rows per Parquet row group
+#   compression       codec (zstd, snappy, gzip, ...)
+#   compression_level codec level (zstd: 1-22)
+DEFAULT_OPTIONS = {
+    'query': None,
+    'partition_by': [],
+    'order_by': [],
+    'row_group_size': None,
+    'compression': 'zstd',
+    'compression_level': None,
+}
+
+STATE_FILE = '_export_state.json'
+
+# Web mode: s1_unified partitioned by state and sorted by institution, so the
+# browser (DuckDB-WASM over HTTP range requests) only fetches the row groups
+# whose min/max statistics match the state or institution being queried.
+WEB_UNIFIED_SQL = """
+    SELECT
+        m.id,
+        m.estado AS ENTIDAD_CD,
+        m.institucion AS INSTITUCION,
+        s.nombre AS NOMBRE,
+        s.primer_apellido AS PRIMER_APELLIDO,
+        s.segundo_apellido AS SEGUNDO_APELLIDO,
+        s.empleo_cargo AS PUESTO_NOMBRE,
+        m.ingreso_mensual_neto AS TOTAL_INGRESOS_MENSUALES_NETOS,
+        m.ingreso_anual_neto AS REMUNERACION_ANUAL_CARGO_PUBLICO
+    FROM s1_dataset_maestro m
+    JOIN stg_s1_declaraciones s ON m.id = s.id
+"""
+
+WEB_TABLES = {
+    's1_unified': {
+        'query': WEB_UNIFIED_SQL,
+        'partition_by': ['ENTIDAD_CD'],
+        'order_by': ['INSTITUCION', 'TOTAL_INGRESOS_MENSUALES_NETOS DESC'],
+        'row_group_size': 10_000,
+    },
+    'resumen_declaraciones_institucion_anual': {},
+}
+# Tables/views each web export needs in the database
+WEB_SOURCES = {
+    's1_unified': ['s1_dataset_maestro', 'stg_s1_declaraciones'],
+    'resumen_declaraciones_institucion_anual': ['resumen_declaraciones_institucion_anual'],
+}
+
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def sql_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def order_term(term):
+    """'COL DESC' -> '"COL" DESC'; the column is quoted, the direction validated."""
+    parts = term.rsplit(' ', 1)
+    if len(parts) == 2 and parts[1].upper() in ('ASC', 'DESC'):
+        return f"{quote(parts[0].strip())} {parts[1].upper()}"
+    return quote(term.strip())
+
+
+def table_options(name, config):
+    options = dict(DEFAULT_OPTIONS)
+    options.update(config.get(name, {}))
+    return options
+
+
+def source_sql(name, options):
+    query = options['query'] or f"SELECT * FROM {quote(name)}"
+    # Partitions are written in sort order, so sorting by the partition columns first keeps each file sorted
+    order = list(options['partition_by']) + list(options['order_by'])
+    if order:
+        query = f"SELECT * FROM ({query}) ORDER BY {', '.join(order_term(term) for term in order)}"
+    return query
+
+
+def copy_options(options):
+    parts = ["FORMAT PARQUET", f"COMPRESSION {sql_literal(options['compression'])}"]
+    if options['compression_level'] is not None:
+        parts.append(f"COMPRESSION_LEVEL {int(options['compression_level'])}")
+    if options['row_group_size']:
+        parts.append(f"ROW_GROUP_SIZE {int(options['row_group_size'])}")
+    if options['partition_by']:
+        columns = ', '.join(quote(column) for column in options['partition_by'])
+        # Keep the partition columns inside the files so readers don't need hive partitioning
+        parts.append(f"PARTITION_BY ({columns}), WRITE_PARTITION_COLUMNS true")
+    return ', '.join(parts)
+
+
+def table_signature(con, name, options, check):
+    """
+    Fingerprint of the table contents, schema and export options. With
+    check='rows' only the row count is used (fast, misses in-place updates);
+    with 'checksum' a hash over every row.
+    """
+    query = options['query'] or f"SELECT * FROM {quote(name)}"
+    if check == 'rows':
+        rows, digest = con.execute(f"SELECT count(*) FROM ({query})").fetchone()[0], None
+    else:
+        rows, digest = con.execute(f"SELECT count(*), sum(hash(t))::VARCHAR FROM ({query}) t").fetchone()
+    schema = con.execute(f"DESCRIBE {query}").fetchall()
+    payload = json.dumps([rows, digest, [list(c[:2]) for c in schema], options], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest(), rows
+
+
+def output_path(output_dir, name, options):
+    return os.path.join(output_dir, name if options['partition_by'] else f"{name}.parquet")
+
+
+def path_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
 
-def export_to_parquet(db_path, output_dir, tables=None):
+def replace_path(tmp_path, path):
+    """Swap the finished export into place (files and partition directories)."""
+    if os.path.isdir(path):
+        old_path = f"{path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path)
+    else:
+        os.replace(tmp_path, path)
+
+
+def write_partition_index(path, options, rows):
+    # HTTP has no directory listing: browsers read the partition file list from index.json
+    files = sorted(os.path.relpath(os.path.join(root, f), path)
+                   for root, _, names in os.walk(path) for f in names if f.endswith('.parquet'))
+    with open(os.path.join(path, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump({'partition_column': options['partition_by'][0] if len(options['partition_by']) == 1
+                   else options['partition_by'], 'rows': rows, 'files': files}, f, indent=2)
+
+
+def export_table(con, name, options, output_dir, previous, check, force):
+    """Exports one table and logs it as an export_table stage in the run log."""
+    with stage('export_table', table=name) as s:
+        result = export_table_result(con, name, options, output_dir, previous, check, force)
+        s.set(result=result['status'])
+        if result['status'] == 'failed':
+            s.status = 'error'
+            s.set(error=result['error'])
+        s.rows_out = result['rows']
+        s.bytes_written = result['bytes'] if result['status'] == 'exported' else 0
+    return result
+
+
+def export_table_result(con, name, options, output_dir, previous, check, force):
+    """Exports one table with its own cursor. Returns a result dict for the summary."""
+    cur = con.cursor()
+    start = time.perf_counter()
+    path = output_path(output_dir, name, options)
+    result = {'table': name, 'status': 'exported', 'rows': 0, 'bytes': 0, 'seconds': 0.0, 'signature': None}
+    try:
+        signature, rows = table_signature(cur, name, options, check)
+        result.update(signature=signature, rows=rows)
+        if not force and previous.get('signature') == signature and os.path.exists(path):
+            result.update(status='unchanged', bytes=path_size(path))
+            return result
+
+        tmp_path = f"{path}.tmp"
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        cur.execute(f"COPY ({source_sql(name, options)}) TO {sql_literal(tmp_path)} ({copy_options(options)})")
+        if options['partition_by']:
+            write_partition_index(tmp_path, options, rows)
+        replace_path(tmp_path, path)
+        result['bytes'] = path_size(path)
+    except Exception as e:
+        result.update(status='failed', error=str(e))
+    finally:
+        result['seconds'] = time.perf_counter() - start
+        cur.close()
+    return result
+
+
+def load_state(output_dir):
+    try:
+        with open(os.path.join(output_dir, STATE_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(output_dir, state):
+    path = os.path.join(output_dir, STATE_FILE)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def print_summary(results, elapsed):
+    print(f"\n{'TABLE':<45} {'STATUS':<10} {'ROWS':>12} {'MB':>10} {'SEC':>7} {'ROWS/S':>12} {'MB/S':>8}")
+    print("-" * 110)
+    for r in sorted(results, key=lambda r: r['table']):
+        mb = r['bytes'] / 1e6
+        exported = r['status'] == 'exported' and r['seconds'] > 0
+        rate = f"{r['rows'] / r['seconds']:>12,.0f} {mb / r['seconds']:>8.1f}" if exported else f"{'-':>12} {'-':>8}"
+        print(f"{r['table']:<45} {r['status']:<10} {r['rows']:>12,} {mb:>10.1f} {r['seconds']:>7.2f} {rate}")
+        if r['status'] == 'failed':
+            print(f"    Failed: {r['error']}")
+    exported = [r for r in results if r['status'] == 'exported']
+    print("-" * 110)
+    print(f"Exported: {len(exported)}  Unchanged: {sum(r['status'] == 'unchanged' for r in results)}  "
+          f"Failed: {sum(r['status'] == 'failed' for r in results)}  "
+          f"Written: {sum(r['bytes'] for r in exported) / 1e6:,.1f} MB  Wall time: {elapsed:.1f} s")
+
+
+def export_to_parquet(db_path, output_dir, tables=None, config=None, jobs=None, check='checksum', force=False):
+    """
+    Exports the tables concurrently (one DuckDB cursor per worker) and skips the
+    ones whose signature matches the previous run. Returns the failed tables.
+    """
     if not os.path.exists(db_path):
         print(f"Error: Database not found at {db_path}")
-        return
+        return None
 
     os.makedirs(output_dir, exist_ok=True)
-    
-    con = duckdb.connect(db_path)
-    
+    config = config or {}
+
+    con = duckdb.connect(db_path, read_only=True)
+
     if not tables:
         # Get all tables if none specified
         tables_res = con.execute("SHOW TABLES").fetchall()
         tables = [t[0] for t in tables_res]
-    
-    print(f"Exporting tables from {db_path} to {output_dir}...")
-    
-    for table in tables:
-        output_file = os.path.join(output_dir, f"{table}.parquet")
-        print(f"  - Exporting {table} -> {output_file}")
-        try:
-            con.execute(f"COPY (SELECT * FROM {table}) TO '{output_file}' (FORMAT PARQUET, COMPRESSION 'ZSTD')")
-        except Exception as e:
-            print(f"    Failed to export {table}: {e}")
-    
+
+    jobs = jobs or os.cpu_count() or 1
+    print(f"Exporting {len(tables)} tables from {db_path} to {output_dir} ({jobs} workers)...")
+
+    state = load_state(output_dir)
+    start = time.perf_counter()
+    results = []
+    with stage('export_to_parquet', tables=len(tables), jobs=jobs, check=check) as run:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(export_table, con, table, table_options(table, config), output_dir,
+                                       state.get(table, {}), check, force)
+                       for table in tables]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                print(f"  - {result['table']}: {result['status']}")
+                if result['status'] != 'failed':
+                    state[result['table']] = {'signature': result['signature'], 'rows': result['rows'],
+                                              'bytes': result['bytes']}
+                    save_state(output_dir, state)
+        con.close()
+        run.rows_out = sum(r['rows'] for r in results if r['status'] == 'exported')
+        run.bytes_written = sum(r['bytes'] for r in results if r['status'] == 'exported')
+        if any(r['status'] == 'failed' for r in results):
+            run.status = 'error'
+
+    print_summary(results, time.perf_counter() - start)
+    return [r['table'] for r in results if r['status'] == 'failed']
+
+
+def web_tables(db_path):
+    """Web export set, limited to the entries whose source tables exist."""
+    con = duckdb.connect(db_path, read_only=True)
+    existing = {t[0] for t in con.execute("SHOW TABLES").fetchall()}
     con.close()
-    print("Export complete.")
+    tables = []
+    for name, sources in WEB_SOURCES.items():
+        missing = [source for source in sources if source not in existing]
+        if missing:
+            print(f"Skipping {name}: missing {', '.join(missing)}")
+        else:
+            tables.append(name)
+    return tables
+
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python export_to_parquet.py <db_path> <output_dir> [table1,table2,...]")
+    parser = argparse.ArgumentParser(description="Export DuckDB tables to Parquet.")
+    parser.add_argument('db_path')
+    parser.add_argument('output_dir')
+    parser.add_argument('tables', nargs='?', default=None, help="Comma-separated table list (default: all)")
+    parser.add_argument('--web', action='store_true',
+                        help="Export s1_unified partitioned by state and the summary table for the web dashboard")
+    parser.add_argument('--config', default=None, help="JSON file with per-table export options")
+    parser.add_argument('--jobs', type=int, default=None, help="Concurrent table exports (default: CPU count)")
+    parser.add_argument('--check', choices=['checksum', 'rows'], default='checksum',
+                        help="How to detect unchanged tables (default: checksum)")
+    parser.add_argument('--force', action='store_true', help="Export even if the table is unchanged")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"Error: Database not found at {args.db_path}")
+        sys.exit(1)
+
+    config = {}
+    if args.web:
+        config.update(WEB_TABLES)
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            for table, options in json.load(f).items():
+                config[table] = {**config.get(table, {}), **options}
+
+    if args.tables:
+        tables = args.tables.split(',')
+    elif args.web:
+        tables = web_tables(args.db_path)
+    else:
+        tables = None
+
+    # Next to the database rather than in output_dir, which may be published as-is
+    configure_run_log(os.path.join(os.path.dirname(os.path.abspath(args.db_path)), 'run_log.jsonl'))
+    failed = export_to_parquet(args.db_path, args.output_dir, tables, config, args.jobs, args.check, args.force)
+    if failed is None or failed:
         sys.exit(1)
-        
-    db_path = sys.argv[1]
-    output_dir = sys.argv[2]
-    tables = sys.argv[3].split(',') if len(sys.argv) > 3 else None
-    
-    export_to_parquet(db_path, output_dir, tables)
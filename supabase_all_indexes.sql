@@ -62,3 +62,19 @@ ON declaracion_individual ("ENTIDAD_CD", "INSTITUCION", "REMUNERACION_ANUAL_CARG
 WHERE "REMUNERACION_ANUAL_CARGO_PUBLICO" > 0 
   AND "TOTAL_INGRESOS_MENSUALES_NETOS" > 0 
   AND "INGRESO_ANUAL_NETO_DECLARANTE" > 0;
+
+-- 5. Keyset Pagination for institution_detail
+-- The detail view pages with a cursor on (diferencia_ingresos, DECLARACION_ID):
+-- .eq('ENTIDAD_CD', ...) .eq('INSTITUCION', ...)
+-- .gt('REMUNERACION...', 0) .gt('INGRESO_ANUAL...', 0)
+-- .or_('diferencia_ingresos.lt.X,and(diferencia_ingresos.eq.X,DECLARACION_ID.lt.Y)')
+-- .order('diferencia_ingresos', desc=True) .order('DECLARACION_ID', desc=True) .limit(21)
+-- With this index every page is an index range scan of 21 rows, no matter how deep.
+-- Requires the IMMUTABLE function from supabase_computed_column.sql.
+CREATE INDEX IF NOT EXISTS idx_declaracion_keyset
+ON declaracion_individual ("ENTIDAD_CD", "INSTITUCION", diferencia_ingresos(declaracion_individual) DESC, "DECLARACION_ID" DESC)
+WHERE "REMUNERACION_ANUAL_CARGO_PUBLICO" > 0
+  AND "INGRESO_ANUAL_NETO_DECLARANTE" > 0;
+
+-- The same index serves the total per institution, which is counted once
+-- (head=True, count=exact) and cached per data version instead of on every page.
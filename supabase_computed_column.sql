@@ -0,0 +1,10 @@
+-- Computed column diferencia_ingresos for declaracion_individual
+-- PostgREST exposes functions that take the row type as virtual columns
+-- (select=*,diferencia_ingresos&order=diferencia_ingresos.desc).
+-- It must be IMMUTABLE so it can be used in the keyset index of supabase_all_indexes.sql.
+CREATE OR REPLACE FUNCTION diferencia_ingresos(declaracion_individual)
+RETURNS double precision
+LANGUAGE sql IMMUTABLE
+AS $$
+  SELECT ($1."INGRESO_ANUAL_NETO_DECLARANTE" - $1."REMUNERACION_ANUAL_CARGO_PUBLICO")::double precision
+$$;
@@ -0,0 +1,159 @@
+{#
+  Generado por src/extraction/ingesta_duckdb.py --dbt-macro a partir de
+  S1_SCHEMAS; no editar a mano. s1_typed_columns(table) convierte las columnas
+  de una tabla del extractor igual que la ingesta a raw (lo inválido queda nulo).
+#}
+
+{% macro s1_typed_columns(table) -%}
+{%- if table == 's1_resumen' -%}
+    CAST("id" AS VARCHAR) AS "id",
+    TRY_CAST("fecha_actualizacion" AS TIMESTAMPTZ) AS "fecha_actualizacion",
+    CAST("institucion" AS VARCHAR) AS "institucion",
+    CAST("tipo_declaracion" AS VARCHAR) AS "tipo_declaracion",
+    CAST("nombre" AS VARCHAR) AS "nombre",
+    CAST("primer_apellido" AS VARCHAR) AS "primer_apellido",
+    CAST("segundo_apellido" AS VARCHAR) AS "segundo_apellido",
+    CAST("curp" AS VARCHAR) AS "curp",
+    CAST("rfc" AS VARCHAR) AS "rfc",
+    CAST("rfc_homoclave" AS VARCHAR) AS "rfc_homoclave",
+    CAST("correo" AS VARCHAR) AS "correo",
+    CAST("correo_personal" AS VARCHAR) AS "correo_personal",
+    CAST("empleo_nombre_ente" AS VARCHAR) AS "empleo_nombre_ente",
+    CAST("empleo_cargo" AS VARCHAR) AS "empleo_cargo",
+    CAST("empleo_nivel" AS VARCHAR) AS "empleo_nivel",
+    CAST("state" AS VARCHAR) AS "state",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- elif table == 's1_experiencia_laboral' -%}
+    CAST("id_declaracion" AS VARCHAR) AS "id_declaracion",
+    CAST("state" AS VARCHAR) AS "state",
+    CAST("ambito_sector" AS VARCHAR) AS "ambito_sector",
+    CAST("nivel_gobierno" AS VARCHAR) AS "nivel_gobierno",
+    CAST("ambito_publico" AS VARCHAR) AS "ambito_publico",
+    CAST("nombre_ente" AS VARCHAR) AS "nombre_ente",
+    CAST("area_adscripcion" AS VARCHAR) AS "area_adscripcion",
+    CAST("empleo_cargo" AS VARCHAR) AS "empleo_cargo",
+    CAST(TRY_CAST("fecha_ingreso" AS TIMESTAMPTZ) AS DATE) AS "fecha_ingreso",
+    CAST(TRY_CAST("fecha_egreso" AS TIMESTAMPTZ) AS DATE) AS "fecha_egreso",
+    CAST("ubicacion" AS VARCHAR) AS "ubicacion",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- elif table == 's1_datos_pareja' -%}
+    CAST("id_declaracion" AS VARCHAR) AS "id_declaracion",
+    CAST("state" AS VARCHAR) AS "state",
+    CAST("nombre" AS VARCHAR) AS "nombre",
+    CAST("primer_apellido" AS VARCHAR) AS "primer_apellido",
+    CAST("segundo_apellido" AS VARCHAR) AS "segundo_apellido",
+    CAST("relacion" AS VARCHAR) AS "relacion",
+    CAST("ciudadano_extranjero" AS VARCHAR) AS "ciudadano_extranjero",
+    CAST("curp" AS VARCHAR) AS "curp",
+    CAST("habita_domicilio" AS VARCHAR) AS "habita_domicilio",
+    CAST("actividad_laboral" AS VARCHAR) AS "actividad_laboral",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- elif table == 's1_dependientes_economicos' -%}
+    CAST("id_declaracion" AS VARCHAR) AS "id_declaracion",
+    CAST("state" AS VARCHAR) AS "state",
+    CAST("nombre" AS VARCHAR) AS "nombre",
+    CAST("primer_apellido" AS VARCHAR) AS "primer_apellido",
+    CAST("segundo_apellido" AS VARCHAR) AS "segundo_apellido",
+    CAST("parentesco" AS VARCHAR) AS "parentesco",
+    CAST("ciudadano_extranjero" AS VARCHAR) AS "ciudadano_extranjero",
+    CAST("actividad_laboral" AS VARCHAR) AS "actividad_laboral",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- elif table == 's1_ingresos' -%}
+    CAST("id" AS VARCHAR) AS "id",
+    CAST("state" AS VARCHAR) AS "state",
+    TRY_CAST("remuneracion_mensual_cargo" AS DOUBLE) AS "remuneracion_mensual_cargo",
+    TRY_CAST("otros_ingresos_mensuales" AS DOUBLE) AS "otros_ingresos_mensuales",
+    TRY_CAST("ingreso_mensual_neto" AS DOUBLE) AS "ingreso_mensual_neto",
+    TRY_CAST("ingreso_anual_neto" AS DOUBLE) AS "ingreso_anual_neto",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- elif table == 's1_bienes_inmuebles' -%}
+    CAST("id_declaracion" AS VARCHAR) AS "id_declaracion",
+    CAST("state" AS VARCHAR) AS "state",
+    CAST("tipo_inmueble" AS VARCHAR) AS "tipo_inmueble",
+    CAST("titular" AS VARCHAR) AS "titular",
+    TRY_CAST("valor_adquisicion" AS DOUBLE) AS "valor_adquisicion",
+    CAST("moneda" AS VARCHAR) AS "moneda",
+    CAST("forma_adquisicion" AS VARCHAR) AS "forma_adquisicion",
+    CAST(TRY_CAST("fecha_adquisicion" AS TIMESTAMPTZ) AS DATE) AS "fecha_adquisicion",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- elif table == 's1_bienes_muebles' -%}
+    CAST("id_declaracion" AS VARCHAR) AS "id_declaracion",
+    CAST("state" AS VARCHAR) AS "state",
+    CAST("tipo_bien" AS VARCHAR) AS "tipo_bien",
+    CAST("descripcion" AS VARCHAR) AS "descripcion",
+    CAST("titular" AS VARCHAR) AS "titular",
+    TRY_CAST("valor_adquisicion" AS DOUBLE) AS "valor_adquisicion",
+    CAST("moneda" AS VARCHAR) AS "moneda",
+    CAST("forma_adquisicion" AS VARCHAR) AS "forma_adquisicion",
+    CAST(TRY_CAST("fecha_adquisicion" AS TIMESTAMPTZ) AS DATE) AS "fecha_adquisicion",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- elif table == 's1_vehiculos' -%}
+    CAST("id_declaracion" AS VARCHAR) AS "id_declaracion",
+    CAST("state" AS VARCHAR) AS "state",
+    CAST("tipo_vehiculo" AS VARCHAR) AS "tipo_vehiculo",
+    CAST("marca" AS VARCHAR) AS "marca",
+    CAST("modelo" AS VARCHAR) AS "modelo",
+    CASE WHEN TRY_CAST("anio" AS DOUBLE) = round(TRY_CAST("anio" AS DOUBLE)) THEN CAST(TRY_CAST("anio" AS DOUBLE) AS BIGINT) END AS "anio",
+    TRY_CAST("valor_adquisicion" AS DOUBLE) AS "valor_adquisicion",
+    CAST("moneda" AS VARCHAR) AS "moneda",
+    CAST(TRY_CAST("fecha_adquisicion" AS TIMESTAMPTZ) AS DATE) AS "fecha_adquisicion",
+    CAST("forma_adquisicion" AS VARCHAR) AS "forma_adquisicion",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- elif table == 's1_inversiones' -%}
+    CAST("id_declaracion" AS VARCHAR) AS "id_declaracion",
+    CAST("state" AS VARCHAR) AS "state",
+    CAST("tipo_inversion" AS VARCHAR) AS "tipo_inversion",
+    CAST("subtipo_inversion" AS VARCHAR) AS "subtipo_inversion",
+    CAST("institucion" AS VARCHAR) AS "institucion",
+    CAST("numero_cuenta" AS VARCHAR) AS "numero_cuenta",
+    TRY_CAST("saldo_situacion_actual" AS DOUBLE) AS "saldo_situacion_actual",
+    CAST("moneda" AS VARCHAR) AS "moneda",
+    CAST("pais" AS VARCHAR) AS "pais",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- elif table == 's1_adeudos_pasivos' -%}
+    CAST("id_declaracion" AS VARCHAR) AS "id_declaracion",
+    CAST("state" AS VARCHAR) AS "state",
+    CAST("tipo_adeudo" AS VARCHAR) AS "tipo_adeudo",
+    TRY_CAST("monto_original" AS DOUBLE) AS "monto_original",
+    TRY_CAST("saldo_pendiente" AS DOUBLE) AS "saldo_pendiente",
+    CAST("moneda" AS VARCHAR) AS "moneda",
+    CAST(TRY_CAST("fecha_adquisicion" AS TIMESTAMPTZ) AS DATE) AS "fecha_adquisicion",
+    CAST("institucion" AS VARCHAR) AS "institucion",
+    CAST("otorgante" AS VARCHAR) AS "otorgante",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- elif table == 's1_prestamo_comodato' -%}
+    CAST("id_declaracion" AS VARCHAR) AS "id_declaracion",
+    CAST("state" AS VARCHAR) AS "state",
+    CAST("tipo_bien" AS VARCHAR) AS "tipo_bien",
+    CAST("marca" AS VARCHAR) AS "marca",
+    CAST("modelo" AS VARCHAR) AS "modelo",
+    CASE WHEN TRY_CAST("anio" AS DOUBLE) = round(TRY_CAST("anio" AS DOUBLE)) THEN CAST(TRY_CAST("anio" AS DOUBLE) AS BIGINT) END AS "anio",
+    CAST("registro" AS VARCHAR) AS "registro",
+    CAST("relacion_dueno" AS VARCHAR) AS "relacion_dueno",
+    CAST("dueno" AS VARCHAR) AS "dueno",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- elif table == 'interes_apoyos' -%}
+    CAST("id_declaracion" AS VARCHAR) AS "id_declaracion",
+    CAST("state" AS VARCHAR) AS "state",
+    CAST("beneficiario" AS VARCHAR) AS "beneficiario",
+    CAST("nombre_programa" AS VARCHAR) AS "nombre_programa",
+    CAST("institucion_otorgante" AS VARCHAR) AS "institucion_otorgante",
+    CAST("nivel_gobierno" AS VARCHAR) AS "nivel_gobierno",
+    CAST("tipo_apoyo" AS VARCHAR) AS "tipo_apoyo",
+    CAST("forma_recepcion" AS VARCHAR) AS "forma_recepcion",
+    TRY_CAST("monto_apoyo" AS DOUBLE) AS "monto_apoyo",
+    CAST("moneda" AS VARCHAR) AS "moneda",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- elif table == 'interes_participacion' -%}
+    CAST("id_declaracion" AS VARCHAR) AS "id_declaracion",
+    CAST("state" AS VARCHAR) AS "state",
+    CAST("nombre_empresa" AS VARCHAR) AS "nombre_empresa",
+    CAST("tipo_participacion" AS VARCHAR) AS "tipo_participacion",
+    TRY_CAST("porcentaje" AS DOUBLE) AS "porcentaje",
+    CAST("sector" AS VARCHAR) AS "sector",
+    CAST("recibe_remuneracion" AS VARCHAR) AS "recibe_remuneracion",
+    CASE WHEN TRY_CAST("posicion" AS DOUBLE) = round(TRY_CAST("posicion" AS DOUBLE)) THEN CAST(TRY_CAST("posicion" AS DOUBLE) AS BIGINT) END AS "posicion"
+{%- else -%}
+    {{ exceptions.raise_compiler_error('Tabla sin esquema en S1_SCHEMAS: ' ~ table) }}
+{%- endif -%}
+{%- endmacro %}
@@ -0,0 +1,165 @@
+{#
+  Staging incremental por estado.
+
+  Cada modelo de staging es una tabla que solo se recarga para los estados
+  cuya firma cambió desde la última corrida. Las firmas cargadas se guardan en
+  main._staging_estados (modelo, estado, firma).
+
+  Origen (var s1_source o env DBT_S1_SOURCE):
+    raw    (default) vistas del esquema vigente de ingesta_duckdb.py (solo la versión
+           vigente de cada declaración); la firma por estado es la de raw._ingesta más
+           su contador de cambios de versión vigente (raw._vigentes_estado).
+    files  salidas del extractor en <s1_source_root>/<Estado>/<tabla>.parquet|csv
+           (var s1_source_root o env DBT_S1_SOURCE_ROOT, default ../csv_outputs);
+           la firma es tamaño y mtime del archivo y solo se leen los archivos que cambiaron.
+           Los CSV se leen como texto y se convierten con los tipos de S1_SCHEMAS, igual
+           que la ingesta (s1_typed_columns en s1_tipos.sql, generada por ingesta_duckdb.py).
+           NO deduplica: trae todas las versiones de cada declaración (repetidas en un
+           archivo o publicadas en varios estados) y los conteos de los modelos salen
+           inflados; cada modelo lo advierte al correr. Para la versión vigente usar raw.
+  Con la var s1_states (lista) solo se revisan esos estados.
+#}
+
+{% macro s1_source() %}
+    {{- return(var('s1_source', env_var('DBT_S1_SOURCE', 'raw'))) -}}
+{% endmacro %}
+
+{% macro s1_source_root() %}
+    {{- return(var('s1_source_root', env_var('DBT_S1_SOURCE_ROOT', '../csv_outputs')).rstrip('/')) -}}
+{% endmacro %}
+
+{% macro s1_staging_log_table() %}
+    {{- return(target.schema ~ '._staging_estados') -}}
+{% endmacro %}
+
+{% macro s1_sql_list(values) %}
+    {%- for value in values -%}
+        '{{ value | replace("'", "''") }}'{{ ', ' if not loop.last }}
+    {%- endfor -%}
+{% endmacro %}
+
+{% macro s1_state_filter(column) %}
+    {%- set states = var('s1_states', []) -%}
+    {%- if states %} and {{ column }} in ({{ s1_sql_list(states) }}){% endif -%}
+{% endmacro %}
+
+{% macro create_staging_log() %}
+    create table if not exists {{ s1_staging_log_table() }} (
+        modelo varchar,
+        estado varchar,
+        firma varchar,
+        cargado_en timestamp,
+        primary key (modelo, estado)
+    )
+{% endmacro %}
+
+{# estado, firma y archivo (solo en files) de cada estado disponible en el origen #}
+{% macro s1_partitions(table) %}
+    {%- if s1_source() == 'files' -%}
+        select estado, firma, archivo from (
+            select
+                parse_filename(parse_dirpath(filename)) as estado,
+                size::varchar || ':' || epoch_ms(last_modified)::varchar as firma,
+                filename as archivo,
+                -- Si existen ambos formatos se prefiere Parquet (igual que ingesta_duckdb.py)
+                row_number() over (partition by parse_dirpath(filename)
+                                   order by filename like '%.parquet' desc) as preferencia
+            from read_blob('{{ s1_source_root() }}/*/{{ table }}.*')
+            where filename like '%.parquet' or filename like '%.csv'
+        )
+        where preferencia = 1
+          and estado not like '.%' and estado not like '\_%' escape '\'
+          {{- s1_state_filter('estado') }}
+    {%- else -%}
+        select i.estado, i.firma || ':' || coalesce(v.version, 0) as firma, null::varchar as archivo
+        from {{ source('raw', '_ingesta') }} i
+        left join {{ source('raw', '_vigentes_estado') }} v on v.estado = i.estado
+        where true {{- s1_state_filter('i.estado') }}
+    {%- endif -%}
+{% endmacro %}
+
+{# Estados nuevos o con firma distinta a la cargada (todos si no es incremental) #}
+{% macro s1_changed_partitions(table) %}
+    select p.estado, p.firma, p.archivo
+    from ({{ s1_partitions(table) }}) p
+    {%- if is_incremental() %}
+    left join {{ s1_staging_log_table() }} l
+        on l.modelo = '{{ this.identifier }}' and l.estado = p.estado
+    where l.firma is distinct from p.firma
+    {%- endif %}
+{% endmacro %}
+
+{# Estados cargados que ya no existen en el origen #}
+{% macro s1_removed_partitions(table) %}
+    select estado
+    from {{ s1_staging_log_table() }}
+    where modelo = '{{ this.identifier }}'
+      and estado not in (select estado from ({{ s1_partitions(table) }}))
+      {{- s1_state_filter('estado') }}
+{% endmacro %}
+
+{% macro s1_staging(table) %}
+    {%- set changed_sql = s1_changed_partitions(table) -%}
+    {%- if not execute -%}
+        {#- Al parsear solo importa el linaje -#}
+        select * from {{ source('vigente', table) }}
+    {%- else -%}
+        {%- set changes = run_query(changed_sql) -%}
+        {%- set states = changes.columns['estado'].values() -%}
+        {%- if states | length == 0 and is_incremental() -%}
+            select * from {{ this }} where false
+        {%- elif s1_source() == 'files' -%}
+            {%- do exceptions.warn(this.identifier ~ ": s1_source=files no deduplica versiones de declaraciones; "
+                                   ~ "los conteos incluyen versiones anteriores y repetidas (usar s1_source=raw)") -%}
+            {%- set parquet_files = [] -%}
+            {%- set csv_files = [] -%}
+            {%- for path in changes.columns['archivo'].values() -%}
+                {%- do (parquet_files if path.endswith('.parquet') else csv_files).append(path) -%}
+            {%- endfor -%}
+            {%- if parquet_files %}
+            select {{ s1_typed_columns(table) }}, filename
+            from read_parquet([{{ s1_sql_list(parquet_files) }}], union_by_name=true, filename=true)
+            {%- endif %}
+            {%- if parquet_files and csv_files %}
+            union all
+            {%- endif %}
+            {%- if csv_files %}
+            {#- Todo como texto: sin inferencia de tipos ni filas descartadas en silencio -#}
+            select {{ s1_typed_columns(table) }}, filename
+            from read_csv([{{ s1_sql_list(csv_files) }}], header=true, all_varchar=true,
+                          union_by_name=true, filename=true)
+            {%- endif %}
+        {%- else -%}
+            select * from {{ source('vigente', table) }}
+            {%- if is_incremental() or var('s1_states', []) %}
+            where state in ({{ s1_sql_list(states) if states else 'null' }})
+            {%- endif %}
+        {%- endif -%}
+    {%- endif -%}
+{% endmacro %}
+
+{# pre-hook: quita las filas de los estados que se van a recargar o que desaparecieron #}
+{% macro s1_staging_delete(table) %}
+    {%- if is_incremental() -%}
+        delete from {{ this }} where state in (
+            select estado from ({{ s1_changed_partitions(table) }})
+            union all
+            select estado from ({{ s1_removed_partitions(table) }})
+        )
+    {%- else -%}
+        delete from {{ s1_staging_log_table() }} where modelo = '{{ this.identifier }}'
+    {%- endif -%}
+{% endmacro %}
+
+{# post-hooks: registra las firmas cargadas y olvida los estados eliminados #}
+{% macro s1_staging_forget(table) %}
+    delete from {{ s1_staging_log_table() }}
+    where modelo = '{{ this.identifier }}'
+      and estado in (select estado from ({{ s1_removed_partitions(table) }}))
+{% endmacro %}
+
+{% macro s1_staging_record(table) %}
+    insert or replace into {{ s1_staging_log_table() }}
+    select '{{ this.identifier }}', estado, firma, current_timestamp
+    from ({{ s1_changed_partitions(table) }})
+{% endmacro %}
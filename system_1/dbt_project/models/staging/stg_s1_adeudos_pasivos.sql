@@ -0,0 +1,9 @@
+{{ config(
+    pre_hook="{{ s1_staging_delete('s1_adeudos_pasivos') }}",
+    post_hook=[
+        "{{ s1_staging_forget('s1_adeudos_pasivos') }}",
+        "{{ s1_staging_record('s1_adeudos_pasivos') }}"
+    ]
+) }}
+
+{{ s1_staging('s1_adeudos_pasivos') }}
@@ -0,0 +1,9 @@
+{{ config(
+    pre_hook="{{ s1_staging_delete('s1_datos_pareja') }}",
+    post_hook=[
+        "{{ s1_staging_forget('s1_datos_pareja') }}",
+        "{{ s1_staging_record('s1_datos_pareja') }}"
+    ]
+) }}
+
+{{ s1_staging('s1_datos_pareja') }}
@@ -0,0 +1,9 @@
+{{ config(
+    pre_hook="{{ s1_staging_delete('s1_dependientes_economicos') }}",
+    post_hook=[
+        "{{ s1_staging_forget('s1_dependientes_economicos') }}",
+        "{{ s1_staging_record('s1_dependientes_economicos') }}"
+    ]
+) }}
+
+{{ s1_staging('s1_dependientes_economicos') }}
@@ -1,4 +1,9 @@
-{{ config(materialized='view') }}
+{{ config(
+    pre_hook="{{ s1_staging_delete('s1_bienes_inmuebles') }}",
+    post_hook=[
+        "{{ s1_staging_forget('s1_bienes_inmuebles') }}",
+        "{{ s1_staging_record('s1_bienes_inmuebles') }}"
+    ]
+) }}
 
-select * 
-from read_csv_auto('/home/arkade/Documents/github/dataton-2025/system_1/csv_outputs/*/s1_bienes_inmuebles.csv', union_by_name=True, filename=True, ignore_errors=True)
+{{ s1_staging('s1_bienes_inmuebles') }}
@@ -1,4 +1,9 @@
-{{ config(materialized='view') }}
+{{ config(
+    pre_hook="{{ s1_staging_delete('interes_apoyos') }}",
+    post_hook=[
+        "{{ s1_staging_forget('interes_apoyos') }}",
+        "{{ s1_staging_record('interes_apoyos') }}"
+    ]
+) }}
 
-select * 
-from read_csv_auto('/home/arkade/Documents/github/dataton-2025/system_1/csv_outputs/*/interes_apoyos.csv', union_by_name=True, filename=True, ignore_errors=True)
+{{ s1_staging('interes_apoyos') }}
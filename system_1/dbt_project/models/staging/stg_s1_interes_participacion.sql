@@ -1,4 +1,9 @@
-{{ config(materialized='view') }}
+{{ config(
+    pre_hook="{{ s1_staging_delete('interes_participacion') }}",
+    post_hook=[
+        "{{ s1_staging_forget('interes_participacion') }}",
+        "{{ s1_staging_record('interes_participacion') }}"
+    ]
+) }}
 
-select * 
-from read_csv_auto('/home/arkade/Documents/github/dataton-2025/system_1/csv_outputs/*/interes_participacion.csv', union_by_name=True, filename=True, ignore_errors=True)
+{{ s1_staging('interes_participacion') }}
@@ -1,4 +1,9 @@
-{{ config(materialized='view') }}
+{{ config(
+    pre_hook="{{ s1_staging_delete('s1_vehiculos') }}",
+    post_hook=[
+        "{{ s1_staging_forget('s1_vehiculos') }}",
+        "{{ s1_staging_record('s1_vehiculos') }}"
+    ]
+) }}
 
-select * 
-from read_csv_auto('/home/arkade/Documents/github/dataton-2025/system_1/csv_outputs/*/s1_vehiculos.csv', union_by_name=True, filename=True, ignore_errors=True)
+{{ s1_staging('s1_vehiculos') }}
@@ -4,21 +4,21 @@ import os
 def analyze_with_duckdb(base_path):
     print(f"Iniciando análisis con DuckDB en: {base_path}")
     
-    # Conectamos a una DB en memoria para velocidad y evitar bloqueos
+    # Conectamos a una DB en memoria para evitar bloqueos y adjuntamos en modo
+    # lectura la base persistente que llena src/extraction/ingesta_duckdb.py
+    db_path = os.path.join(base_path, "dataton_s1.duckdb")
+    if not os.path.exists(db_path):
+        print(f"No se encontró {db_path}. Ejecuta primero src/extraction/ingesta_duckdb.py")
+        return
     con = duckdb.connect(database=':memory:')
     
-    # Patrón para encontrar todos los archivos
-    csv_pattern = os.path.join(base_path, "*/s1_ingresos.csv")
-    
     try:
-        # Creamos una vista unificada de todos los CSVs
-        # union_by_name=True permite que si el orden de columnas varía, se ajuste
-        # filename=True nos agrega una columna con la ruta del archivo fuente
-        print("Cargando datos desde CSVs...")
-        con.execute(f"""
-            CREATE TABLE ingresos AS 
-            SELECT * FROM read_csv_auto('{csv_pattern}', union_by_name=True, filename=True)
-        """)
+        # vigente.s1_ingresos: los CSVs de todos los estados con tipos fijos (solo la
+        # versión vigente de cada declaración)
+        # y la columna filename con la ruta del archivo fuente
+        print("Cargando datos desde la base DuckDB...")
+        con.execute(f"ATTACH '{db_path}' AS s1 (READ_ONLY)")
+        con.execute("CREATE VIEW ingresos AS SELECT * FROM s1.vigente.s1_ingresos")
         
         total_rows = con.execute("SELECT count(*) FROM ingresos").fetchone()[0]
         print(f"Datos cargados exitosamente. Total de registros: {total_rows:,}")
@@ -102,11 +102,11 @@ def analyze_with_duckdb(base_path):
         else:
             print("OK: Lógica Anual >= Mensual respetada.")
             
-        # 4. Distribución de anomalías por Estado (basado en nombre de archivo)
+        # 4. Distribución de anomalías por Estado
         print("\n--- Conteo de Registros por Estado ---")
         state_dist = """
             SELECT 
-                regexp_extract(filename, '.*/([^/]+)/s1_ingresos.csv', 1) as estado,
+                state as estado,
                 count(*) as total
             FROM ingresos
             GROUP BY estado
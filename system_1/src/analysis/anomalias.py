@@ -0,0 +1,260 @@
+"""
+Detección de anomalías en los ingresos del S1, por estado e institución.
+
+Lee s1_ingresos (CSV o Parquet) de cada estado por bloques y nunca junta todos
+los estados en memoria:
+
+1. Primera pasada: un sketch de cuantiles por (estado, institución, columna)
+   y otro por (estado, columna), actualizados de forma vectorizada por bloque.
+2. Segunda pasada: todas las reglas sobre todas las columnas de cada bloque
+   con operaciones de columna (sin máscaras por regla sobre el DataFrame
+   completo) y las filas anómalas se escriben a la tabla s1_anomalias.
+
+Reglas:
+    negativo             valor < 0
+    atipico_iqr          valor > Q3 + 3·IQR de su institución (o de su estado
+                         si la institución tiene menos de MIN_GROUP_ROWS valores)
+    anual_menor_mensual  0 < ingreso_anual_neto < ingreso_mensual_neto
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from common.sketch import RELATIVE_ACCURACY, GroupedSketches
+from common.writers import OUTPUT_FORMATS, make_writer
+
+NUMERIC_COLUMNS = [
+    'remuneracion_mensual_cargo',
+    'otros_ingresos_mensuales',
+    'ingreso_mensual_neto',
+    'ingreso_anual_neto',
+]
+IQR_MULTIPLIER = 3.0
+MIN_GROUP_ROWS = 30
+CHUNK_ROWS = 200_000
+
+ANOMALY_TABLE = 's1_anomalias'
+ANOMALY_SCHEMAS = {
+    ANOMALY_TABLE: [
+        ('id', 'string'),
+        ('state', 'dictionary'),
+        ('institucion', 'string'),
+        ('regla', 'dictionary'),
+        ('columna', 'dictionary'),
+        ('valor', 'float64'),
+        ('umbral', 'float64'),
+    ],
+}
+ANOMALY_COLUMNS = [name for name, _ in ANOMALY_SCHEMAS[ANOMALY_TABLE]]
+
+
+def find_table(state_dir, name):
+    """Archivo de una tabla del estado; si existen ambos formatos se prefiere Parquet."""
+    for extension in ('parquet', 'csv'):
+        path = os.path.join(state_dir, f"{name}.{extension}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def iter_frames(path, columns, chunk_rows=CHUNK_ROWS):
+    """Bloques de `chunk_rows` filas con solo las columnas pedidas que existan."""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        available = [c for c in columns if c in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=available):
+            yield batch.to_pandas()
+        return
+    header = pd.read_csv(path, nrows=0).columns
+    available = [c for c in columns if c in header]
+    yield from pd.read_csv(path, usecols=available, chunksize=chunk_rows, dtype={'id': str}, low_memory=False)
+
+
+def load_institutions(state_dir):
+    """id -> institución del estado (de s1_resumen); vacío si no existe la tabla."""
+    path = find_table(state_dir, 's1_resumen')
+    if path is None:
+        return pd.Series(dtype=object)
+    parts = [frame.dropna(subset=['id']).drop_duplicates('id').set_index('id')['institucion']
+             for frame in iter_frames(path, ['id', 'institucion'])]
+    if not parts:
+        return pd.Series(dtype=object)
+    institutions = pd.concat(parts)
+    return institutions[~institutions.index.duplicated()]
+
+
+def iter_state_frames(state_dir, state):
+    """Bloques de s1_ingresos del estado con la institución de cada declaración."""
+    path = find_table(state_dir, 's1_ingresos')
+    if path is None:
+        return
+    institutions = load_institutions(state_dir)
+    for frame in iter_frames(path, ['id'] + NUMERIC_COLUMNS):
+        frame['id'] = frame['id'].astype(object)
+        frame['state'] = state
+        frame['institucion'] = frame['id'].map(institutions).fillna('DESCONOCIDO')
+        for column in NUMERIC_COLUMNS:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce') if column in frame else np.nan
+        yield frame
+
+
+class AnomalyEngine:
+    def __init__(self, multiplier=IQR_MULTIPLIER, min_group_rows=MIN_GROUP_ROWS,
+                 relative_accuracy=RELATIVE_ACCURACY):
+        self.multiplier = multiplier
+        self.min_group_rows = min_group_rows
+        # Por columna: llaves (estado, institución) y (estado, None) para el respaldo por estado
+        self.sketches = {column: GroupedSketches(relative_accuracy) for column in NUMERIC_COLUMNS}
+        self.limits = None
+
+    def observe(self, frame):
+        """Primera pasada: actualiza los sketches con un bloque."""
+        codes, labels = pd.factorize(frame['institucion'])
+        state = frame['state'].iat[0]
+        group_labels = [(state, label) for label in labels]
+        state_codes = np.zeros(len(frame), dtype=np.int64)
+        for column in NUMERIC_COLUMNS:
+            values = frame[column].to_numpy(dtype='float64', na_value=np.nan)
+            self.sketches[column].add(codes, group_labels, values)
+            self.sketches[column].add(state_codes, [(state, None)], values)
+
+    def compute_limits(self):
+        """Umbral Q3 + k·IQR por columna y grupo, con respaldo al estado para grupos chicos."""
+        self.limits = {}
+        for column, grouped in self.sketches.items():
+            by_state = {}
+            limits = {}
+            for key, sketch in grouped.items():
+                q1, q3 = sketch.quantile(0.25), sketch.quantile(0.75)
+                upper = None if q1 is None else q3 + self.multiplier * (q3 - q1)
+                if key[1] is None:
+                    by_state[key[0]] = upper
+                elif sketch.count >= self.min_group_rows:
+                    limits[key] = upper
+            for key, sketch in grouped.items():
+                if key[1] is not None and key not in limits:
+                    limits[key] = by_state.get(key[0])
+            self.limits[column] = limits
+        return self.limits
+
+    def detect(self, frame):
+        """Segunda pasada: todas las reglas sobre un bloque; devuelve las filas anómalas."""
+        if self.limits is None:
+            self.compute_limits()
+        codes, labels = pd.factorize(frame['institucion'])
+        state = frame['state'].iat[0]
+        found = []
+        for column in NUMERIC_COLUMNS:
+            values = frame[column].to_numpy(dtype='float64', na_value=np.nan)
+            limits = self.limits[column]
+            upper = np.array([limits.get((state, label)) for label in labels], dtype='float64')[codes]
+
+            rules = (
+                ('negativo', values < 0, np.zeros(len(values))),
+                ('atipico_iqr', values > upper, upper),
+            )
+            for rule, mask, threshold in rules:
+                if mask.any():
+                    found.append(self.rows(frame, mask, rule, column, values, threshold))
+
+        annual = frame['ingreso_anual_neto'].to_numpy(dtype='float64', na_value=np.nan)
+        monthly = frame['ingreso_mensual_neto'].to_numpy(dtype='float64', na_value=np.nan)
+        mask = (annual > 0) & (annual < monthly)
+        if mask.any():
+            found.append(self.rows(frame, mask, 'anual_menor_mensual', 'ingreso_anual_neto', annual, monthly))
+
+        if not found:
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+        return pd.concat(found, ignore_index=True)
+
+    @staticmethod
+    def rows(frame, mask, rule, column, values, threshold):
+        return pd.DataFrame({
+            'id': frame['id'].to_numpy()[mask],
+            'state': frame['state'].to_numpy()[mask],
+            'institucion': frame['institucion'].to_numpy()[mask],
+            'regla': rule,
+            'columna': column,
+            'valor': values[mask],
+            'umbral': threshold[mask],
+        })
+
+
+def list_states(input_dir):
+    return sorted(d for d in os.listdir(input_dir)
+                  if os.path.isdir(os.path.join(input_dir, d)) and not d.startswith(('.', '_'))
+                  and find_table(os.path.join(input_dir, d), 's1_ingresos'))
+
+
+def detect_anomalies(input_dir, output_dir, output_format='parquet', engine=None):
+    """
+    Corre las dos pasadas sobre todos los estados de `input_dir` y escribe
+    s1_anomalias en `output_dir`. Devuelve los conteos por (estado, regla, columna).
+    """
+    engine = engine or AnomalyEngine()
+    states = list_states(input_dir)
+    if not states:
+        print(f"No se encontraron archivos s1_ingresos en {input_dir}")
+        return None
+
+    start = time.perf_counter()
+    rows = 0
+    for state in states:
+        for frame in iter_state_frames(os.path.join(input_dir, state), state):
+            engine.observe(frame)
+            rows += len(frame)
+    engine.compute_limits()
+    print(f"Sketches listos: {rows:,} filas de {len(states)} estados ({time.perf_counter() - start:.1f} s)")
+
+    os.makedirs(output_dir, exist_ok=True)
+    writer = make_writer(output_format, output_dir, ANOMALY_SCHEMAS)
+    counts = []
+    try:
+        for state in states:
+            for frame in iter_state_frames(os.path.join(input_dir, state), state):
+                anomalies = engine.detect(frame)
+                if anomalies.empty:
+                    continue
+                writer.write(ANOMALY_TABLE, anomalies)
+                counts.append(anomalies.groupby(['state', 'regla', 'columna'], observed=True).size())
+    finally:
+        writer.close()
+
+    summary = (pd.concat(counts).groupby(level=[0, 1, 2]).sum() if counts
+               else pd.Series(dtype='int64')).rename('anomalias')
+    print(f"✅ {int(summary.sum()):,} anomalías en {writer.path(ANOMALY_TABLE)} ({time.perf_counter() - start:.1f} s)")
+    return summary
+
+
+if __name__ == "__main__":
+    CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+    DEFAULT_OUTPUTS = os.path.join(CURRENT_DIR, '../../csv_outputs')
+
+    parser = argparse.ArgumentParser(description="Detecta anomalías en s1_ingresos por estado e institución.")
+    parser.add_argument('--input-dir', default=DEFAULT_OUTPUTS, help="Carpeta con un subdirectorio por estado")
+    parser.add_argument('--output-dir', default=None, help="Carpeta de salida (default: <input-dir>/_anomalias)")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='parquet', help="Formato de s1_anomalias")
+    parser.add_argument('--iqr-multiplier', type=float, default=IQR_MULTIPLIER)
+    parser.add_argument('--min-group-rows', type=int, default=MIN_GROUP_ROWS,
+                        help="Instituciones con menos valores usan el umbral de su estado")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input_dir):
+        print(f"Error: Directorio de entrada no encontrado: {args.input_dir}")
+        sys.exit(1)
+    output_dir = args.output_dir or os.path.join(args.input_dir, '_anomalias')
+    summary = detect_anomalies(args.input_dir, output_dir, args.format,
+                               AnomalyEngine(args.iqr_multiplier, args.min_group_rows))
+    if summary is None:
+        sys.exit(1)
+    if not summary.empty:
+        print(summary.to_string())
@@ -0,0 +1,155 @@
+"""
+Resumen por (entidad, institución, año) a partir del mart s1_dataset_maestro.
+
+Construye la tabla `resumen_declaraciones_institucion_anual` en la base DuckDB
+(junto a los modelos de dbt) y la publica en Parquet y CSV: conteos,
+percentiles de ingreso, totales de bienes por tipo y conteo de declaraciones
+atípicas. El dashboard de Django (vía Supabase) y la app web leen esta tabla de
+unos cuantos KB en lugar de agrupar todas las declaraciones en cada consulta.
+"""
+import argparse
+import os
+import sys
+import time
+
+import duckdb
+
+SUMMARY_TABLE = 'resumen_declaraciones_institucion_anual'
+
+# Atípico: por encima de Q3 + 3·IQR dentro de su propio grupo (valores "far out" de Tukey)
+OUTLIER_IQR_FACTOR = 3
+
+SUMMARY_SQL = f"""
+CREATE OR REPLACE TABLE main.{SUMMARY_TABLE} AS
+WITH anios AS (
+    SELECT id, max(year(fecha_actualizacion)) AS anio
+    FROM vigente.s1_resumen
+    GROUP BY id
+),
+bienes AS (
+    SELECT id_declaracion AS id, valor_adquisicion AS inmuebles, 0 AS muebles, 0 AS vehiculos, 0 AS inversiones
+    FROM vigente.s1_bienes_inmuebles
+    UNION ALL
+    SELECT id_declaracion, 0, valor_adquisicion, 0, 0 FROM vigente.s1_bienes_muebles
+    UNION ALL
+    SELECT id_declaracion, 0, 0, valor_adquisicion, 0 FROM vigente.s1_vehiculos
+    UNION ALL
+    SELECT id_declaracion, 0, 0, 0, saldo_situacion_actual FROM vigente.s1_inversiones
+),
+activos AS (
+    SELECT id,
+        sum(inmuebles) AS inmuebles,
+        sum(muebles) AS muebles,
+        sum(vehiculos) AS vehiculos,
+        sum(inversiones) AS inversiones
+    FROM bienes
+    WHERE id IS NOT NULL
+    GROUP BY id
+),
+base AS (
+    SELECT
+        m.estado AS entidad_cd,
+        m.institucion,
+        a.anio,
+        m.ingreso_anual_neto,
+        m.remuneracion_mensual_cargo,
+        coalesce(x.inmuebles, 0) AS inmuebles,
+        coalesce(x.muebles, 0) AS muebles,
+        coalesce(x.vehiculos, 0) AS vehiculos,
+        coalesce(x.inversiones, 0) AS inversiones,
+        coalesce(x.inmuebles, 0) + coalesce(x.muebles, 0)
+            + coalesce(x.vehiculos, 0) + coalesce(x.inversiones, 0) AS patrimonio
+    FROM main.s1_dataset_maestro m
+    LEFT JOIN anios a ON a.id = m.id
+    LEFT JOIN activos x ON x.id = m.id
+),
+limites AS (
+    SELECT entidad_cd, institucion, anio,
+        quantile_cont(ingreso_anual_neto, 0.25) FILTER (WHERE ingreso_anual_neto > 0) AS q1_ingreso,
+        quantile_cont(ingreso_anual_neto, 0.75) FILTER (WHERE ingreso_anual_neto > 0) AS q3_ingreso,
+        quantile_cont(patrimonio, 0.25) FILTER (WHERE patrimonio > 0) AS q1_patrimonio,
+        quantile_cont(patrimonio, 0.75) FILTER (WHERE patrimonio > 0) AS q3_patrimonio
+    FROM base
+    GROUP BY entidad_cd, institucion, anio
+)
+SELECT
+    b.entidad_cd,
+    b.institucion,
+    b.anio,
+    count(*) AS total_declaraciones,
+    count(*) FILTER (WHERE b.ingreso_anual_neto > 0) AS declaraciones_con_ingreso,
+    avg(b.ingreso_anual_neto) FILTER (WHERE b.ingreso_anual_neto > 0) AS ingreso_anual_promedio,
+    quantile_cont(b.ingreso_anual_neto, 0.25) FILTER (WHERE b.ingreso_anual_neto > 0) AS ingreso_anual_p25,
+    quantile_cont(b.ingreso_anual_neto, 0.5) FILTER (WHERE b.ingreso_anual_neto > 0) AS ingreso_anual_p50,
+    quantile_cont(b.ingreso_anual_neto, 0.75) FILTER (WHERE b.ingreso_anual_neto > 0) AS ingreso_anual_p75,
+    quantile_cont(b.ingreso_anual_neto, 0.9) FILTER (WHERE b.ingreso_anual_neto > 0) AS ingreso_anual_p90,
+    quantile_cont(b.ingreso_anual_neto, 0.99) FILTER (WHERE b.ingreso_anual_neto > 0) AS ingreso_anual_p99,
+    max(b.ingreso_anual_neto) AS ingreso_anual_maximo,
+    quantile_cont(b.remuneracion_mensual_cargo, 0.5) FILTER (WHERE b.remuneracion_mensual_cargo > 0)
+        AS remuneracion_mensual_p50,
+    sum(b.inmuebles) AS bienes_inmuebles_total,
+    sum(b.muebles) AS bienes_muebles_total,
+    sum(b.vehiculos) AS vehiculos_total,
+    sum(b.inversiones) AS inversiones_total,
+    sum(b.patrimonio) AS patrimonio_total,
+    count(*) FILTER (WHERE b.ingreso_anual_neto
+        > l.q3_ingreso + {OUTLIER_IQR_FACTOR} * (l.q3_ingreso - l.q1_ingreso)) AS atipicos_ingreso,
+    count(*) FILTER (WHERE b.patrimonio
+        > l.q3_patrimonio + {OUTLIER_IQR_FACTOR} * (l.q3_patrimonio - l.q1_patrimonio)) AS atipicos_patrimonio
+FROM base b
+JOIN limites l
+    ON l.entidad_cd IS NOT DISTINCT FROM b.entidad_cd
+    AND l.institucion IS NOT DISTINCT FROM b.institucion
+    AND l.anio IS NOT DISTINCT FROM b.anio
+GROUP BY b.entidad_cd, b.institucion, b.anio
+ORDER BY b.entidad_cd, total_declaraciones DESC, b.institucion, b.anio
+"""
+
+
+def build_summary(db_path, output_dir):
+    """Crea la tabla resumen en la base DuckDB y la publica en `output_dir`. Devuelve el número de filas."""
+    con = duckdb.connect(db_path)
+    try:
+        existing = {row[0] for row in con.execute(
+            "SELECT table_schema || '.' || table_name FROM information_schema.tables").fetchall()}
+        missing = [name for name in ('main.s1_dataset_maestro', 'vigente.s1_resumen') if name not in existing]
+        if missing:
+            print(f"❌ Faltan tablas en {db_path}: {', '.join(missing)}")
+            print("   Ejecuta primero src/extraction/ingesta_duckdb.py y `dbt run`.")
+            return None
+
+        start = time.perf_counter()
+        con.execute(SUMMARY_SQL)
+        rows = con.execute(f"SELECT count(*) FROM main.{SUMMARY_TABLE}").fetchone()[0]
+
+        os.makedirs(output_dir, exist_ok=True)
+        parquet_path = os.path.join(output_dir, f"{SUMMARY_TABLE}.parquet")
+        csv_path = os.path.join(output_dir, f"{SUMMARY_TABLE}.csv")
+        con.execute(f"COPY main.{SUMMARY_TABLE} TO '{parquet_path}' (FORMAT PARQUET, COMPRESSION 'ZSTD')")
+        # CSV para cargarlo a Supabase (tabla del mismo nombre)
+        con.execute(f"COPY main.{SUMMARY_TABLE} TO '{csv_path}' (HEADER, DELIMITER ',')")
+    finally:
+        con.close()
+
+    print(f"✅ {rows:,} filas en main.{SUMMARY_TABLE} ({time.perf_counter() - start:.1f} s)")
+    print(f"   {parquet_path} ({os.path.getsize(parquet_path) / 1024:,.1f} KB)")
+    print(f"   {csv_path} ({os.path.getsize(csv_path) / 1024:,.1f} KB)")
+    return rows
+
+
+if __name__ == "__main__":
+    CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+    DEFAULT_OUTPUTS = os.path.join(CURRENT_DIR, '../../csv_outputs')
+
+    parser = argparse.ArgumentParser(description="Genera el resumen por entidad, institución y año del S1.")
+    parser.add_argument('--db', default=os.path.join(DEFAULT_OUTPUTS, 'dataton_s1.duckdb'),
+                        help="Base DuckDB con el esquema raw y los modelos de dbt")
+    parser.add_argument('--output-dir', default=os.path.join(DEFAULT_OUTPUTS, 'publicacion'),
+                        help="Carpeta donde se publican el Parquet y el CSV")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Error: Base DuckDB no encontrada: {args.db}")
+        sys.exit(1)
+    if build_summary(args.db, args.output_dir) is None:
+        sys.exit(1)
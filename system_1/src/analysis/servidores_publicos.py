@@ -0,0 +1,384 @@
+"""
+Resolución de entidades: un `servidor_id` estable por servidor público.
+
+Reemplaza la llave compuesta de BQ/STAGE_1_SERVIDORES_INDIVIDUALES_LLAVE.sql
+(CURP, nombre, RFC, correos, institución y cargo) por un índice local en la
+base DuckDB, calculado sobre vigente.s1_resumen:
+
+1. Normalización en SQL: mayúsculas sin acentos ni signos, CURP y RFC solo si
+   tienen formato válido, correos en minúsculas. Cada llave se guarda como hash
+   (md5 de 64 bits), nunca el identificador en claro.
+2. Bloques: declaraciones con la misma llave son candidatas a unirse.
+       curp                CURP
+       rfc                 RFC con homoclave
+       rfc_nombre          RFC sin homoclave + nombre completo
+       nombre_institucion  estado + soundex de nombre y apellidos + institución
+       nombre_correo       estado + soundex de nombre y apellidos + correo
+   Las dos últimas son llaves débiles: un grupo nunca junta CURP distintas
+   por ellas. Una declaración sin CURP que comparte llaves débiles con
+   servidores de CURP distinta queda aparte, sin importar el orden de los ids.
+3. Union-find (common/union_find.py) sobre las declaraciones nuevas y los
+   servidores ya conocidos que comparten alguna llave con ellas: primero las
+   llaves fuertes y después las débiles (ver link_weak).
+
+Es incremental: solo se procesan las declaraciones que aún no están en
+servidores_declaraciones. Un grupo nuevo recibe 'SP' + hash de su menor id de
+declaración; si una declaración une a dos servidores existentes se conserva el
+menor servidor_id y la fusión queda en servidores_fusiones.
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from common.union_find import UnionFind
+
+STRONG_KEYS = ('curp', 'rfc', 'rfc_nombre')
+WEAK_KEYS = ('nombre_institucion', 'nombre_correo')
+# Orden en que las llaves débiles deciden a qué CURP se une un grupo sin CURP
+WEAK_PRIORITY = ('nombre_correo', 'nombre_institucion')
+# CURP de un grupo con varias CURP distintas (unidas por llaves fuertes, p.ej. RFC)
+MIXED_CURP = np.uint64(2 ** 64 - 1)
+
+IDENTITY_COLUMNS = ['nombre', 'primer_apellido', 'segundo_apellido', 'curp', 'rfc', 'rfc_homoclave',
+                    'correo', 'correo_personal', 'institucion']
+
+TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS main.servidores_declaraciones (
+    id VARCHAR PRIMARY KEY, state VARCHAR, servidor_id VARCHAR);
+CREATE TABLE IF NOT EXISTS main.servidores_llaves (
+    tipo VARCHAR, llave UBIGINT, servidor_id VARCHAR, PRIMARY KEY (tipo, llave, servidor_id));
+CREATE TABLE IF NOT EXISTS main.servidores_fusiones (
+    servidor_id_anterior VARCHAR, servidor_id VARCHAR, fusionado_en TIMESTAMP);
+"""
+
+
+def clean_text(column):
+    """Mayúsculas sin acentos, solo letras y dígitos con un espacio entre palabras; NULL si queda vacío."""
+    return (f"nullif(trim(regexp_replace(regexp_replace(upper(strip_accents({column})), "
+            f"'[^A-Z0-9 ]', ' ', 'g'), ' +', ' ', 'g')), '')")
+
+
+def new_declarations_sql(available):
+    columns = {c: (c if c in available else f"NULL::VARCHAR AS {c}") for c in IDENTITY_COLUMNS}
+    curp = "regexp_replace(upper(r.curp), '[^A-Z0-9]', '', 'g')"
+    rfc = "regexp_replace(upper(r.rfc), '[^A-Z0-9&]', '', 'g')"
+    homoclave = "regexp_replace(upper(coalesce(r.rfc_homoclave, '')), '[^A-Z0-9]', '', 'g')"
+    rfc_full = f"CASE WHEN length({rfc}) = 10 AND length({homoclave}) = 3 THEN {rfc} || {homoclave} ELSE {rfc} END"
+    email = "CASE WHEN regexp_full_match(lower(trim({0})), '[^@ ]+@[^@ ]+\\.[^@ ]+') THEN lower(trim({0})) END"
+    return f"""
+    CREATE OR REPLACE TEMP TABLE nuevos AS
+    WITH ultimas AS (
+        SELECT id, state, {', '.join(columns.values())}
+        FROM vigente.s1_resumen
+        WHERE id IS NOT NULL AND id NOT IN (SELECT id FROM main.servidores_declaraciones)
+        QUALIFY row_number() OVER (PARTITION BY id ORDER BY fecha_actualizacion DESC NULLS LAST) = 1
+    )
+    SELECT
+        row_number() OVER (ORDER BY r.id) - 1 AS fila,
+        r.id,
+        r.state,
+        CASE WHEN regexp_full_match({curp}, '[A-Z]{{4}}[0-9]{{6}}[HMX][A-Z]{{5}}[A-Z0-9][0-9]') THEN {curp} END AS curp,
+        CASE WHEN regexp_full_match({rfc_full}, '[A-Z&]{{4}}[0-9]{{6}}[A-Z0-9]{{3}}') THEN {rfc_full} END AS rfc,
+        CASE WHEN regexp_matches({rfc}, '^[A-Z&]{{4}}[0-9]{{6}}') THEN {rfc}[1:10] END AS rfc_base,
+        {clean_text('r.nombre')} AS nombre,
+        {clean_text('r.primer_apellido')} AS primer_apellido,
+        {clean_text('r.segundo_apellido')} AS segundo_apellido,
+        {clean_text('r.institucion')} AS institucion,
+        {email.format('r.correo')} AS correo,
+        {email.format('r.correo_personal')} AS correo_personal
+    FROM ultimas r
+    """
+
+
+KEYS_SQL = """
+CREATE OR REPLACE TEMP TABLE nuevas_llaves AS
+WITH base AS (
+    SELECT n.*,
+        concat_ws(' ', n.nombre, n.primer_apellido, n.segundo_apellido) AS nombre_completo,
+        n.state || '|' || s1.codigo || s2.codigo || coalesce(s3.codigo, '') AS fonetica
+    FROM nuevos n
+    LEFT JOIN fonetica s1 ON s1.parte = n.nombre
+    LEFT JOIN fonetica s2 ON s2.parte = n.primer_apellido
+    LEFT JOIN fonetica s3 ON s3.parte = n.segundo_apellido
+),
+llaves AS (
+    SELECT fila, 'curp' AS tipo, 'curp|' || curp AS valor FROM base WHERE curp IS NOT NULL
+    UNION ALL
+    SELECT fila, 'rfc', 'rfc|' || rfc FROM base WHERE rfc IS NOT NULL
+    UNION ALL
+    SELECT fila, 'rfc_nombre', 'rfc_nombre|' || rfc_base || '|' || nombre_completo
+    FROM base WHERE rfc_base IS NOT NULL AND nombre IS NOT NULL AND primer_apellido IS NOT NULL
+    UNION ALL
+    SELECT fila, 'nombre_institucion', 'nombre_institucion|' || fonetica || '|' || institucion
+    FROM base WHERE fonetica IS NOT NULL AND institucion IS NOT NULL
+    UNION ALL
+    SELECT fila, 'nombre_correo', 'nombre_correo|' || fonetica || '|' || correo
+    FROM base WHERE fonetica IS NOT NULL AND correo IS NOT NULL
+    UNION ALL
+    SELECT fila, 'nombre_correo', 'nombre_correo|' || fonetica || '|' || correo_personal
+    FROM base WHERE fonetica IS NOT NULL AND correo_personal IS NOT NULL
+)
+SELECT DISTINCT fila, tipo, md5_number_lower(valor) AS llave FROM llaves
+"""
+
+SUMMARY_SQL = """
+CREATE OR REPLACE TABLE main.servidores_publicos AS
+SELECT
+    d.servidor_id,
+    arg_max(concat_ws(' ', r.nombre, r.primer_apellido, r.segundo_apellido), r.fecha_actualizacion) AS nombre,
+    count(DISTINCT d.id) AS total_declaraciones,
+    count(DISTINCT d.state) AS total_estados,
+    list(DISTINCT d.state ORDER BY d.state) AS estados,
+    count(DISTINCT r.institucion) AS total_instituciones,
+    min(r.fecha_actualizacion) AS primera_declaracion,
+    max(r.fecha_actualizacion) AS ultima_declaracion
+FROM main.servidores_declaraciones d
+JOIN vigente.s1_resumen r ON r.id = d.id
+GROUP BY d.servidor_id
+"""
+
+_SOUNDEX_CODES = {letter: str(code) for code, letters in enumerate(
+    ['AEIOUHWY', 'BFPV', 'CGJKQSXZ', 'DT', 'L', 'MN', 'R']) for letter in letters}
+
+
+def soundex(text):
+    """Soundex clásico (letra + 3 dígitos) de un texto ya normalizado; None si no tiene letras."""
+    letters = [c for c in text if c in _SOUNDEX_CODES]
+    if not letters:
+        return None
+    code, previous = letters[0], _SOUNDEX_CODES[letters[0]]
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES[letter]
+        if digit != '0' and digit != previous:
+            code += digit
+        if letter not in 'HW':
+            previous = digit
+    return (code + '000')[:4]
+
+
+def new_servidor_id(declaration_id):
+    return 'SP' + hashlib.md5(declaration_id.encode('utf-8')).hexdigest()[:16].upper()
+
+
+def union_blocks(union_find, members, by=('tipo', 'llave')):
+    """Une todos los nodos de cada bloque con el menor nodo del bloque."""
+    anchor = members.groupby(list(by))['nodo'].transform('min')
+    union_find.union(members['nodo'].to_numpy(), anchor.to_numpy())
+
+
+def group_curp(roots, node_curp):
+    """CURP de cada raíz: 0 si ningún nodo tiene, la CURP si todos coinciden, MIXED_CURP si hay varias."""
+    frame = pd.DataFrame({'raiz': roots, 'curp': node_curp})
+    stats = frame[frame['curp'] != 0].groupby('raiz')['curp'].agg(['min', 'max'])
+    result = np.zeros(len(roots), dtype=np.uint64)
+    result[stats.index.to_numpy()] = np.where(stats['min'] == stats['max'], stats['min'], MIXED_CURP)
+    return result
+
+
+def link_weak(union_find, members, node_curp):
+    """
+    Une los bloques de llaves débiles sin juntar CURP distintas en un grupo:
+
+    1. dentro de cada bloque se unen los grupos con la misma CURP y los grupos
+       sin CURP entre sí;
+    2. cada grupo sin CURP se une a los grupos con CURP de sus bloques solo si
+       todos tienen la misma; si hay varias (o una mezcla) queda aparte. Se
+       usan los bloques de la llave más específica que tenga candidatos
+       (WEAK_PRIORITY): el mismo correo decide antes que la misma institución.
+    """
+    roots = union_find.roots()
+    members = members.assign(nodo=roots[members['nodo'].to_numpy()])
+    members['curp'] = group_curp(roots, node_curp)[members['nodo'].to_numpy()]
+    union_blocks(union_find, members[members['curp'] != MIXED_CURP], by=('tipo', 'llave', 'curp'))
+
+    roots = union_find.roots()
+    members['nodo'] = roots[members['nodo'].to_numpy()]
+    members['curp'] = group_curp(roots, node_curp)[members['nodo'].to_numpy()]
+    members = members.drop_duplicates()
+    zero = members.loc[members['curp'] == 0, ['tipo', 'llave', 'nodo']]
+    other = members[members['curp'] != 0]
+    candidates = zero.merge(other, on=['tipo', 'llave'], suffixes=('', '_otro'))
+    rank = candidates['tipo'].map({tipo: i for i, tipo in enumerate(WEAK_PRIORITY)})
+    candidates = candidates[rank == rank.groupby(candidates['nodo']).transform('min')]
+    stats = candidates.groupby('nodo')['curp'].agg(['min', 'max'])
+    single = stats.index[(stats['min'] == stats['max']) & (stats['min'] != MIXED_CURP)]
+    attach = candidates[candidates['nodo'].isin(single)]
+    union_find.union(attach['nodo'].to_numpy(), attach['nodo_otro'].to_numpy())
+
+
+def resolve(con):
+    """Asigna servidor_id a las declaraciones nuevas. Devuelve (declaraciones, servidores nuevos, fusiones)."""
+    available = {row[0] for row in con.execute("DESCRIBE vigente.s1_resumen").fetchall()}
+    con.execute(new_declarations_sql(available))
+    rows = con.execute("SELECT count(*) FROM nuevos").fetchone()[0]
+    if rows == 0:
+        return 0, 0, 0
+
+    parts = con.execute("""
+        SELECT DISTINCT parte FROM (
+            SELECT unnest([nombre, primer_apellido, segundo_apellido]) AS parte FROM nuevos
+        ) WHERE parte IS NOT NULL
+    """).df()
+    parts['codigo'] = [soundex(part) for part in parts['parte']]
+    con.register('fonetica_df', parts)
+    con.execute("CREATE OR REPLACE TEMP TABLE fonetica AS SELECT * FROM fonetica_df")
+    con.unregister('fonetica_df')
+    con.execute(KEYS_SQL)
+
+    keys = con.execute("SELECT fila, tipo, llave FROM nuevas_llaves").df()
+    known = con.execute("""
+        SELECT n.fila, n.tipo, n.llave, l.servidor_id
+        FROM nuevas_llaves n JOIN main.servidores_llaves l USING (tipo, llave)
+    """).df()
+    known_curp = con.execute("""
+        SELECT servidor_id, min(llave) AS curp, max(llave) AS curp_max FROM main.servidores_llaves
+        WHERE tipo = 'curp' AND servidor_id IN (
+            SELECT l.servidor_id FROM nuevas_llaves n JOIN main.servidores_llaves l USING (tipo, llave))
+        GROUP BY servidor_id
+    """).df()
+
+    # CURP (hash) por fila nueva y por servidor conocido; 0 = sin CURP
+    curp = np.zeros(rows, dtype=np.uint64)
+    curp_keys = keys[keys['tipo'] == 'curp']
+    curp[curp_keys['fila'].to_numpy()] = curp_keys['llave'].to_numpy(dtype=np.uint64)
+
+    # Nodos: filas nuevas 0..rows-1 y después los servidores conocidos
+    servers = pd.Index(sorted(known['servidor_id'].unique()))
+    known_curp['curp'] = np.where(known_curp['curp'] == known_curp['curp_max'],
+                                  known_curp['curp'].to_numpy(dtype=np.uint64), MIXED_CURP)
+    curp_by_server = dict(zip(known_curp['servidor_id'], known_curp['curp']))
+    server_curp = np.array([curp_by_server.get(server, 0) for server in servers], dtype=np.uint64)
+    union_find = UnionFind(rows + len(servers))
+
+    # Pertenencia de cada nodo a cada bloque (tipo, llave)
+    members = pd.concat([
+        pd.DataFrame({'tipo': keys['tipo'], 'llave': keys['llave'].to_numpy(dtype=np.uint64),
+                      'nodo': keys['fila'].to_numpy()}),
+        pd.DataFrame({'tipo': known['tipo'], 'llave': known['llave'].to_numpy(dtype=np.uint64),
+                      'nodo': rows + servers.get_indexer(known['servidor_id'])}),
+    ], ignore_index=True).drop_duplicates()
+    weak = members['tipo'].isin(WEAK_KEYS)
+    union_blocks(union_find, members[~weak])
+    link_weak(union_find, members[weak], np.concatenate([curp, server_curp]))
+
+    roots = union_find.roots()
+    declarations = con.execute("SELECT fila, id, state FROM nuevos ORDER BY fila").df()
+    declarations['grupo'] = roots[:rows]
+
+    # Servidor de cada grupo: el menor servidor conocido del grupo, o uno nuevo
+    groups = pd.DataFrame({'grupo': roots[rows:], 'servidor_id': servers})
+    existing = groups.groupby('grupo')['servidor_id'].min()
+    merges = groups[groups['servidor_id'] != groups['grupo'].map(existing)]
+    merges = pd.DataFrame({'servidor_id_anterior': merges['servidor_id'],
+                           'servidor_id': merges['grupo'].map(existing)})
+    # fila sigue el orden de id: la menor fila del grupo es su menor id
+    first_row = declarations.groupby('grupo')['fila'].min()
+    first_id = pd.Series(declarations['id'].to_numpy()[first_row.to_numpy()], index=first_row.index)
+    fresh = first_id[~first_id.index.isin(existing.index)].map(new_servidor_id)
+    group_server = pd.concat([existing, fresh])
+    declarations['servidor_id'] = declarations['grupo'].map(group_server)
+    keys['servidor_id'] = declarations['servidor_id'].to_numpy()[keys['fila'].to_numpy()]
+
+    con.register('asignadas_df', declarations[['id', 'state', 'servidor_id']])
+    con.register('llaves_df', keys[['tipo', 'llave', 'servidor_id']])
+    con.register('fusiones_df', merges)
+    con.execute("INSERT INTO main.servidores_declaraciones SELECT id, state, servidor_id FROM asignadas_df")
+    if len(merges):
+        con.execute("INSERT INTO main.servidores_fusiones SELECT *, current_timestamp FROM fusiones_df")
+        for table in ('servidores_declaraciones', 'servidores_fusiones'):
+            con.execute(f"""
+                UPDATE main.{table} t SET servidor_id = f.servidor_id
+                FROM fusiones_df f WHERE t.servidor_id = f.servidor_id_anterior
+            """)
+        # servidor_id es parte de la llave primaria: las llaves fusionadas se reinsertan
+        con.execute("""
+            CREATE OR REPLACE TEMP TABLE llaves_fusionadas AS
+            SELECT DISTINCT t.tipo, t.llave, f.servidor_id
+            FROM main.servidores_llaves t JOIN fusiones_df f ON t.servidor_id = f.servidor_id_anterior
+        """)
+        con.execute("DELETE FROM main.servidores_llaves WHERE servidor_id IN "
+                    "(SELECT servidor_id_anterior FROM fusiones_df)")
+        con.execute("INSERT OR IGNORE INTO main.servidores_llaves SELECT * FROM llaves_fusionadas")
+    # Una llave débil puede ser de varios servidores (los que no se unieron por tener CURP distinta)
+    con.execute("""
+        INSERT OR IGNORE INTO main.servidores_llaves
+        SELECT DISTINCT tipo, llave::UBIGINT, servidor_id FROM llaves_df
+    """)
+    for name in ('asignadas_df', 'llaves_df', 'fusiones_df'):
+        con.unregister(name)
+    return rows, len(fresh), len(merges)
+
+
+def single_server_keys(con):
+    """True si servidores_llaves es del esquema anterior: un solo servidor por llave."""
+    row = con.execute("""
+        SELECT constraint_column_names FROM duckdb_constraints()
+        WHERE schema_name = 'main' AND table_name = 'servidores_llaves' AND constraint_type = 'PRIMARY KEY'
+    """).fetchone()
+    return row is not None and list(row[0]) == ['tipo', 'llave']
+
+
+def build_index(db_path, rebuild=False):
+    start = time.perf_counter()
+    con = duckdb.connect(db_path)
+    try:
+        con.execute("BEGIN TRANSACTION")
+        if not rebuild and single_server_keys(con):
+            # Ese esquema no distingue servidores con CURP distinta que comparten llave débil
+            print("⚠️ Índice con un solo servidor por llave (versión anterior): se recalcula completo.")
+            rebuild = True
+        if rebuild:
+            for table in ('servidores_declaraciones', 'servidores_llaves', 'servidores_fusiones'):
+                con.execute(f"DROP TABLE IF EXISTS main.{table}")
+        con.execute(TABLES_SQL)
+        # Declaraciones que ya no están vigentes (estados eliminados o re-extraídos)
+        removed = con.execute("""
+            DELETE FROM main.servidores_declaraciones
+            WHERE id NOT IN (SELECT id FROM vigente.s1_resumen WHERE id IS NOT NULL)
+        """).fetchone()[0]
+        rows, fresh, merges = resolve(con)
+        con.execute(SUMMARY_SQL)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    total_servers, total_declarations = con.execute(
+        "SELECT count(*), sum(total_declaraciones) FROM main.servidores_publicos").fetchone()
+    con.close()
+
+    print("\n" + "=" * 50)
+    print("RESUMEN: Servidores públicos")
+    print("=" * 50)
+    print(f"Declaraciones nuevas:   {rows:,}")
+    print(f"Servidores nuevos:      {fresh:,}")
+    print(f"Fusiones:               {merges:,}")
+    print(f"Declaraciones quitadas: {removed:,}")
+    print(f"Total servidores:       {total_servers:,} ({total_declarations or 0:,} declaraciones)")
+    print(f"Tiempo:                 {time.perf_counter() - start:.1f} s")
+    return total_servers
+
+
+if __name__ == "__main__":
+    CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+    DEFAULT_OUTPUTS = os.path.join(CURRENT_DIR, '../../csv_outputs')
+
+    parser = argparse.ArgumentParser(description="Asigna un servidor_id estable a las declaraciones del S1.")
+    parser.add_argument('--db', default=os.path.join(DEFAULT_OUTPUTS, 'dataton_s1.duckdb'),
+                        help="Base DuckDB con el esquema raw (src/extraction/ingesta_duckdb.py)")
+    parser.add_argument('--rebuild', action='store_true', help="Descarta el índice y lo recalcula completo")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Error: Base DuckDB no encontrada: {args.db}")
+        sys.exit(1)
+    build_index(args.db, args.rebuild)
@@ -1,105 +1,137 @@
-import duckdb
+import argparse
 import os
+import sys
+import time
+
+import duckdb
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../..'))
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, 'system_1', 'src', 'extraction')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from common.instrumentation import configure_run_log, path_bytes, record, stage
+from common.mapping import Mapping
+from common.writers import OUTPUT_FORMATS, make_writer, write_stats
+from mapeo_s1 import S1_MAPPING
+from reglas import BATCH_ROWS, RULES_FILE, RuleEngine, load_rules_file, rules_for
+
+S1_SCHEMAS = Mapping(S1_MAPPING).schemas
+STATS_FILE = 'estadisticas_reglas.csv'
+
+
+def output_names(table):
+    # s1_ingresos -> s1_ingresos_clean / audit_log_ingresos
+    short = table[3:] if table.startswith('s1_') else table
+    return f"{table}_clean", f"audit_log_{short}"
+
+
+def output_schemas(tables):
+    schemas = {}
+    for table in tables:
+        clean_name, audit_name = output_names(table)
+        schemas[clean_name] = S1_SCHEMAS[table]
+        schemas[audit_name] = S1_SCHEMAS[table] + [('archivo_origen', 'string'), ('motivo_rechazo', 'dictionary')]
+    return schemas
+
 
-def clean_data_with_audit(base_path, output_dir):
+def clean_table(con, table, writer, rules=(), batch_rows=BATCH_ROWS):
+    """
+    Una sola lectura de vigente.<table>: cada lote se separa en limpias y
+    rechazadas con las reglas de reglas.py más `rules` (las del YAML).
+    """
+    engine = RuleEngine(table, rules_for(table, rules))
+    clean_name, audit_name = output_names(table)
+    with stage('clean_table', table=table) as s:
+        reader = con.execute(f'SELECT * FROM s1.vigente."{table}"').fetch_record_batch(batch_rows)
+        for batch in reader:
+            df = batch.to_pandas(date_as_object=False)
+            clean, rejected = engine.process(df)
+            writer.write(clean_name, clean)
+            writer.write(audit_name, rejected.rename(columns={'filename': 'archivo_origen'}))
+        rejected_rows = sum(stat.rejected for stat in engine.stats)
+        s.rows_in, s.rows_out = engine.rows, engine.rows - rejected_rows
+        s.set(rejected=rejected_rows)
+    return engine
+
+
+def clean_data_with_audit(base_path, output_dir, tables=None, output_format='csv'):
     print(f"Iniciando proceso de limpieza y auditoría...")
-    
+
     # Asegurar que exista el directorio de salida
     os.makedirs(output_dir, exist_ok=True)
-    
-    # Conexión en memoria
+
+    # Base persistente que llena src/extraction/ingesta_duckdb.py
+    db_path = os.path.join(base_path, "dataton_s1.duckdb")
+    if not os.path.exists(db_path):
+        print(f"No se encontró {db_path}. Ejecuta primero src/extraction/ingesta_duckdb.py")
+        return
+
+    # Conexión en memoria con la base adjunta en modo lectura
     con = duckdb.connect(database=':memory:')
-    
-    # Cargar todos los archivos raw
-    csv_pattern = os.path.join(base_path, "*/s1_ingresos.csv")
-    print("1. Cargando datos crudos...")
-    con.execute(f"""
-        CREATE TABLE raw_ingresos AS 
-        SELECT * FROM read_csv_auto('{csv_pattern}', union_by_name=True, filename=True)
-    """)
-    
-    total_rows = con.execute("SELECT count(*) FROM raw_ingresos").fetchone()[0]
-    print(f"   Total de registros procesados: {total_rows:,}")
-
-    # Definimos las REGLAS DE CALIDAD en una tabla temporal
-    # Usamos una lógica de prioridades para la razón de rechazo
-    print("2. Identificando anomalías...")
-    con.execute("""
-        CREATE TABLE auditoria AS
-        SELECT 
-            *,
-            CASE 
-                WHEN ingreso_anual_neto < 0 THEN 'Valor Negativo: Ingreso Anual'
-                WHEN ingreso_mensual_neto < 0 THEN 'Valor Negativo: Ingreso Mensual'
-                WHEN remuneracion_mensual_cargo < 0 THEN 'Valor Negativo: Remuneración'
-                WHEN otros_ingresos_mensuales < 0 THEN 'Valor Negativo: Otros Ingresos'
-                WHEN ingreso_anual_neto > 500000000 THEN 'Outlier Extremo: Anual > 500M'
-                WHEN ingreso_mensual_neto > 50000000 THEN 'Outlier Extremo: Mensual > 50M'
-                ELSE 'OK'
-            END as calidad_status
-        FROM raw_ingresos
-    """)
-
-    # Separar en dos tablas
-    
-    # A) BITÁCORA DE RECHAZOS (Audit Log)
-    print(f"3. Generando Bitácora de Rechazos en: {output_dir}/audit_log_ingresos.csv")
-    con.execute(f"""
-        COPY (
-            SELECT 
-                id, 
-                filename as archivo_origen,
-                ingreso_mensual_neto,
-                ingreso_anual_neto,
-                calidad_status as motivo_rechazo
-            FROM auditoria 
-            WHERE calidad_status != 'OK'
-        ) TO '{output_dir}/audit_log_ingresos.csv' (HEADER, DELIMITER ',')
-    """)
-    
-    rejected_count = con.execute("SELECT count(*) FROM auditoria WHERE calidad_status != 'OK'").fetchone()[0]
-    
-    # B) DATASET LIMPIO
-    print(f"4. Generando Dataset Limpio en: {output_dir}/s1_ingresos_clean.csv")
-    # Seleccionamos todas las columnas originales, excluyendo las filas malas
-    # Excluimos la columna temporal 'calidad_status' seleccionando columnas de la tabla raw original
-    con.execute(f"""
-        COPY (
-            SELECT * EXCLUDE (filename)
-            FROM auditoria 
-            WHERE calidad_status = 'OK'
-        ) TO '{output_dir}/s1_ingresos_clean.csv' (HEADER, DELIMITER ',')
-    """)
-    
-    clean_count = con.execute("SELECT count(*) FROM auditoria WHERE calidad_status = 'OK'").fetchone()[0]
+    con.execute(f"ATTACH '{db_path}' AS s1 (READ_ONLY)")
 
+    # Reglas de calidad: las de Python (reglas.py) más las de reglas_calidad.yml
+    rules = load_rules_file(RULES_FILE)
+    print(f"1. Reglas cargadas: {len(rules)} de {os.path.basename(RULES_FILE)} más las de reglas.py")
+
+    tables = tables or list(S1_SCHEMAS)
+    writer = make_writer(output_format, output_dir, output_schemas(tables))
+    stats = []
+    totals = {}
+    print(f"2. Aplicando reglas a {len(tables)} tablas (una lectura por tabla)...")
+    with stage('clean_data', format=output_format, tables=tables) as run:
+        try:
+            for table in tables:
+                start = time.perf_counter()
+                engine = clean_table(con, table, writer, rules)
+                stats.extend(engine.summary())
+                rejected = sum(s.rejected for s in engine.stats)
+                totals[table] = (engine.rows, rejected)
+                print(f"   {table}: {engine.rows:,} filas, {rejected:,} rechazadas ({time.perf_counter() - start:.1f} s)")
+        finally:
+            writer.close()
+            con.close()
+        run.rows_in = sum(rows for rows, _ in totals.values())
+        run.rows_out = run.rows_in - sum(rejected for _, rejected in totals.values())
+        run.bytes_written = path_bytes(output_dir)
+    for name, write in write_stats(writer).items():
+        record('write_table', table=name, format=output_format, **write)
+
+    stats = pd.DataFrame(stats)
+    stats.to_csv(os.path.join(output_dir, STATS_FILE), index=False, encoding='utf-8')
+
+    total_rows = sum(rows for rows, _ in totals.values())
+    rejected_count = sum(rejected for _, rejected in totals.values())
+    clean_count = total_rows - rejected_count
     print("\n" + "="*50)
     print("RESUMEN DE LIMPIEZA")
     print("="*50)
     print(f"Total Original:      {total_rows:,}")
-    print(f"Registros Limpios:   {clean_count:,} ({(clean_count/total_rows)*100:.2f}%)")
-    print(f"Registros Rechazados:{rejected_count:,} ({(rejected_count/total_rows)*100:.2f}%)")
+    if total_rows:
+        print(f"Registros Limpios:   {clean_count:,} ({(clean_count/total_rows)*100:.2f}%)")
+        print(f"Registros Rechazados:{rejected_count:,} ({(rejected_count/total_rows)*100:.2f}%)")
     print("-" * 30)
-    print("Desglose de Rechazos:")
-    reasons = con.execute("""
-        SELECT calidad_status, count(*) 
-        FROM auditoria 
-        WHERE calidad_status != 'OK' 
-        GROUP BY calidad_status 
-        ORDER BY 2 DESC
-    """).fetchall()
-    
-    for r in reasons:
-        print(f"  - {r[0]}: {r[1]:,}")
+    print("Desglose por regla (rechazos / coincidencias / tiempo):")
+    for r in stats[stats['coincidencias'] > 0].sort_values('rechazos', ascending=False).itertuples():
+        print(f"  - [{r.tabla}] {r.motivo}: {r.rechazos:,} / {r.coincidencias:,} / {r.segundos:.3f} s")
+    print(f"\nSalidas en {output_dir} (estadísticas por regla en {STATS_FILE})")
+    return stats
 
 if __name__ == "__main__":
     # Rutas relativas a este script (system_1/src/cleaning/limpieza_ingresos.py)
     # Queremos llegar a: system_1/
     # cleaning -> src -> system_1 (3 niveles)
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    
-    input_path = os.path.join(base_dir, "csv_outputs")
-    output_path = os.path.join(base_dir, "clean_data")
-    
+
+    parser = argparse.ArgumentParser(description="Limpieza con bitácora de rechazos para las tablas del S1.")
+    parser.add_argument('--input-dir', default=os.path.join(base_dir, "csv_outputs"))
+    parser.add_argument('--output-dir', default=os.path.join(base_dir, "clean_data"))
+    parser.add_argument('--tables', nargs='*', default=None, help="Tablas a limpiar (default: todas)")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv')
+    args = parser.parse_args()
+
     print(f"Ruta Base: {base_dir}")
-    clean_data_with_audit(input_path, output_path)
+    print(f"Bitácora de ejecución: {configure_run_log(os.path.join(args.output_dir, 'run_log.jsonl'))}")
+    clean_data_with_audit(args.input_dir, args.output_dir, args.tables, args.format)
@@ -0,0 +1,135 @@
+"""
+Registro de reglas de calidad para las tablas del S1 y el motor que las aplica.
+
+Una regla marca las filas que se rechazan de una tabla. Se definen de dos formas:
+
+- En reglas_calidad.yml, con una expresión de pandas `DataFrame.eval`
+  (p.ej. `ingreso_anual_neto < 0`); `@hoy` y `@anio_actual` están disponibles.
+  load_rules_file() las devuelve sin tocar el registro: cada corrida las pasa a
+  rules_for(), así que leer el archivo otra vez no duplica reglas.
+- En Python, con el decorador `@regla(tabla, nombre, motivo)` sobre una función
+  que recibe el DataFrame del lote y devuelve una máscara booleana. La tabla
+  '*' aplica a todas.
+
+El orden es la prioridad (las de Python y después las del YAML): el motivo de
+rechazo de una fila es el de la primera regla que cumple (igual que un CASE). Agregar una regla no agrega
+pasadas: RuleEngine lee cada tabla una sola vez por lotes y en cada lote evalúa
+todas sus reglas, escribe las filas limpias y las rechazadas y acumula las
+coincidencias y el tiempo de cada regla.
+"""
+import datetime
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reglas_calidad.yml')
+BATCH_ROWS = 100_000
+ALL_TABLES = '*'
+
+
+class Rule:
+    def __init__(self, table, name, motivo, condition):
+        self.table = table
+        self.name = name
+        self.motivo = motivo
+        # Texto para DataFrame.eval o función df -> máscara
+        self.condition = condition
+
+    def applies_to(self, table):
+        return self.table in (table, ALL_TABLES)
+
+    def evaluate(self, df, variables):
+        if callable(self.condition):
+            mask = self.condition(df)
+        else:
+            mask = df.eval(self.condition, local_dict=variables)
+        return np.asarray(pd.Series(mask, index=df.index).fillna(False), dtype=bool)
+
+
+RULES = []
+
+
+def regla(table, name, motivo):
+    """Registra una regla escrita en Python."""
+    def register(function):
+        RULES.append(Rule(table, name, motivo, function))
+        return function
+    return register
+
+
+def load_rules_file(path=RULES_FILE):
+    """Reglas del YAML ({tabla: [{nombre, condicion, motivo}]}); no las agrega a RULES."""
+    try:
+        import yaml
+    except ImportError as e:
+        raise ImportError("Leer reglas_calidad.yml requiere PyYAML (incluido con dbt-core)") from e
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = yaml.safe_load(f) or {}
+    loaded = []
+    for table, rules in spec.items():
+        for item in rules or []:
+            loaded.append(Rule(table, item['nombre'], item['motivo'], item['condicion']))
+    return loaded
+
+
+def rules_for(table, loaded=()):
+    """Reglas de `table`: las registradas con @regla y después las de `loaded` (load_rules_file)."""
+    return [rule for rule in [*RULES, *loaded] if rule.applies_to(table)]
+
+
+@regla(ALL_TABLES, 'sin_id', 'Sin identificador de declaración')
+def sin_id(df):
+    key = 'id' if 'id' in df else 'id_declaracion'
+    return df[key].isna() | (df[key].astype(str).str.strip() == '')
+
+
+class RuleStats:
+    def __init__(self, table, rule):
+        self.table = table
+        self.rule = rule
+        self.hits = 0       # filas que cumplen la regla
+        self.rejected = 0   # filas rechazadas con su motivo (primera regla que cumplen)
+        self.seconds = 0.0
+
+    def as_dict(self, rows):
+        return {'tabla': self.table, 'regla': self.rule.name, 'motivo': self.rule.motivo,
+                'filas_evaluadas': rows, 'coincidencias': self.hits, 'rechazos': self.rejected,
+                'segundos': round(self.seconds, 4)}
+
+
+class RuleEngine:
+    """
+    Aplica las reglas a lotes de una tabla. `process` recibe un DataFrame y
+    devuelve (limpias, rechazadas); las rechazadas llevan la columna
+    motivo_rechazo.
+    """
+
+    def __init__(self, table, rules=None):
+        self.table = table
+        self.rules = rules if rules is not None else rules_for(table)
+        self.stats = [RuleStats(table, rule) for rule in self.rules]
+        self.rows = 0
+        today = datetime.date.today()
+        self.variables = {'hoy': pd.Timestamp(today), 'anio_actual': today.year}
+
+    def process(self, df):
+        self.rows += len(df)
+        rejected = np.zeros(len(df), dtype=bool)
+        motivo = np.full(len(df), None, dtype=object)
+        for stats in self.stats:
+            start = time.perf_counter()
+            mask = stats.rule.evaluate(df, self.variables)
+            stats.seconds += time.perf_counter() - start
+            stats.hits += int(mask.sum())
+            first = mask & ~rejected
+            stats.rejected += int(first.sum())
+            motivo[first] = stats.rule.motivo
+            rejected |= mask
+        clean = df[~rejected]
+        bad = df[rejected].assign(motivo_rechazo=motivo[rejected])
+        return clean, bad
+
+    def summary(self):
+        return [stats.as_dict(self.rows) for stats in self.stats]
@@ -0,0 +1,144 @@
+import argparse
+import gc
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from procesar_masivo_s1 import S1Extractor, S1_COLUMNS, S1_MAPPER
+from referencia_por_tabla import ReferenciaPorTabla
+from common.decoders import PREFERRED, RecordDecoder
+from common.json_stream import open_source, iter_json_array
+
+# Columnas que el mapeo agregó después de congelar referencia_por_tabla.py (la
+# referencia no las genera); se excluyen al comparar contra ella
+NEW_COLUMNS = {name: ['posicion'] for name in S1_COLUMNS}
+NEW_COLUMNS['s1_resumen'] += ['curp', 'rfc', 'rfc_homoclave', 'correo_personal']
+
+
+def load_sample(file_path, limit):
+    with open_source(file_path) as f:
+        records = iter_json_array(f)
+        if limit:
+            records = itertools.islice(records, limit)
+        return list(records)
+
+
+def time_method(extractor, method, repeat):
+    best = None
+    for _ in range(repeat):
+        extractor.dfs = {}
+        start = time.perf_counter()
+        method()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def as_csv(dfs, exclude=None):
+    """Serializa cada tabla igual que la salida CSV, para comparar las dos rutas."""
+    exclude = exclude or {}
+    return {
+        name: df.reindex(columns=[c for c in S1_COLUMNS[name] if c not in exclude.get(name, ())]).to_csv(index=False)
+        for name, df in dfs.items()
+    }
+
+
+def time_decoder(decoder, payload, repeat):
+    """Mejor tiempo de decodificación y pico de memoria de Python (tracemalloc) de una corrida."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = decoder.decode(payload)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        del records
+    gc.collect()
+    tracemalloc.start()
+    records = decoder.decode(payload)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, records
+
+
+def compare_decoders(data, repeat=3):
+    """
+    Decodifica la muestra con json y con cada backend instalado (msgspec, orjson)
+    y verifica que las 13 tablas salgan iguales. Devuelve False si alguna difiere.
+    """
+    payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    extractor = S1Extractor.__new__(S1Extractor)
+    extractor.state_name = 'benchmark'
+    results = {}
+    for name in ('json',) + PREFERRED:
+        try:
+            decoder = RecordDecoder(name, S1_MAPPER)
+        except ImportError:
+            print(f"{name:<8} no instalado")
+            continue
+        seconds, peak, records = time_decoder(decoder, payload, repeat)
+        extractor.data, extractor.dfs = records, {}
+        extractor.process_tables()
+        results[name] = (seconds, peak, as_csv(extractor.dfs))
+
+    base_seconds, base_peak, expected = results['json']
+    ok = True
+    print(f"\nDecodificación de {len(payload) / 1e6:,.1f} MB de JSON:")
+    for name, (seconds, peak, tables) in results.items():
+        mismatches = [table for table in S1_COLUMNS if expected.get(table) != tables.get(table)]
+        ok = ok and not mismatches
+        status = f"difiere en {', '.join(mismatches)}" if mismatches else "mismas 13 tablas"
+        print(f"  {name:<8} {seconds:8.3f} s ({base_seconds / seconds:5.2f}x)  "
+              f"memoria {peak / 1e6:8,.1f} MB ({base_peak / peak:5.2f}x)  {status}")
+    return ok
+
+
+def benchmark(file_path, limit=None, repeat=3):
+    print(f"Cargando muestra de {os.path.basename(file_path)}...")
+    data = load_sample(file_path, limit)
+    print(f"Registros en la muestra: {len(data):,}")
+
+    extractor = S1Extractor.__new__(S1Extractor)
+    extractor.state_name = 'benchmark'
+    extractor.data = data
+    extractor.dfs = {}
+
+    # Referencia: los process_* escritos a mano, congelados en referencia_por_tabla.py
+    reference = ReferenciaPorTabla(data, extractor.state_name)
+    per_table = time_method(reference, reference.process_per_table, repeat)
+    expected = as_csv(reference.dfs, NEW_COLUMNS)
+
+    single_pass = time_method(extractor, extractor.process_single_pass, repeat)
+    actual = as_csv(extractor.dfs, NEW_COLUMNS)
+
+    mismatches = [name for name in S1_COLUMNS if expected.get(name) != actual.get(name)]
+
+    print("\n" + "=" * 50)
+    print("BENCHMARK DE EXTRACCIÓN S1")
+    print("=" * 50)
+    print(f"Por tabla (13 recorridos): {per_table:8.3f} s  ({len(data) / per_table:,.0f} registros/s)")
+    print(f"Mapeo (un recorrido):      {single_pass:8.3f} s  ({len(data) / single_pass:,.0f} registros/s)")
+    print(f"Aceleración:               {per_table / single_pass:8.2f}x")
+    if mismatches:
+        print(f"ALERTA: las salidas difieren en: {', '.join(mismatches)}")
+    else:
+        print("OK: el mapeo genera las mismas 13 tablas que la referencia.")
+
+    decoders_ok = compare_decoders(data, repeat)
+    if not decoders_ok:
+        print("ALERTA: algún decodificador genera tablas distintas a las de json.")
+    return not mismatches and decoders_ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara el mapeo compilado contra los process_* por tabla originales "
+                                                 "y los decodificadores JSON contra json.")
+    parser.add_argument('file_path', help="Archivo completo.json o completo.json.gz de un estado")
+    parser.add_argument('--limit', type=int, default=None, help="Usar solo las primeras N declaraciones")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones por ruta (se reporta la mejor)")
+    args = parser.parse_args()
+
+    ok = benchmark(args.file_path, args.limit, args.repeat)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,374 @@
+"""
+Ingesta de las tablas extraídas a una base DuckDB persistente.
+
+Carga los CSV o Parquet de csv_outputs/{Estado}/ al esquema `raw` de
+csv_outputs/dataton_s1.duckdb (la misma base que usa dbt), con los tipos fijos
+de S1_SCHEMAS más la columna `filename` con el archivo de origen. Solo se
+cargan los estados nuevos o cuyos archivos cambiaron (tamaño o mtime); cada
+estado se reemplaza en una sola transacción. El análisis, la limpieza y los
+modelos staging de dbt leen de estas tablas en lugar de volver a parsear los CSV.
+
+Una declaración puede venir en varias versiones (varios estados o repetida en
+el mismo archivo). raw._vigentes guarda por id el estado y la posición
+en el archivo fuente) de su versión vigente: la de fecha_actualizacion más
+reciente, luego tipo_declaracion y el ingreso anual más alto, como la regla de
+BQ/Readme.md; si aún empatan gana el estado menor y, dentro del archivo, la
+última publicada. Solo se recalcula para los ids de los estados que cambiaron.
+El esquema `vigente` tiene una vista por tabla con solo las filas de la versión
+vigente (las filas sin id no se pueden deduplicar y pasan todas), y
+raw._vigentes_estado cuenta los cambios de versión por estado para que dbt
+recargue también los estados afectados.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import duckdb
+
+from procesar_masivo_s1 import S1_SCHEMAS
+
+RAW_SCHEMA = 'raw'
+LOG_TABLE = f'{RAW_SCHEMA}._ingesta'
+SCHEMA_TABLE = f'{RAW_SCHEMA}._esquemas'
+CURRENT_SCHEMA = 'vigente'
+CURRENT_TABLE = f'{RAW_SCHEMA}._vigentes'
+CURRENT_STATES_TABLE = f'{RAW_SCHEMA}._vigentes_estado'
+# Macro de dbt con los mismos casts, para el origen files de staging (--dbt-macro la regenera)
+DBT_TYPES_MACRO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../dbt_project/macros/s1_tipos.sql')
+CURRENT_DEFINITION = ('"id" VARCHAR PRIMARY KEY, "state" VARCHAR, "posicion" BIGINT, '
+                      '"fecha_actualizacion" TIMESTAMPTZ')
+
+SQL_TYPES = {
+    'string': 'VARCHAR',
+    'dictionary': 'VARCHAR',
+    'float64': 'DOUBLE',
+    'int64': 'BIGINT',
+    'date': 'DATE',
+    'timestamp': 'TIMESTAMPTZ',
+}
+
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def sql_literal(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def table_definition(schema):
+    columns = [(column, SQL_TYPES[kind]) for column, kind in schema] + [('filename', 'VARCHAR')]
+    return ', '.join(f"{quote(column)} {sql_type}" for column, sql_type in columns)
+
+
+def cast_expression(column, kind, available):
+    """Convierte una columna de texto (CSV) o ya tipada (Parquet); lo inválido queda nulo."""
+    sql_type = SQL_TYPES[kind]
+    if column not in available:
+        return f"CAST(NULL AS {sql_type})"
+    col = quote(column)
+    if kind == 'int64':
+        # 2015.5 no es un entero válido (igual que en la salida Parquet)
+        number = f"TRY_CAST({col} AS DOUBLE)"
+        return f"CASE WHEN {number} = round({number}) THEN CAST({number} AS BIGINT) END"
+    if kind == 'date':
+        return f"CAST(TRY_CAST({col} AS TIMESTAMPTZ) AS DATE)"
+    if sql_type == 'VARCHAR':
+        return f"CAST({col} AS VARCHAR)"
+    return f"TRY_CAST({col} AS {sql_type})"
+
+
+def dbt_types_macro():
+    """
+    Texto de la macro s1_typed_columns(table) de dbt: la lista de columnas de la
+    tabla con los tipos de S1_SCHEMAS y los mismos casts que la ingesta, sobre un
+    read_csv(all_varchar=true) o un read_parquet de las salidas del extractor.
+    """
+    lines = [
+        "{#",
+        "  Generado por src/extraction/ingesta_duckdb.py --dbt-macro a partir de",
+        "  S1_SCHEMAS; no editar a mano. s1_typed_columns(table) convierte las columnas",
+        "  de una tabla del extractor igual que la ingesta a raw (lo inválido queda nulo).",
+        "#}",
+        "",
+        "{% macro s1_typed_columns(table) -%}",
+    ]
+    for i, (name, schema) in enumerate(S1_SCHEMAS.items()):
+        available = {column for column, _ in schema}
+        lines.append(f"{{%- {'if' if i == 0 else 'elif'} table == '{name}' -%}}")
+        lines.append(',\n'.join(f"    {cast_expression(column, kind, available)} AS {quote(column)}"
+                                for column, kind in schema))
+    lines += [
+        "{%- else -%}",
+        "    {{ exceptions.raise_compiler_error('Tabla sin esquema en S1_SCHEMAS: ' ~ table) }}",
+        "{%- endif -%}",
+        "{%- endmacro %}",
+        "",
+    ]
+    return '\n'.join(lines)
+
+
+def ensure_tables(con):
+    """
+    Crea el esquema raw y sus tablas. Si la definición de una tabla cambió (p.ej.
+    una columna nueva en el extractor) se recrea y se borra la bitácora para
+    recargar todos los estados. Devuelve True en ese caso. Si solo cambió la de
+    raw._vigentes, se recrea vacía y run_ingest() la recalcula completa.
+    """
+    con.execute(f"CREATE SCHEMA IF NOT EXISTS {RAW_SCHEMA}")
+    con.execute(f"CREATE TABLE IF NOT EXISTS {LOG_TABLE} "
+                "(estado VARCHAR PRIMARY KEY, firma VARCHAR, filas BIGINT, ingestado_en TIMESTAMP)")
+    con.execute(f"CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} (tabla VARCHAR PRIMARY KEY, definicion VARCHAR)")
+    con.execute(f"CREATE TABLE IF NOT EXISTS {CURRENT_STATES_TABLE} (estado VARCHAR PRIMARY KEY, version BIGINT)")
+    current = dict(con.execute(f"SELECT tabla, definicion FROM {SCHEMA_TABLE}").fetchall())
+    if current.get(CURRENT_TABLE) != CURRENT_DEFINITION:
+        con.execute(f"DROP TABLE IF EXISTS {CURRENT_TABLE}")
+        con.execute(f"CREATE TABLE {CURRENT_TABLE} ({CURRENT_DEFINITION})")
+        con.execute(f"INSERT OR REPLACE INTO {SCHEMA_TABLE} VALUES (?, ?)", [CURRENT_TABLE, CURRENT_DEFINITION])
+
+    recreated = False
+    for name, schema in S1_SCHEMAS.items():
+        definition = table_definition(schema)
+        if current.get(name) == definition:
+            continue
+        con.execute(f"DROP TABLE IF EXISTS {RAW_SCHEMA}.{quote(name)}")
+        con.execute(f"CREATE TABLE {RAW_SCHEMA}.{quote(name)} ({definition})")
+        con.execute(f"INSERT OR REPLACE INTO {SCHEMA_TABLE} VALUES (?, ?)", [name, definition])
+        recreated = True
+    if recreated:
+        con.execute(f"DELETE FROM {LOG_TABLE}")
+        con.execute(f"DELETE FROM {CURRENT_TABLE}")
+    create_current_views(con)
+    return recreated
+
+
+def key_column(schema):
+    return 'id' if any(column == 'id' for column, _ in schema) else 'id_declaracion'
+
+
+def create_current_views(con):
+    """
+    Una vista por tabla en el esquema vigente: solo filas de la versión vigente de
+    su declaración, más las filas sin id (no hay con qué deduplicarlas).
+    """
+    con.execute(f"CREATE SCHEMA IF NOT EXISTS {CURRENT_SCHEMA}")
+    for name, schema in S1_SCHEMAS.items():
+        key = key_column(schema)
+        con.execute(f"""
+            CREATE OR REPLACE VIEW {CURRENT_SCHEMA}.{quote(name)} AS
+            SELECT t.* FROM {RAW_SCHEMA}.{quote(name)} t
+            SEMI JOIN {CURRENT_TABLE} v ON v.id = t.{key} AND v.state = t.state AND v.posicion = t.posicion
+            UNION ALL
+            SELECT t.* FROM {RAW_SCHEMA}.{quote(name)} t WHERE t.{key} IS NULL
+        """)
+
+
+def update_current(con, states):
+    """
+    Recalcula la versión vigente de los ids que aparecen (antes o ahora) en
+    `states` y suma 1 a la versión de cada estado cuyas filas vigentes cambiaron.
+    Devuelve (ids recalculados, estados afectados).
+    """
+    if not states:
+        return 0, []
+    state_list = ', '.join(sql_literal(state) for state in states)
+    con.execute("BEGIN TRANSACTION")
+    try:
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE afectados AS
+            SELECT id FROM {CURRENT_TABLE} WHERE state IN ({state_list})
+            UNION
+            SELECT id FROM {RAW_SCHEMA}.s1_resumen WHERE state IN ({state_list}) AND id IS NOT NULL
+        """)
+        con.execute(f"CREATE OR REPLACE TEMP TABLE anteriores AS "
+                    f"SELECT v.* FROM {CURRENT_TABLE} v SEMI JOIN afectados a USING (id)")
+        con.execute(f"DELETE FROM {CURRENT_TABLE} WHERE id IN (SELECT id FROM afectados)")
+        con.execute(f"""
+            INSERT INTO {CURRENT_TABLE}
+            SELECT r.id, r.state, r.posicion, r.fecha_actualizacion
+            FROM {RAW_SCHEMA}.s1_resumen r
+            SEMI JOIN afectados a USING (id)
+            LEFT JOIN (
+                SELECT id, state, posicion, max(ingreso_anual_neto) AS ingreso_anual_neto
+                FROM {RAW_SCHEMA}.s1_ingresos SEMI JOIN afectados USING (id)
+                GROUP BY id, state, posicion
+            ) i ON i.id = r.id AND i.state = r.state AND i.posicion = r.posicion
+            QUALIFY row_number() OVER (
+                PARTITION BY r.id
+                ORDER BY r.fecha_actualizacion DESC NULLS LAST, r.tipo_declaracion NULLS LAST,
+                         i.ingreso_anual_neto DESC NULLS LAST, r.state, r.posicion DESC
+            ) = 1
+        """)
+        changed = [row[0] for row in con.execute(f"""
+            WITH nuevos AS (SELECT v.* FROM {CURRENT_TABLE} v SEMI JOIN afectados a USING (id)),
+            diferencias AS (
+                (SELECT id, state, posicion FROM anteriores EXCEPT SELECT id, state, posicion FROM nuevos)
+                UNION ALL
+                (SELECT id, state, posicion FROM nuevos EXCEPT SELECT id, state, posicion FROM anteriores)
+            )
+            SELECT DISTINCT state FROM diferencias ORDER BY state
+        """).fetchall()]
+        for state in changed:
+            con.execute(f"INSERT INTO {CURRENT_STATES_TABLE} VALUES (?, 1) "
+                        "ON CONFLICT (estado) DO UPDATE SET version = version + 1", [state])
+        recalculated = con.execute("SELECT count(*) FROM afectados").fetchone()[0]
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return recalculated, changed
+
+
+def state_files(state_dir):
+    """Archivo de cada tabla del estado; si existen ambos formatos se prefiere Parquet."""
+    files = {}
+    for name in S1_SCHEMAS:
+        for extension in ('parquet', 'csv'):
+            path = os.path.join(state_dir, f"{name}.{extension}")
+            if os.path.exists(path):
+                files[name] = path
+                break
+    return files
+
+
+def files_signature(files):
+    stats = {name: [os.path.basename(path), os.path.getsize(path), os.stat(path).st_mtime_ns]
+             for name, path in files.items()}
+    return json.dumps(stats, sort_keys=True)
+
+
+def source_reader(path):
+    if path.endswith('.parquet'):
+        return f"read_parquet({sql_literal(path)})"
+    # Todo como texto: sin inferencia de tipos; el cast a los tipos fijos se hace al insertar
+    return f"read_csv({sql_literal(path)}, header=true, all_varchar=true, ignore_errors=true)"
+
+
+def ingest_state(con, state, files, signature):
+    """Reemplaza las filas de un estado en todas las tablas raw, en una transacción."""
+    rows = {}
+    con.execute("BEGIN TRANSACTION")
+    try:
+        for name, schema in S1_SCHEMAS.items():
+            table = f"{RAW_SCHEMA}.{quote(name)}"
+            con.execute(f"DELETE FROM {table} WHERE state = ?", [state])
+            path = files.get(name)
+            if path is None:
+                continue
+            reader = source_reader(path)
+            available = {row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {reader}").fetchall()}
+            expressions = ', '.join(cast_expression(column, kind, available) for column, kind in schema)
+            before = con.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            con.execute(f"INSERT INTO {table} SELECT {expressions}, ? FROM {reader}", [os.path.abspath(path)])
+            rows[name] = con.execute(f"SELECT count(*) FROM {table}").fetchone()[0] - before
+        con.execute(f"INSERT OR REPLACE INTO {LOG_TABLE} VALUES (?, ?, ?, current_timestamp)",
+                    [state, signature, sum(rows.values())])
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return rows
+
+
+def remove_state(con, state):
+    con.execute("BEGIN TRANSACTION")
+    for name in S1_SCHEMAS:
+        con.execute(f"DELETE FROM {RAW_SCHEMA}.{quote(name)} WHERE state = ?", [state])
+    con.execute(f"DELETE FROM {LOG_TABLE} WHERE estado = ?", [state])
+    con.execute("COMMIT")
+
+
+def run_ingest(input_dir, db_path, force=None):
+    """Sincroniza el esquema raw con las salidas del extractor. Devuelve la lista de errores."""
+    con = duckdb.connect(db_path)
+    con.execute("SET TimeZone = 'UTC'")
+    if ensure_tables(con):
+        print("Esquema raw creado o actualizado: se cargan todos los estados.")
+
+    ingested = dict(con.execute(f"SELECT estado, firma FROM {LOG_TABLE}").fetchall())
+    states = sorted(d for d in os.listdir(input_dir)
+                    if os.path.isdir(os.path.join(input_dir, d)) and not d.startswith('.'))
+
+    start = time.perf_counter()
+    loaded, skipped, errors = 0, 0, []
+    touched = []
+    if con.execute(f"SELECT count(*) FROM {CURRENT_TABLE}").fetchone()[0] == 0:
+        # Índice vacío (primera corrida o esquema recreado): todos los estados ya cargados
+        touched = list(ingested)
+    for state in states:
+        files = state_files(os.path.join(input_dir, state))
+        if not files:
+            continue
+        signature = files_signature(files)
+        forced = force is not None and (not force or state in force)
+        if ingested.get(state) == signature and not forced:
+            skipped += 1
+            continue
+        t0 = time.perf_counter()
+        try:
+            rows = ingest_state(con, state, files, signature)
+        except Exception as e:
+            print(f"[{state}] ❌ Error en la ingesta: {e}")
+            errors.append(state)
+            continue
+        loaded += 1
+        touched.append(state)
+        print(f"[{state}] ✅ {sum(rows.values()):,} filas en {len(rows)} tablas ({time.perf_counter() - t0:.1f} s)")
+
+    # Estados que ya no existen en la salida del extractor
+    for state in sorted(set(ingested) - set(states)):
+        remove_state(con, state)
+        touched.append(state)
+        print(f"[{state}] 🗑️  Eliminado de raw (ya no está en {input_dir})")
+
+    t0 = time.perf_counter()
+    recalculated, changed = update_current(con, sorted(set(touched)))
+    current, total, without_id = con.execute(
+        f"SELECT (SELECT count(*) FROM {CURRENT_TABLE}), (SELECT count(*) FROM {RAW_SCHEMA}.s1_resumen), "
+        f"(SELECT count(*) FROM {RAW_SCHEMA}.s1_resumen WHERE id IS NULL)").fetchone()
+    if recalculated:
+        print(f"🔁 Versión vigente recalculada para {recalculated:,} declaraciones "
+              f"({time.perf_counter() - t0:.1f} s); estados afectados: {', '.join(changed) or 'ninguno'}")
+
+    print("\n" + "=" * 50)
+    print("RESUMEN: Ingesta DuckDB")
+    print("=" * 50)
+    print(f"Cargados:    {loaded}")
+    print(f"Sin cambios: {skipped}")
+    print(f"Errores:     {len(errors)}")
+    print(f"Vigentes:    {current:,} declaraciones ({total - current - without_id:,} versiones anteriores o repetidas)")
+    print(f"Sin id:      {without_id:,} declaraciones (se conservan todas en vigente)")
+    print(f"Tiempo:      {time.perf_counter() - start:.1f} s")
+    print(f"Base:        {db_path}")
+    con.close()
+    return errors
+
+
+if __name__ == "__main__":
+    CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+    DEFAULT_OUTPUTS = os.path.join(CURRENT_DIR, '../../csv_outputs')
+
+    parser = argparse.ArgumentParser(description="Carga las tablas extraídas del S1 a DuckDB (esquema raw).")
+    parser.add_argument('--input-dir', default=DEFAULT_OUTPUTS, help="Carpeta con un subdirectorio por estado")
+    parser.add_argument('--db', default=None, help="Archivo DuckDB (default: <input-dir>/dataton_s1.duckdb)")
+    parser.add_argument('--force', nargs='*', default=None, metavar='ESTADO',
+                        help="Recargar aunque no haya cambios (sin argumentos: todos los estados)")
+    parser.add_argument('--dbt-macro', action='store_true',
+                        help=f"Solo regenerar {os.path.relpath(DBT_TYPES_MACRO, CURRENT_DIR)} (tipos para dbt)")
+    args = parser.parse_args()
+
+    if args.dbt_macro:
+        with open(DBT_TYPES_MACRO, 'w', encoding='utf-8') as f:
+            f.write(dbt_types_macro())
+        print(f"✅ Macro de tipos escrita en {os.path.abspath(DBT_TYPES_MACRO)}")
+        sys.exit(0)
+
+    if not os.path.exists(args.input_dir):
+        print(f"Error: Directorio de entrada no encontrado: {args.input_dir}")
+        sys.exit(1)
+    db_path = args.db or os.path.join(args.input_dir, 'dataton_s1.duckdb')
+    failed = run_ingest(args.input_dir, db_path, args.force)
+    if failed:
+        sys.exit(1)
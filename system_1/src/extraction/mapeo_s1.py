@@ -0,0 +1,225 @@
+"""
+Mapeo declarativo de las declaraciones del S1 a las 13 tablas de salida
+(ver common/mapping.py para el formato). Para soportar otra variante del
+esquema basta con agregar la clave alternativa en 'path' o 'list'.
+"""
+PAT = ('declaracion', 'situacionPatrimonial')
+INTERES = ('declaracion', 'interes')
+
+ID_DECLARACION = ('id_declaracion', 'string', ('entry', 'id'))
+STATE = ('state', 'dictionary', ('state',))
+# Posición de la declaración en el archivo del estado: distingue las versiones de
+# un mismo id dentro del archivo (ingesta_duckdb.py). Va al final de cada tabla
+# para que merge_outputs la pueda desplazar al juntar los rangos de un archivo.
+POSICION = ('posicion', 'int64', ('position',))
+
+S1_MAPPING = {
+    's1_resumen': {
+        'columns': [
+            ('id', 'string', 'id'),
+            ('fecha_actualizacion', 'timestamp', ('at', ('metadata',), 'actualizacion')),
+            ('institucion', 'string', ('at', ('metadata',), 'institucion')),
+            ('tipo_declaracion', 'dictionary', ('at', ('metadata',), 'tipo')),
+            ('nombre', 'string', ('at', PAT + ('datosGenerales',), 'nombre')),
+            ('primer_apellido', 'string', ('at', PAT + ('datosGenerales',), 'primerApellido')),
+            ('segundo_apellido', 'string', ('at', PAT + ('datosGenerales',), 'segundoApellido')),
+            ('curp', 'string', ('at', PAT + ('datosGenerales',), 'curp')),
+            ('rfc', 'string', ('at', PAT + ('datosGenerales',), ('dict_or_value', 'rfc', 'rfc'))),
+            ('rfc_homoclave', 'string', ('at', PAT + ('datosGenerales',), ('path', ('rfc', 'homoClave'), None))),
+            ('correo', 'string', ('at', PAT + ('datosGenerales',),
+                                  ('dict_or_value', 'correoElectronico', 'institucional'))),
+            ('correo_personal', 'string', ('at', PAT + ('datosGenerales',),
+                                           ('path', ('correoElectronico', 'personal'), None))),
+            ('empleo_nombre_ente', 'string', ('at', PAT + ('datosEmpleoCargoComision',), 'nombreEntePublico', 'first')),
+            ('empleo_cargo', 'string', ('at', PAT + ('datosEmpleoCargoComision',), 'empleoCargoComision', 'first')),
+            ('empleo_nivel', 'string', ('at', PAT + ('datosEmpleoCargoComision',), 'nivelEmpleoCargoComision', 'first')),
+            STATE,
+            POSICION,
+        ],
+    },
+    's1_experiencia_laboral': {
+        'path': PAT + ('experienciaLaboral',),
+        'mode': 'raw',
+        'list': ('experiencia',),
+        'columns': [
+            ID_DECLARACION, STATE,
+            ('ambito_sector', 'dictionary', ('valor', 'ambitoSector')),
+            ('nivel_gobierno', 'dictionary', ('valor', 'nivelOrdenGobierno')),
+            ('ambito_publico', 'dictionary', ('valor', 'ambitoPublico')),
+            ('nombre_ente', 'string', 'nombreEntePublico'),
+            ('area_adscripcion', 'string', 'areaAdscripcion'),
+            ('empleo_cargo', 'string', 'empleoCargoComision'),
+            ('fecha_ingreso', 'date', 'fechaIngreso'),
+            ('fecha_egreso', 'date', 'fechaEgreso'),
+            ('ubicacion', 'dictionary', ('valor', 'ubicacion')),
+            POSICION,
+        ],
+    },
+    's1_datos_pareja': {
+        'path': PAT + ('datosPareja',),
+        'mode': 'optional',
+        'unless': 'ninguno',
+        'columns': [
+            ID_DECLARACION, STATE,
+            ('nombre', 'string', 'nombre'),
+            ('primer_apellido', 'string', 'primerApellido'),
+            ('segundo_apellido', 'string', 'segundoApellido'),
+            ('relacion', 'dictionary', ('valor', 'relacionConDeclarante')),
+            ('ciudadano_extranjero', 'string', 'ciudadanoExtranjero'),
+            ('curp', 'string', 'curp'),  # Often masked
+            ('habita_domicilio', 'string', 'habitaDomicilioDeclarante'),
+            ('actividad_laboral', 'dictionary', ('valor', 'actividadLaboralSectorPublico')),
+            POSICION,
+        ],
+    },
+    's1_dependientes_economicos': {
+        'path': PAT + ('datosDependientesEconomicos',),
+        'mode': 'raw',
+        'list': ('dependienteEconomico', 'dependientes'),
+        'columns': [
+            ID_DECLARACION, STATE,
+            ('nombre', 'string', 'nombre'),
+            ('primer_apellido', 'string', 'primerApellido'),
+            ('segundo_apellido', 'string', 'segundoApellido'),
+            ('parentesco', 'dictionary', ('valor', 'parentescoRelacion')),
+            ('ciudadano_extranjero', 'string', 'ciudadanoExtranjero'),
+            ('actividad_laboral', 'dictionary', ('valor', 'actividadLaboralSectorPublico')),
+            POSICION,
+        ],
+    },
+    's1_ingresos': {
+        'path': PAT + ('ingresos',),
+        'columns': [
+            ('id', 'string', ('entry', 'id')), STATE,
+            ('remuneracion_mensual_cargo', 'float64', ('valor', 'remuneracionMensualCargoPublico')),
+            ('otros_ingresos_mensuales', 'float64', ('valor', 'otrosIngresosMensualesTotal')),
+            ('ingreso_mensual_neto', 'float64', ('valor', 'ingresoMensualNetoDeclarante')),
+            ('ingreso_anual_neto', 'float64', ('valor', 'ingresoAnualNetoDeclarante')),
+            POSICION,
+        ],
+    },
+    's1_bienes_inmuebles': {
+        'path': PAT + ('bienesInmuebles',),
+        'list': ('bienInmueble', 'bienesInmuebles'),
+        'columns': [
+            ID_DECLARACION, STATE,
+            ('tipo_inmueble', 'dictionary', ('valor', 'tipoInmueble')),
+            ('titular', 'string', ('join', 'titular', ('valor', 'valor', ''), 'str')),
+            ('valor_adquisicion', 'float64', ('valor', 'valorAdquisicion')),
+            ('moneda', 'dictionary', ('moneda', 'valorAdquisicion')),
+            ('forma_adquisicion', 'dictionary', ('valor', 'formaAdquisicion')),
+            ('fecha_adquisicion', 'date', 'fechaAdquisicion'),
+            POSICION,
+        ],
+    },
+    's1_bienes_muebles': {
+        'path': PAT + ('bienesMuebles',),
+        'list': ('bienMueble', 'bienesMuebles'),
+        'columns': [
+            ID_DECLARACION, STATE,
+            ('tipo_bien', 'dictionary', ('valor', 'tipoBien')),
+            ('descripcion', 'string', 'descripcionGeneralBien'),
+            ('titular', 'string', ('join', 'titular', ('valor', 'valor', ''), '')),
+            ('valor_adquisicion', 'float64', ('valor', 'valorAdquisicion')),
+            ('moneda', 'dictionary', ('moneda', 'valorAdquisicion')),
+            ('forma_adquisicion', 'dictionary', ('valor', 'formaAdquisicion')),
+            ('fecha_adquisicion', 'date', 'fechaAdquisicion'),
+            POSICION,
+        ],
+    },
+    's1_vehiculos': {
+        'path': PAT + ('vehiculos',),
+        'list': ('vehiculo', 'vehiculos'),
+        'columns': [
+            ID_DECLARACION, STATE,
+            ('tipo_vehiculo', 'dictionary', ('valor', 'tipoVehiculo')),
+            ('marca', 'string', 'marca'),
+            ('modelo', 'string', 'modelo'),
+            ('anio', 'int64', 'anio'),
+            ('valor_adquisicion', 'float64', ('valor', 'valorAdquisicion')),
+            ('moneda', 'dictionary', ('moneda', 'valorAdquisicion')),
+            ('fecha_adquisicion', 'date', 'fechaAdquisicion'),
+            ('forma_adquisicion', 'dictionary', ('valor', 'formaAdquisicion')),
+            POSICION,
+        ],
+    },
+    's1_inversiones': {
+        # Standard name variations
+        'path': PAT + (('inversionesCuentasValores', 'inversiones'),),
+        'list': ('inversion', 'inversiones'),
+        'columns': [
+            ID_DECLARACION, STATE,
+            ('tipo_inversion', 'dictionary', ('valor', 'tipoInversion')),
+            ('subtipo_inversion', 'dictionary', ('valor', 'subTipoInversion')),
+            # Newer schemas have nested localizacionInversion; older ones the direct field
+            ('institucion', 'string', ('within', 'localizacionInversion', 'institucionRazonSocial',
+                                       'institucionRazonSocial')),
+            ('numero_cuenta', 'string', 'numeroCuentaContrato'),
+            ('saldo_situacion_actual', 'float64', ('valor', 'saldoSituacionActual')),
+            ('moneda', 'dictionary', ('moneda', 'saldoSituacionActual')),
+            ('pais', 'dictionary', ('within', 'localizacionInversion', 'pais', ('const', None))),
+            POSICION,
+        ],
+    },
+    's1_adeudos_pasivos': {
+        'path': PAT + ('adeudosPasivos',),
+        'list': ('adeudo', 'adeudos'),
+        'columns': [
+            ID_DECLARACION, STATE,
+            ('tipo_adeudo', 'dictionary', ('valor', 'tipoAdeudo')),
+            ('monto_original', 'float64', ('valor', 'montoOriginal')),
+            ('saldo_pendiente', 'float64', ('valor', 'saldoInsolutoSituacionActual')),
+            ('moneda', 'dictionary', ('moneda', 'saldoInsolutoSituacionActual')),
+            ('fecha_adquisicion', 'date', 'fechaAdquisicion'),
+            ('institucion', 'string', 'institucionRazonSocial'),
+            ('otorgante', 'string', ('within', 'otorganteCredito',
+                                     ('or', 'nombreInstitucion', 'nombreRazonSocial'), ('const', None))),
+            POSICION,
+        ],
+    },
+    's1_prestamo_comodato': {
+        'path': PAT + ('prestamoOComodato',),
+        'list': ('prestamo',),
+        'columns': [
+            ID_DECLARACION, STATE,
+            ('tipo_bien', 'dictionary', ('valor', 'tipoBien')),
+            ('marca', 'string', 'marca'),
+            ('modelo', 'string', 'modelo'),
+            ('anio', 'int64', 'anio'),
+            ('registro', 'string', 'numeroSerieRegistro'),
+            ('relacion_dueno', 'dictionary', ('valor', 'relacionConDuenio')),
+            ('dueno', 'string', ('within', 'duenioTitular',
+                                 ('or', 'nombreRazonSocial', 'nombre'), ('const', None))),
+            POSICION,
+        ],
+    },
+    'interes_apoyos': {
+        'path': INTERES + ('apoyos',),
+        'list': ('apoyo', 'apoyos'),
+        'columns': [
+            ID_DECLARACION, STATE,
+            ('beneficiario', 'dictionary', ('valor', 'beneficiarioPrograma')),
+            ('nombre_programa', 'string', 'nombrePrograma'),
+            ('institucion_otorgante', 'string', 'institucionOtorgante'),
+            ('nivel_gobierno', 'dictionary', 'nivelOrdenGobierno'),
+            ('tipo_apoyo', 'dictionary', ('valor', 'tipoApoyo')),
+            ('forma_recepcion', 'dictionary', 'formaRecepcion'),
+            ('monto_apoyo', 'float64', ('valor', 'montoApoyoMensual')),
+            ('moneda', 'dictionary', ('moneda', 'montoApoyoMensual')),
+            POSICION,
+        ],
+    },
+    'interes_participacion': {
+        'path': INTERES + ('participacion',),
+        'list': ('participacion', 'participaciones'),
+        'columns': [
+            ID_DECLARACION, STATE,
+            ('nombre_empresa', 'string', 'nombreEmpresaSociedadAsociacion'),
+            ('tipo_participacion', 'dictionary', ('valor', 'tipoParticipacion')),
+            ('porcentaje', 'float64', 'porcentajeParticipacion'),
+            ('sector', 'dictionary', ('valor', 'sector')),
+            ('recibe_remuneracion', 'string', 'recibeRemuneracion'),
+            POSICION,
+        ],
+    },
+}
@@ -1,22 +1,103 @@
+import argparse
+import itertools
 import json
+import multiprocessing
 import pandas as pd
 import os
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from common.decoders import DECODERS, RecordDecoder, resolve_decoder
+from common.instrumentation import configure_run_log, path_bytes, record, stage
+from common.json_stream import (CHUNK_SIZE, SOURCE_EXTENSIONS, is_compressed, open_binary, open_source,
+                                iter_json_array, iter_batches, iter_json_ranges, mean_record_bytes,
+                                read_json_shard, split_json_array)
+from common.mapping import Mapping
+from common.manifest import Manifest, STAGING_DIR, file_fingerprint, publish_dir
+from common.parallel import run_and_report
+from common.writers import OUTPUT_FORMATS, TableBuffers, make_writer, merge_outputs, write_stats
+from mapeo_s1 import POSICION, S1_MAPPING
+
+# Subir cuando cambie la lógica de extracción o el esquema de salida: el manifiesto
+# reprocesa todos los estados extraídos con otra versión.
+EXTRACTOR_VERSION = '3'
+
+# Declaraciones por lote en modo streaming
+BATCH_SIZE = 5000
+
+# Factores para estimar la memoria por estado (ver estimate_memory)
+JSON_LOAD_EXPANSION = 5
+GZIP_EXPANSION = 8
+ZSTD_EXPANSION = 10
+STREAM_BASE_MEMORY = 200 * 1024 ** 2
+STREAM_MEMORY_PER_RECORD = 20 * 1024
+
+# Modo por rangos (--shard-workers): un .json sin comprimir se parte en rangos de
+# ~SHARD_BYTES que se extraen en paralelo; solo para archivos de SHARD_MIN_MB o más
+SHARD_BYTES = 64 * 1024 ** 2
+SHARD_MIN_MB = 512
+SHARDS_DIR = '.shards'
+
+# Esquema de cada tabla de salida: columnas en orden y su tipo (ver common/writers.py),
+# derivado del mapeo declarativo en mapeo_s1.py. Fijar las columnas permite escribir
+# por lotes (modo streaming) sin que cambie el encabezado entre un lote y otro; los
+# tipos se usan en la salida Parquet.
+S1_MAPPER = Mapping(S1_MAPPING)
+S1_SCHEMAS = S1_MAPPER.schemas
+S1_COLUMNS = S1_MAPPER.columns
 
 class S1Extractor:
     """
     Clase para procesar y extraer datos de archivos JSON del Sistema 1 (Declaraciones).
-    Genera archivos CSV estandarizados organizados por carpetas.
+    Genera archivos CSV (o Parquet tipado con output_format='parquet')
+    estandarizados organizados por carpetas.
+
+    Lee .json, .json.gz o .json.zst directamente (sin descomprimir a disco).
+    Las filas de cada tabla se guardan por columnas y se escriben cada
+    ROW_GROUP_SIZE filas, sin armar la tabla completa en memoria. Con stream=True
+    además el archivo se lee declaración por declaración en lotes de `batch_size`:
+    la memoria pico depende del tamaño del lote y no del tamaño del archivo.
+
+    Con shard_workers > 1 un .json sin comprimir se divide en rangos de bytes que
+    empiezan en una declaración (common/json_stream.py:split_json_array); cada
+    rango se extrae en un proceso a su propio directorio y las tablas se juntan
+    en el orden del archivo, así la salida es la misma que la del modo serial.
+
+    `decoder` elige cómo se decodifica el JSON (common/decoders.py): con
+    'msgspec' solo se materializan los campos que usan las 13 tablas, con
+    'orjson' todo pero más rápido, con 'json' la biblioteca estándar; 'auto' usa
+    el más rápido instalado. Las tablas son las mismas con cualquiera. En modo
+    streaming los backends distintos de json leen los .json sin comprimir por
+    rangos de bytes de ~batch_size declaraciones (según el tamaño promedio de
+    las primeras), así la memoria sigue dependiendo del lote; los comprimidos se
+    leen con json.
+
+    La carga, cada process_*, la extracción completa y la escritura de cada
+    tabla quedan en la bitácora de ejecución (common/instrumentation.py).
     """
     
-    def __init__(self, file_path, output_dir, state_name):
+    def __init__(self, file_path, output_dir, state_name, stream=False, batch_size=BATCH_SIZE,
+                 output_format='csv', shard_workers=1, decoder='json'):
         self.file_path = file_path
         self.output_dir = os.path.join(output_dir, state_name)
         self.state_name = state_name
+        self.stream = stream
+        self.batch_size = batch_size
+        self.output_format = output_format
+        self.shard_workers = shard_workers
+        self.decoder = RecordDecoder(decoder, S1_MAPPER)
         self.data = []
         
-        # DataFrames
+        # DataFrames (process_*) y buffers por tabla (extract_all)
         self.dfs = {}
+        self.buffers = None
+        # Conteos para el reporte de ejecución
+        self.stats = {'records': 0, 'rows': {}}
 
         # Crear directorio específico para el estado
         if not os.path.exists(self.output_dir):
@@ -25,505 +106,355 @@ class S1Extractor:
     def load_data(self):
         print(f"[{self.state_name}] Cargando {os.path.basename(self.file_path)}...")
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                self.data = json.load(f)
+            with stage('load_data', state=self.state_name, file=os.path.basename(self.file_path),
+                       decoder=self.decoder.name) as s:
+                if self.decoder.name == 'json':
+                    with open_source(self.file_path) as f:
+                        self.data = json.load(f)
+                else:
+                    with open_binary(self.file_path) as f:
+                        self.data = self.decoder.decode(f.read())
+                s.rows_out = len(self.data)
             print(f"[{self.state_name}] ✅ Datos cargados: {len(self.data)} registros.")
             return True
         except Exception as e:
             print(f"[{self.state_name}] ❌ Error cargando archivo: {e}")
             return False
 
-    def get_list(self, obj, keys_candidates):
-        """Helper to find a list inside a dictionary trying multiple keys"""
-        if isinstance(obj, list):
-            return obj
-        if isinstance(obj, dict):
-            for k in keys_candidates:
-                if k in obj and isinstance(obj[k], list):
-                    return obj[k]
-            # Fallback: search for any list
-            for v in obj.values():
-                if isinstance(v, list):
-                    return v
-        return []
-
-    def get_val(self, obj, key, default=None):
-        """Helper to safely get value from nested dict structure like {key: {valor: X}} or {key: X}"""
-        if not isinstance(obj, dict): return default
-        val_obj = obj.get(key)
-        if isinstance(val_obj, dict):
-            return val_obj.get('valor', default)
-        return val_obj if val_obj is not None else default
+    def process_tables(self, tables=None):
+        """
+        Llena self.dfs con las tablas indicadas (default: las 13) en un solo
+        recorrido de self.data, usando el mapeo compilado de mapeo_s1.py.
+        """
+        tables = list(tables or S1_SCHEMAS)
+        with stage('process_tables', state=self.state_name, tables=tables) as s:
+            for name, rows in S1_MAPPER.extract(self.data, self.state_name, tables).items():
+                self.dfs[name] = pd.DataFrame(rows, columns=S1_COLUMNS[name])
+            s.rows_in = len(self.data)
+            s.rows_out = sum(len(self.dfs[name]) for name in tables)
 
     def process_general(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            
-            d = entry.get('declaracion', {})
-            if not isinstance(d, dict): d = {}
-            
-            m = entry.get('metadata', {})
-            if not isinstance(m, dict): m = {}
-            
-            pat = d.get('situacionPatrimonial', {})
-            if not isinstance(pat, dict): pat = {}
-            
-            generales = pat.get('datosGenerales', {})
-            if not isinstance(generales, dict): generales = {}
-            
-            empleo = pat.get('datosEmpleoCargoComision', {})
-            
-            if isinstance(empleo, list) and len(empleo) > 0:
-                empleo = empleo[0]
-            if not isinstance(empleo, dict): empleo = {}
-            
-            correo_obj = generales.get('correoElectronico', {})
-            if not isinstance(correo_obj, dict): correo_obj = {}
-            
-            row = {
-                'id': entry.get('id'),
-                'fecha_actualizacion': m.get('actualizacion'),
-                'institucion': m.get('institucion'),
-                'tipo_declaracion': m.get('tipo'),
-                'nombre': generales.get('nombre'),
-                'primer_apellido': generales.get('primerApellido'),
-                'segundo_apellido': generales.get('segundoApellido'),
-                'correo': correo_obj.get('institucional') if correo_obj else generales.get('correoElectronico'),
-                'empleo_nombre_ente': empleo.get('nombreEntePublico'),
-                'empleo_cargo': empleo.get('empleoCargoComision'),
-                'empleo_nivel': empleo.get('nivelEmpleoCargoComision'),
-                'state': self.state_name
-            }
-            rows.append(row)
-        self.dfs['s1_resumen'] = pd.DataFrame(rows)
+        self.process_tables(['s1_resumen'])
 
     def process_experiencia_laboral(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            parent_id = entry.get('id')
-            
-            d = entry.get('declaracion', {})
-            pat = d.get('situacionPatrimonial', {}) if isinstance(d, dict) else {}
-            exp_obj = pat.get('experienciaLaboral', {}) if isinstance(pat, dict) else {}
-            
-            items = self.get_list(exp_obj, ['experiencia'])
-            
-            for item in items:
-                if not isinstance(item, dict): continue
-                
-                row = {
-                    'id_declaracion': parent_id,
-                    'state': self.state_name,
-                    'ambito_sector': self.get_val(item, 'ambitoSector'),
-                    'nivel_gobierno': self.get_val(item, 'nivelOrdenGobierno'),
-                    'ambito_publico': self.get_val(item, 'ambitoPublico'),
-                    'nombre_ente': item.get('nombreEntePublico'),
-                    'area_adscripcion': item.get('areaAdscripcion'),
-                    'empleo_cargo': item.get('empleoCargoComision'),
-                    'fecha_ingreso': item.get('fechaIngreso'),
-                    'fecha_egreso': item.get('fechaEgreso'),
-                    'ubicacion': self.get_val(item, 'ubicacion')
-                }
-                rows.append(row)
-        self.dfs['s1_experiencia_laboral'] = pd.DataFrame(rows)
+        self.process_tables(['s1_experiencia_laboral'])
 
     def process_datos_pareja(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            parent_id = entry.get('id')
-            
-            d = entry.get('declaracion', {})
-            pat = d.get('situacionPatrimonial', {}) if isinstance(d, dict) else {}
-            pareja = pat.get('datosPareja', {}) if isinstance(pat, dict) else {}
-            
-            if not isinstance(pareja, dict): continue
-            
-            # Some schemas might have 'datosPareja' as a list or containing a list, handle if needed
-            # But standard is a dict with direct fields or nested dicts
-            
-            if not pareja.get('ninguno') and pareja: 
-                row = {
-                    'id_declaracion': parent_id,
-                    'state': self.state_name,
-                    'nombre': pareja.get('nombre'),
-                    'primer_apellido': pareja.get('primerApellido'),
-                    'segundo_apellido': pareja.get('segundoApellido'),
-                    'relacion': self.get_val(pareja, 'relacionConDeclarante'),
-                    'ciudadano_extranjero': pareja.get('ciudadanoExtranjero'),
-                    'curp': pareja.get('curp'), # Often masked
-                    'habita_domicilio': pareja.get('habitaDomicilioDeclarante'),
-                    'actividad_laboral': self.get_val(pareja, 'actividadLaboralSectorPublico')
-                }
-                rows.append(row)
-        self.dfs['s1_datos_pareja'] = pd.DataFrame(rows)
+        self.process_tables(['s1_datos_pareja'])
 
     def process_datos_dependientes(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            parent_id = entry.get('id')
-            
-            d = entry.get('declaracion', {})
-            pat = d.get('situacionPatrimonial', {}) if isinstance(d, dict) else {}
-            dep_obj = pat.get('datosDependientesEconomicos', {}) if isinstance(pat, dict) else {}
-            
-            items = self.get_list(dep_obj, ['dependienteEconomico', 'dependientes'])
-            
-            for item in items:
-                if not isinstance(item, dict): continue
-                row = {
-                    'id_declaracion': parent_id,
-                    'state': self.state_name,
-                    'nombre': item.get('nombre'),
-                    'primer_apellido': item.get('primerApellido'),
-                    'segundo_apellido': item.get('segundoApellido'),
-                    'parentesco': self.get_val(item, 'parentescoRelacion'),
-                    'ciudadano_extranjero': item.get('ciudadanoExtranjero'),
-                    'actividad_laboral': self.get_val(item, 'actividadLaboralSectorPublico')
-                }
-                rows.append(row)
-        self.dfs['s1_dependientes_economicos'] = pd.DataFrame(rows)
+        self.process_tables(['s1_dependientes_economicos'])
 
     def process_ingresos(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            
-            d = entry.get('declaracion', {})
-            if not isinstance(d, dict): d = {}
-            pat = d.get('situacionPatrimonial', {})
-            if not isinstance(pat, dict): pat = {}
-            ingresos = pat.get('ingresos', {})
-            if not isinstance(ingresos, dict): ingresos = {}
-            
-            row = {
-                'id': entry.get('id'),
-                'state': self.state_name,
-                'remuneracion_mensual_cargo': self.get_val(ingresos, 'remuneracionMensualCargoPublico'),
-                'otros_ingresos_mensuales': self.get_val(ingresos, 'otrosIngresosMensualesTotal'),
-                'ingreso_mensual_neto': self.get_val(ingresos, 'ingresoMensualNetoDeclarante'),
-                'ingreso_anual_neto': self.get_val(ingresos, 'ingresoAnualNetoDeclarante'),
-            }
-            rows.append(row)
-        self.dfs['s1_ingresos'] = pd.DataFrame(rows)
+        self.process_tables(['s1_ingresos'])
 
     def process_inmuebles(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            parent_id = entry.get('id')
-            
-            d = entry.get('declaracion', {})
-            if not isinstance(d, dict): d = {}
-            pat = d.get('situacionPatrimonial', {})
-            if not isinstance(pat, dict): pat = {}
-            bienes = pat.get('bienesInmuebles', {})
-            if not isinstance(bienes, dict): bienes = {}
-            
-            items = self.get_list(bienes, ['bienInmueble', 'bienesInmuebles'])
-            
-            for item in items:
-                if not isinstance(item, dict): continue
-                
-                titulares = item.get('titular', [])
-                if isinstance(titulares, list):
-                    titular_str = ", ".join([self.get_val(t, 'valor', '') for t in titulares if isinstance(t, dict)])
-                else:
-                    titular_str = str(titulares)
-                
-                row = {
-                    'id_declaracion': parent_id,
-                    'state': self.state_name,
-                    'tipo_inmueble': self.get_val(item, 'tipoInmueble'),
-                    'titular': titular_str,
-                    'valor_adquisicion': self.get_val(item, 'valorAdquisicion'),
-                    'moneda': item.get('valorAdquisicion', {}).get('moneda') if isinstance(item.get('valorAdquisicion'), dict) else None,
-                    'forma_adquisicion': self.get_val(item, 'formaAdquisicion'),
-                    'fecha_adquisicion': item.get('fechaAdquisicion')
-                }
-                rows.append(row)
-        self.dfs['s1_bienes_inmuebles'] = pd.DataFrame(rows)
+        self.process_tables(['s1_bienes_inmuebles'])
 
     def process_bienes_muebles(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            parent_id = entry.get('id')
-            
-            d = entry.get('declaracion', {})
-            if not isinstance(d, dict): d = {}
-            pat = d.get('situacionPatrimonial', {})
-            if not isinstance(pat, dict): pat = {}
-            bienes = pat.get('bienesMuebles', {})
-            if not isinstance(bienes, dict): bienes = {}
-            
-            items = self.get_list(bienes, ['bienMueble', 'bienesMuebles'])
-            
-            for item in items:
-                if not isinstance(item, dict): continue
-                
-                titulares = item.get('titular', [])
-                titular_str = ""
-                if isinstance(titulares, list):
-                    titular_str = ", ".join([self.get_val(t, 'valor', '') for t in titulares if isinstance(t, dict)])
-                
-                row = {
-                    'id_declaracion': parent_id,
-                    'state': self.state_name,
-                    'tipo_bien': self.get_val(item, 'tipoBien'),
-                    'descripcion': item.get('descripcionGeneralBien'),
-                    'titular': titular_str,
-                    'valor_adquisicion': self.get_val(item, 'valorAdquisicion'),
-                    'moneda': item.get('valorAdquisicion', {}).get('moneda') if isinstance(item.get('valorAdquisicion'), dict) else None,
-                    'forma_adquisicion': self.get_val(item, 'formaAdquisicion'),
-                    'fecha_adquisicion': item.get('fechaAdquisicion')
-                }
-                rows.append(row)
-        self.dfs['s1_bienes_muebles'] = pd.DataFrame(rows)
+        self.process_tables(['s1_bienes_muebles'])
 
     def process_vehiculos(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            parent_id = entry.get('id')
-            
-            d = entry.get('declaracion', {})
-            if not isinstance(d, dict): d = {}
-            pat = d.get('situacionPatrimonial', {})
-            if not isinstance(pat, dict): pat = {}
-            vehiculos_obj = pat.get('vehiculos', {})
-            if not isinstance(vehiculos_obj, dict): vehiculos_obj = {}
-            
-            items = self.get_list(vehiculos_obj, ['vehiculo', 'vehiculos'])
-            
-            for item in items:
-                if not isinstance(item, dict): continue
-                
-                row = {
-                    'id_declaracion': parent_id,
-                    'state': self.state_name,
-                    'tipo_vehiculo': self.get_val(item, 'tipoVehiculo'),
-                    'marca': item.get('marca'),
-                    'modelo': item.get('modelo'),
-                    'anio': item.get('anio'),
-                    'valor_adquisicion': self.get_val(item, 'valorAdquisicion'),
-                    'moneda': item.get('valorAdquisicion', {}).get('moneda') if isinstance(item.get('valorAdquisicion'), dict) else None,
-                    'fecha_adquisicion': item.get('fechaAdquisicion'),
-                    'forma_adquisicion': self.get_val(item, 'formaAdquisicion')
-                }
-                rows.append(row)
-        self.dfs['s1_vehiculos'] = pd.DataFrame(rows)
+        self.process_tables(['s1_vehiculos'])
 
     def process_inversiones(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            parent_id = entry.get('id')
-            
-            d = entry.get('declaracion', {})
-            if not isinstance(d, dict): d = {}
-            pat = d.get('situacionPatrimonial', {})
-            if not isinstance(pat, dict): pat = {}
-            inv_obj = pat.get('inversionesCuentasValores', {}) # Standard name variations
-            if not inv_obj: inv_obj = pat.get('inversiones', {})
-            if not isinstance(inv_obj, dict): inv_obj = {}
-            
-            items = self.get_list(inv_obj, ['inversion', 'inversiones'])
-            
-            for item in items:
-                if not isinstance(item, dict): continue
-                
-                row = {
-                    'id_declaracion': parent_id,
-                    'state': self.state_name,
-                    'tipo_inversion': self.get_val(item, 'tipoInversion'),
-                    'subtipo_inversion': self.get_val(item, 'subTipoInversion'),
-                    'institucion': item.get('institucionRazonSocial'), # older schemas
-                    'numero_cuenta': item.get('numeroCuentaContrato'),
-                    'saldo_situacion_actual': self.get_val(item, 'saldoSituacionActual'),
-                    'moneda': item.get('saldoSituacionActual', {}).get('moneda') if isinstance(item.get('saldoSituacionActual'), dict) else None,
-                }
-                # Newer schemas have nested localizacionInversion
-                loc = item.get('localizacionInversion', {})
-                if isinstance(loc, dict):
-                    row['pais'] = loc.get('pais')
-                    row['institucion'] = loc.get('institucionRazonSocial')
-                
-                rows.append(row)
-        self.dfs['s1_inversiones'] = pd.DataFrame(rows)
+        self.process_tables(['s1_inversiones'])
 
     def process_adeudos_pasivos(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            parent_id = entry.get('id')
-            
-            d = entry.get('declaracion', {})
-            if not isinstance(d, dict): d = {}
-            pat = d.get('situacionPatrimonial', {})
-            if not isinstance(pat, dict): pat = {}
-            adeudos_obj = pat.get('adeudosPasivos', {})
-            if not isinstance(adeudos_obj, dict): adeudos_obj = {}
-            
-            items = self.get_list(adeudos_obj, ['adeudo', 'adeudos'])
-            
-            for item in items:
-                if not isinstance(item, dict): continue
-                
-                row = {
-                    'id_declaracion': parent_id,
-                    'state': self.state_name,
-                    'tipo_adeudo': self.get_val(item, 'tipoAdeudo'),
-                    'monto_original': self.get_val(item, 'montoOriginal'),
-                    'saldo_pendiente': self.get_val(item, 'saldoInsolutoSituacionActual'),
-                    'moneda': item.get('saldoInsolutoSituacionActual', {}).get('moneda') if isinstance(item.get('saldoInsolutoSituacionActual'), dict) else None,
-                    'fecha_adquisicion': item.get('fechaAdquisicion'),
-                    'institucion': item.get('institucionRazonSocial') # older schemas or direct
-                }
-                # Check for otorgaCredito nested object
-                otorgante = item.get('otorganteCredito', {})
-                if isinstance(otorgante, dict):
-                    row['otorgante'] = otorgante.get('nombreInstitucion') or otorgante.get('nombreRazonSocial')
-                    
-                rows.append(row)
-        self.dfs['s1_adeudos_pasivos'] = pd.DataFrame(rows)
-        
+        self.process_tables(['s1_adeudos_pasivos'])
+
     def process_prestamo_comodato(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            parent_id = entry.get('id')
-            
-            d = entry.get('declaracion', {})
-            if not isinstance(d, dict): d = {}
-            pat = d.get('situacionPatrimonial', {})
-            if not isinstance(pat, dict): pat = {}
-            prestamo_obj = pat.get('prestamoOComodato', {})
-            if not isinstance(prestamo_obj, dict): prestamo_obj = {}
-            
-            items = self.get_list(prestamo_obj, ['prestamo'])
-            
-            for item in items:
-                if not isinstance(item, dict): continue
-                
-                row = {
-                    'id_declaracion': parent_id,
-                    'state': self.state_name,
-                    'tipo_bien': self.get_val(item, 'tipoBien'),
-                    'marca': item.get('marca'),
-                    'modelo': item.get('modelo'),
-                    'anio': item.get('anio'),
-                    'registro': item.get('numeroSerieRegistro'),
-                    'relacion_dueno': self.get_val(item, 'relacionConDuenio')
-                }
-                
-                dueno = item.get('duenioTitular', {})
-                if isinstance(dueno, dict):
-                     row['dueno'] = dueno.get('nombreRazonSocial') or dueno.get('nombre')
-                
-                rows.append(row)
-        self.dfs['s1_prestamo_comodato'] = pd.DataFrame(rows)
+        self.process_tables(['s1_prestamo_comodato'])
 
     def process_interes_apoyos(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            parent_id = entry.get('id')
-            
-            d = entry.get('declaracion', {})
-            if not isinstance(d, dict): d = {}
-            interes = d.get('interes', {})
-            if not isinstance(interes, dict): interes = {}
-            
-            apoyos_obj = interes.get('apoyos', {})
-            if not isinstance(apoyos_obj, dict): apoyos_obj = {}
-            
-            items = self.get_list(apoyos_obj, ['apoyo', 'apoyos'])
-            
-            for item in items:
-                if not isinstance(item, dict): continue
-                
-                row = {
-                    'id_declaracion': parent_id,
-                    'state': self.state_name,
-                    'beneficiario': self.get_val(item, 'beneficiarioPrograma'),
-                    'nombre_programa': item.get('nombrePrograma'),
-                    'institucion_otorgante': item.get('institucionOtorgante'),
-                    'nivel_gobierno': item.get('nivelOrdenGobierno'),
-                    'tipo_apoyo': self.get_val(item, 'tipoApoyo'),
-                    'forma_recepcion': item.get('formaRecepcion'),
-                    'monto_apoyo': self.get_val(item, 'montoApoyoMensual'),
-                    'moneda': item.get('montoApoyoMensual', {}).get('moneda') if isinstance(item.get('montoApoyoMensual'), dict) else None
-                }
-                rows.append(row)
-        self.dfs['interes_apoyos'] = pd.DataFrame(rows)
+        self.process_tables(['interes_apoyos'])
 
     def process_interes_participacion(self):
-        rows = []
-        for entry in self.data:
-            if not isinstance(entry, dict): continue
-            
-            parent_id = entry.get('id')
-            d = entry.get('declaracion', {})
-            if not isinstance(d, dict): d = {}
-            interes = d.get('interes', {})
-            if not isinstance(interes, dict): interes = {}
-            
-            participacion_obj = interes.get('participacion', {})
-            if not isinstance(participacion_obj, dict): participacion_obj = {}
-            
-            items = self.get_list(participacion_obj, ['participacion', 'participaciones'])
-            
-            for item in items:
-                if not isinstance(item, dict): continue
-                
-                row = {
-                    'id_declaracion': parent_id,
-                    'state': self.state_name,
-                    'nombre_empresa': item.get('nombreEmpresaSociedadAsociacion'),
-                    'tipo_participacion': self.get_val(item, 'tipoParticipacion'),
-                    'porcentaje': item.get('porcentajeParticipacion'),
-                    'sector': self.get_val(item, 'sector'),
-                    'recibe_remuneracion': item.get('recibeRemuneracion')
-                }
-                rows.append(row)
-        self.dfs['interes_participacion'] = pd.DataFrame(rows)
+        self.process_tables(['interes_participacion'])
+
+    def iter_data_batches(self):
+        """Lee el arreglo de declaraciones de forma incremental, en lotes."""
+        if self.decoder.name != 'json' and not is_compressed(self.file_path):
+            # Rangos de ~batch_size declaraciones; no menos de CHUNK_SIZE para
+            # que buscar los cortes no cueste más que leerlos
+            range_bytes = max(CHUNK_SIZE, int(self.batch_size * mean_record_bytes(self.file_path)))
+            for records in iter_json_ranges(self.file_path, range_bytes, self.decoder.decode):
+                yield from iter_batches(records, self.batch_size)
+            return
+        with open_source(self.file_path) as f:
+            yield from iter_batches(iter_json_array(f), self.batch_size)
+
+    def process_single_pass(self):
+        """Recorre cada declaración una sola vez y llena las 13 tablas en el mismo paso."""
+        self.process_tables()
+
+    def process_records(self, records):
+        """
+        Extrae un bloque de declaraciones de `batch_size` en `batch_size` y pasa
+        las filas a los buffers por tabla, que las escriben cada ROW_GROUP_SIZE filas.
+        La columna posicion sigue la posición de la declaración en el archivo (o
+        en el rango, en modo por rangos).
+        """
+        state = self.state_name
+        first = self.stats['records']
+        for start in range(0, len(records), self.batch_size):
+            chunk = records[start:start + self.batch_size]
+            for name, rows in S1_MAPPER.extract(chunk, state, start=first + start).items():
+                self.buffers.extend(name, rows)
+        self.stats['records'] += len(records)
+
+    def open_buffers(self):
+        self.buffers = TableBuffers(make_writer(self.output_format, self.output_dir, S1_SCHEMAS), S1_SCHEMAS)
+
+    def close_buffers(self):
+        if self.buffers is not None:
+            self.stats['rows'] = dict(self.buffers.rows)
+            self.buffers.close()
+            self.record_writes(self.buffers.writer, self.stats['rows'])
+            self.buffers = None
+
+    def record_writes(self, writer, rows):
+        for name, stats in write_stats(writer).items():
+            record('write_table', state=self.state_name, table=name, format=self.output_format,
+                   rows_out=rows.get(name), **stats)
 
     def extract_all(self):
-        if self.load_data():
-            self.process_general()
-            self.process_experiencia_laboral()
-            self.process_datos_pareja()
-            self.process_datos_dependientes()
-            self.process_ingresos()
-            self.process_inmuebles()
-            self.process_bienes_muebles()
-            self.process_vehiculos()
-            self.process_inversiones()
-            self.process_adeudos_pasivos()
-            self.process_prestamo_comodato()
-            self.process_interes_apoyos()
-            self.process_interes_participacion()
-            self.save_to_csv()
-
-    def save_to_csv(self):
-        for name, df in self.dfs.items():
-            if not df.empty:
-                filename = f"{name}.csv"
-                path = os.path.join(self.output_dir, filename)
-                df.to_csv(path, index=False, encoding='utf-8')
-        print(f"[{self.state_name}] ✅ Archivos CSV generados en {self.output_dir}")
+        """Extrae y guarda todas las tablas. Devuelve True si el estado terminó sin errores."""
+        with stage('extract_all', state=self.state_name, stream=self.stream, format=self.output_format,
+                   shard_workers=self.shard_workers, decoder=self.decoder.name) as s:
+            if self.shard_workers > 1:
+                ok = self.extract_sharded()
+            else:
+                ok = self.extract_streaming() if self.stream else self.extract_loaded()
+            s.status = 'ok' if ok else 'error'
+            s.rows_in = self.stats['records']
+            s.rows_out = sum(self.stats['rows'].values())
+            s.bytes_written = path_bytes(self.output_dir)
+        return ok
+
+    def extract_loaded(self):
+        if not self.load_data():
+            return False
+        self.open_buffers()
+        try:
+            self.process_records(self.data)
+        finally:
+            self.data = []
+            self.close_buffers()
+        print(f"[{self.state_name}] ✅ Archivos {self.output_format.upper()} generados en {self.output_dir}")
+        return True
+
+    def extract_streaming(self):
+        print(f"[{self.state_name}] Leyendo {os.path.basename(self.file_path)} en modo streaming (lotes de {self.batch_size})...")
+        self.open_buffers()
+        try:
+            for batch in self.iter_data_batches():
+                self.process_records(batch)
+        except Exception as e:
+            print(f"[{self.state_name}] ❌ Error leyendo archivo tras {self.stats['records']} registros: {e}")
+            return False
+        finally:
+            self.close_buffers()
+        print(f"[{self.state_name}] ✅ Datos procesados: {self.stats['records']} registros.")
+        print(f"[{self.state_name}] ✅ Archivos {self.output_format.upper()} generados en {self.output_dir}")
+        return True
+
+    def extract_sharded(self):
+        """
+        Extrae los rangos del archivo en un pool de shard_workers procesos y junta
+        sus tablas en orden. Si el archivo no se puede dividir o un rango no es una
+        secuencia completa de declaraciones, se extrae en modo streaming.
+        """
+        if is_compressed(self.file_path):
+            print(f"[{self.state_name}] ⚠️ Un archivo comprimido no se puede dividir; se lee en modo streaming.")
+            return self.extract_streaming()
+        parts = max(self.shard_workers, -(-os.path.getsize(self.file_path) // SHARD_BYTES))
+        shards = split_json_array(self.file_path, parts)
+        if len(shards) < 2:
+            return self.extract_streaming()
+
+        shards_root = os.path.join(self.output_dir, SHARDS_DIR)
+        tasks = [{'file_path': self.file_path, 'state_name': self.state_name, 'index': i, 'start': start,
+                  'end': end, 'output_dir': os.path.join(shards_root, f"{i:05d}"),
+                  'batch_size': self.batch_size, 'output_format': self.output_format,
+                  'decoder': self.decoder.name}
+                 for i, (start, end) in enumerate(shards)]
+        print(f"[{self.state_name}] Extrayendo {len(shards)} rangos con {self.shard_workers} procesos...")
+        try:
+            # spawn: los procesos no heredan hilos ni buffers del proceso que los lanza
+            with ProcessPoolExecutor(max_workers=self.shard_workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                # map conserva el orden de los rangos aunque terminen en otro orden
+                results = list(pool.map(extract_shard, tasks))
+            with stage('merge_shards', state=self.state_name, shards=len(shards)) as s:
+                # cada rango numeró sus declaraciones desde 0
+                offsets = list(itertools.accumulate([r['records'] for r in results[:-1]], initial=0))
+                writer = merge_outputs(self.output_format, [r['output_dir'] for r in results],
+                                       self.output_dir, S1_SCHEMAS, offsets, POSICION[0])
+                s.bytes_written = path_bytes(self.output_dir) - path_bytes(shards_root)
+        except ValueError as e:
+            print(f"[{self.state_name}] ⚠️ {e}; se extrae en modo streaming.")
+            shutil.rmtree(shards_root, ignore_errors=True)
+            for name in S1_SCHEMAS:
+                path = os.path.join(self.output_dir, f"{name}.{self.output_format}")
+                if os.path.exists(path):
+                    os.remove(path)
+            return self.extract_streaming()
+        except Exception as e:
+            print(f"[{self.state_name}] ❌ Error en la extracción por rangos: {e}")
+            return False
+        finally:
+            shutil.rmtree(shards_root, ignore_errors=True)
+
+        self.stats['records'] = sum(r['records'] for r in results)
+        self.stats['rows'] = {name: sum(r['rows'].get(name, 0) for r in results) for name in S1_SCHEMAS}
+        self.record_writes(writer, self.stats['rows'])
+        print(f"[{self.state_name}] ✅ Datos procesados: {self.stats['records']} registros en {len(shards)} rangos.")
+        print(f"[{self.state_name}] ✅ Archivos {self.output_format.upper()} generados en {self.output_dir}")
+        return True
+
+    def save_outputs(self):
+        """Escribe las tablas en self.dfs (p.ej. después de llamar a process_*) con el formato elegido."""
+        writer = make_writer(self.output_format, self.output_dir, S1_SCHEMAS)
+        with stage('save_outputs', state=self.state_name, format=self.output_format) as s:
+            try:
+                for name, df in self.dfs.items():
+                    writer.write(name, df)
+            finally:
+                writer.close()
+            s.rows_out = sum(len(df) for df in self.dfs.values())
+            s.bytes_written = path_bytes(self.output_dir)
+        self.record_writes(writer, {name: len(df) for name, df in self.dfs.items()})
+        print(f"[{self.state_name}] ✅ Archivos {self.output_format.upper()} generados en {self.output_dir}")
+
+def extract_shard(shard):
+    """Tarea del pool de rangos: extrae las declaraciones de un rango de bytes a su directorio."""
+    extractor = S1Extractor(shard['file_path'], shard['output_dir'], shard['state_name'],
+                            batch_size=shard['batch_size'], output_format=shard['output_format'],
+                            decoder=shard['decoder'])
+    with stage('extract_shard', state=shard['state_name'], shard=shard['index'],
+               start=shard['start'], end=shard['end']) as s:
+        records = read_json_shard(shard['file_path'], shard['start'], shard['end'], extractor.decoder.decode)
+        extractor.open_buffers()
+        try:
+            extractor.process_records(records)
+        finally:
+            del records
+            extractor.close_buffers()
+        s.rows_in = extractor.stats['records']
+        s.rows_out = sum(extractor.stats['rows'].values())
+    return {'output_dir': extractor.output_dir, 'records': extractor.stats['records'],
+            'rows': extractor.stats['rows']}
+
+
+def shard_workers_for(file_path, shard_workers, min_mb=SHARD_MIN_MB):
+    """Procesos por rango para un archivo: solo los .json sin comprimir de min_mb o más se dividen."""
+    if shard_workers <= 1 or is_compressed(file_path) or os.path.getsize(file_path) < min_mb * 1024 ** 2:
+        return 1
+    return shard_workers
+
+
+def find_input_file(state_path):
+    """
+    Devuelve el JSON a procesar de un estado: completo.json, completo.json.gz,
+    completo.json.zst o, si no existe ninguno, el primer .json(.gz/.zst).
+    """
+    for extension in SOURCE_EXTENSIONS:
+        target_path = os.path.join(state_path, 'completo' + extension)
+        if os.path.exists(target_path):
+            return target_path
+    candidates = sorted(f for f in os.listdir(state_path) if f.endswith(SOURCE_EXTENSIONS))
+    return os.path.join(state_path, candidates[0]) if candidates else None
+
+
+def estimate_memory(file_path, stream=False, batch_size=BATCH_SIZE, shard_workers=1, decoder='json'):
+    """
+    Estimación gruesa de la RSS que necesita un estado. Con json.load los objetos
+    de Python más los DataFrames ocupan ~5 veces el tamaño del JSON (un .gz se
+    expande ~8 veces y un .zst ~10); en modo streaming depende solo del lote (con
+    msgspec/orjson se suma el texto del rango, leído completo y copiado una vez
+    antes de decodificarlo) y por rangos, de cuántos rangos se cargan a la vez.
+    """
+    if shard_workers > 1:
+        return shard_workers * (STREAM_BASE_MEMORY + SHARD_BYTES * JSON_LOAD_EXPANSION)
+    if stream:
+        memory = STREAM_BASE_MEMORY + batch_size * STREAM_MEMORY_PER_RECORD
+        if decoder != 'json' and not is_compressed(file_path):
+            memory += 2 * batch_size * STREAM_MEMORY_PER_RECORD // JSON_LOAD_EXPANSION
+        return memory
+    size = os.path.getsize(file_path)
+    if file_path.endswith('.gz'):
+        size *= GZIP_EXPANSION
+    elif file_path.endswith('.zst'):
+        size *= ZSTD_EXPANSION
+    return size * JSON_LOAD_EXPANSION
+
+
+def process_state(task):
+    """
+    Tarea del pool: extrae un estado a un directorio temporal y, si termina bien,
+    lo publica en lugar de la salida anterior. Devuelve su reporte.
+    """
+    staging_root = os.path.join(task['output_dir'], STAGING_DIR)
+    staging_dir = os.path.join(staging_root, task['name'])
+    final_dir = os.path.join(task['output_dir'], task['name'])
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    fingerprint = file_fingerprint(task['file_path'], task.get('sha256'))
+    extractor = S1Extractor(task['file_path'], staging_root, task['name'],
+                            stream=task['stream'], batch_size=task['batch_size'],
+                            output_format=task['output_format'], shard_workers=task.get('shard_workers', 1),
+                            decoder=task.get('decoder', 'json'))
+    ok = extractor.extract_all()
+    report = {
+        'status': 'ok' if ok else 'error',
+        'file_path': task['file_path'],
+        'records': extractor.stats['records'],
+        'rows': extractor.stats['rows'],
+    }
+    if not ok:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        return report
+
+    outputs = sorted(os.listdir(staging_dir))
+    publish_dir(staging_dir, final_dir)
+    report.update({'fingerprint': fingerprint, 'outputs': outputs})
+    return report
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrae las declaraciones del S1 a CSV por estado.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Leer cada archivo de forma incremental en lugar de json.load")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"Declaraciones por lote en modo streaming (default: {BATCH_SIZE})")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                        help="Formato de las tablas de salida (default: csv)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Número de estados a procesar en paralelo (default: 1)")
+    parser.add_argument('--max-memory-gb', type=float, default=None,
+                        help="Tope de memoria estimada en uso simultáneo (default: 75%% de la RAM)")
+    parser.add_argument('--shard-workers', type=int, default=1,
+                        help="Procesos por estado para extraer por rangos de bytes los .json sin comprimir "
+                             "de --shard-min-mb o más (default: 1, sin dividir)")
+    parser.add_argument('--shard-min-mb', type=int, default=SHARD_MIN_MB,
+                        help=f"Tamaño mínimo para dividir un archivo (default: {SHARD_MIN_MB})")
+    parser.add_argument('--decoder', choices=DECODERS, default='auto',
+                        help="Decodificador JSON: msgspec (solo los campos usados), orjson o json "
+                             "(default: auto, el más rápido instalado)")
+    parser.add_argument('--force', nargs='*', default=None, metavar='ESTADO',
+                        help="Reprocesar aunque el manifiesto diga que está al día "
+                             "(sin argumentos: todos los estados)")
+    parser.add_argument('--input-dir', default=None, help="Carpeta con un subdirectorio por estado")
+    parser.add_argument('--output-dir', default=None, help="Carpeta de salida de las tablas")
+    args = parser.parse_args()
+
     # Configuración de directorios relativos
     CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
     # Assuming src/ is inside system_1/
     # PDN_S1 is at ../../PDN_S1 relative to src/extraction/
-    BASE_DIR = os.path.join(CURRENT_DIR, '../../PDN_S1/states')
-    OUTPUT_DIR = os.path.join(CURRENT_DIR, '../../csv_outputs')
+    BASE_DIR = args.input_dir or os.path.join(CURRENT_DIR, '../../PDN_S1/states')
+    OUTPUT_DIR = args.output_dir or os.path.join(CURRENT_DIR, '../../csv_outputs')
     
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
@@ -536,32 +467,61 @@ if __name__ == "__main__":
     states = [d for d in os.listdir(BASE_DIR) if os.path.isdir(os.path.join(BASE_DIR, d))]
     
     print(f"--- Iniciando Procesamiento Masivo de {len(states)} Estados ---")
+    decoder = resolve_decoder(args.decoder)
+    print(f"Decodificador JSON: {decoder}")
     
+    run_log = configure_run_log(os.path.join(OUTPUT_DIR, 'run_log.jsonl'))
+    print(f"Bitácora de ejecución: {run_log}")
+    manifest = Manifest(OUTPUT_DIR)
+    tasks = []
     for state in states:
         state_path = os.path.join(BASE_DIR, state)
         
-        # Intentar cargar completo.json por defecto
-        target_filename = 'completo.json'
-        target_path = os.path.join(state_path, target_filename)
-        
-        # Si no existe, buscar el primer .json disponible
-        if not os.path.exists(target_path):
-            try:
-                candidates = [f for f in os.listdir(state_path) if f.endswith('.json')]
-                if not candidates:
-                    print(f"[{state}] No se encontraron archivos .json")
-                    continue
-                target_path = os.path.join(state_path, candidates[0])
-            except OSError:
-                print(f"[{state}] Error accediendo al directorio")
-                continue
+        try:
+            target_path = find_input_file(state_path)
+        except OSError:
+            print(f"[{state}] Error accediendo al directorio")
+            continue
+        if not target_path:
+            print(f"[{state}] No se encontraron archivos .json")
+            continue
         
-        # Force reprocessing for Guerrero
-        if state != 'Guerrero' and os.path.exists(os.path.join(OUTPUT_DIR, state, 's1_resumen.csv')):
-             print(f"[{state}] ⏭️  Ya procesado. Saltando...")
-             continue
-            
-        extractor = S1Extractor(target_path, OUTPUT_DIR, state)
-        extractor.extract_all()
+        forced = args.force is not None and (not args.force or state in args.force)
+        reason, sha256 = manifest.check(state, target_path, EXTRACTOR_VERSION, args.format)
+        if forced:
+            reason = 'forzado'
+        if reason is None:
+            print(f"[{state}] ⏭️  Sin cambios desde la última extracción. Saltando...")
+            continue
+        print(f"[{state}] Pendiente: {reason}")
+        shard_workers = shard_workers_for(target_path, args.shard_workers, args.shard_min_mb)
+            
+        tasks.append({
+            'name': state,
+            'file_path': target_path,
+            'output_dir': OUTPUT_DIR,
+            'stream': args.stream,
+            'batch_size': args.batch_size,
+            'output_format': args.format,
+            'sha256': sha256,
+            'shard_workers': shard_workers,
+            'decoder': decoder,
+            'memory': estimate_memory(target_path, args.stream, args.batch_size, shard_workers, decoder),
+        })
+
+    def update_manifest(report):
+        if report['status'] == 'ok':
+            manifest.record(report['name'], report['fingerprint'], EXTRACTOR_VERSION, args.format,
+                            report['rows'], report['outputs'])
+            manifest.save()
+
+    budget = int(args.max_memory_gb * 1024 ** 3) if args.max_memory_gb else None
+    reports = run_and_report(tasks, process_state, workers=args.workers, memory_budget=budget,
+                             report_path=os.path.join(OUTPUT_DIR, 'reporte_extraccion.json'),
+                             on_report=update_manifest)
+    manifest.save()
+    shutil.rmtree(os.path.join(OUTPUT_DIR, STAGING_DIR), ignore_errors=True)
         
     print("\n--- Procesamiento Completado ---")
+    if any(r['status'] != 'ok' for r in reports):
+        sys.exit(1)
@@ -1,4 +1,10 @@
 
+"""
+Descomprime completo.json.gz a completo.json en cada estado.
+
+Ya no es un paso obligatorio: procesar_masivo_s1.py lee .json.gz y .json.zst
+directamente. Solo hace falta si otra herramienta necesita el JSON plano.
+"""
 import os
 import gzip
 import shutil
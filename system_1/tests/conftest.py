@@ -0,0 +1,11 @@
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(TESTS_DIR, '../..'))
+
+# Los scripts de system_1/src se importan por nombre, como cuando se ejecutan directo
+for path in (REPO_ROOT, *(os.path.join(TESTS_DIR, '../src', d) for d in ('analysis', 'cleaning', 'extraction'))):
+    path = os.path.abspath(path)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,136 @@
+import json
+
+import pytest
+
+import procesar_masivo_s1
+from common import decoders, json_stream
+from common.decoders import RecordDecoder, has_wide_int
+from common.mapping import Mapping
+from procesar_masivo_s1 import S1Extractor, S1_MAPPER
+
+
+def declaracion(id, **secciones):
+    datos = {
+        'datosGenerales': {'nombre': 'Ana', 'primerApellido': 'Pérez', 'rfc': {'rfc': 'PEAA800101', 'homoClave': 'X1'},
+                           'correoElectronico': {'institucional': 'ana@sfp.gob.mx'}},
+        'datosEmpleoCargoComision': [{'nombreEntePublico': 'SFP', 'empleoCargoComision': 'Analista'}],
+        'ingresos': {'ingresoAnualNetoDeclarante': {'valor': 120000.5, 'moneda': 'MXN'}},
+        'vehiculos': {'vehiculo': [{'marca': 'Nissan', 'anio': 2015, 'valorAdquisicion': {'valor': 1e5}}]},
+    }
+    datos.update(secciones)
+    return {'id': id, 'metadata': {'actualizacion': '2023-05-01T00:00:00Z', 'tipo': 'INICIAL'},
+            'declaracion': {'situacionPatrimonial': datos}}
+
+
+def payload(records, replace=()):
+    """Arreglo JSON como bytes; `replace` inyecta texto que json.dumps no genera."""
+    text = json.dumps(records, ensure_ascii=False)
+    for old, new in replace:
+        assert old in text
+        text = text.replace(old, new)
+    return text.encode('utf-8')
+
+
+BASE = [declaracion('a'), 'no es un dict', declaracion('b')]
+
+CASES = {
+    'regular': payload(BASE),
+    # rfc y correo como texto en lugar de objeto; empleo como objeto en lugar de lista
+    'formas_alternas': payload([
+        declaracion('a', datosGenerales={'nombre': 'Ana', 'rfc': 'PEAA800101X1', 'correoElectronico': 'ana@x.mx'}),
+        declaracion('b', datosEmpleoCargoComision={'nombreEntePublico': 'SAT', 'empleoCargoComision': 'Jefe'}),
+        declaracion('c', vehiculos={'vehiculos': {'marca': 'Ford'}}, ingresos=[1, 2]),
+    ]),
+    'nan': payload(BASE, [('120000.5', 'NaN'), ('100000.0', '-Infinity')]),
+    'surrogate_suelto': payload(BASE, [('"Ana"', '"An\\ud800a"')]),
+    'entero_grande': payload(BASE, [('2015', str(2 ** 70))]),
+    'entero_negativo_grande': payload(BASE, [('2015', str(-2 ** 63 - 1))]),
+    'entero_64_bits': payload(BASE, [('2015', str(2 ** 64 - 1))]),
+    # Dígitos largos dentro de texto no deben cambiar nada
+    'digitos_en_texto': payload(BASE, [('PEAA800101', '123456789012345678901234')]),
+}
+
+
+def tables(decoder, data):
+    return S1_MAPPER.extract(decoder.decode(data), 'Prueba')
+
+
+@pytest.fixture(params=['json', 'msgspec', 'orjson'])
+def decoder(request):
+    if request.param != 'json':
+        pytest.importorskip(request.param)
+    return RecordDecoder(request.param, S1_MAPPER)
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_backends_produce_the_same_tables(decoder, case):
+    expected = tables(RecordDecoder('json', S1_MAPPER), CASES[case])
+    actual = tables(decoder, CASES[case])
+    assert sum(len(rows) for rows in expected.values()) > 0
+    # repr distingue 2**70 de 1.18e21 y NaN de None
+    assert {name: repr(rows) for name, rows in actual.items()} == {name: repr(rows) for name, rows in expected.items()}
+
+
+# Formas de mapeo que las 13 tablas del S1 no cubren
+SPECS = {
+    # Las alternativas de 'path' solo alimentan columnas del registro completo
+    'path_solo_entry': {'t': {'path': ('a', ('b', 'c')), 'columns': [('x', 'string', ('entry', 'id'))]}},
+    'path_alterno_con_lista': {'t': {'path': ('a', ('b', 'c')), 'list': ('d',),
+                                     'columns': [('x', 'string', ('entry', 'id')), ('y', 'string', 'v')]}},
+}
+SPEC_RECORDS = [
+    {'id': '1', 'a': {'b': {'z': 1}}},
+    {'id': '2', 'a': {'c': [{'v': 'x'}, 3]}},
+    {'id': '3'},
+    {'id': '4', 'a': {'b': {}, 'c': {'d': [{'v': 'y'}]}}},
+    {'id': '5', 'a': {'b': [], 'c': 'texto'}},
+    {'id': '6', 'a': {'b': {'d': {'v': 'z'}}}},
+]
+
+
+@pytest.mark.parametrize('spec', SPECS)
+def test_backends_match_on_other_mapping_shapes(decoder, spec):
+    mapping = Mapping(SPECS[spec])
+    data = payload(SPEC_RECORDS)
+    expected = mapping.extract(RecordDecoder('json', mapping).decode(data), 'Prueba')
+    actual = mapping.extract(RecordDecoder(decoder.name, mapping).decode(data), 'Prueba')
+    assert repr(actual) == repr(expected)
+
+
+@pytest.mark.parametrize('data', [b'[{"id": "a"}', b'[{"id": "a",}]', b'[1] x'])
+def test_malformed_json_raises_value_error(decoder, data):
+    with pytest.raises(ValueError):
+        decoder.decode(data)
+
+
+def test_wide_int_split_across_scan_blocks(monkeypatch):
+    monkeypatch.setattr(decoders, 'SCAN_BYTES', 16)
+    data = b'[{"a": 1}, {"a": ' + str(2 ** 70).encode() + b'}]'
+    for cut in range(len(data)):
+        assert has_wide_int(b' ' * cut + data)
+    assert not has_wide_int(b'[{"a": "' + str(2 ** 70).encode() + b'"}, 9223372036854775807]')
+
+
+def test_stream_ranges_follow_batch_size(decoder, tmp_path, monkeypatch):
+    records = [declaracion(f"id{i}", vehiculos={'vehiculo': [{'marca': 'x' * (i % 7) * 50}]}) for i in range(300)]
+    source = tmp_path / 'estado.json'
+    source.write_bytes(payload(records))
+    # Sin el mínimo de 1 MB por rango, para que un archivo chico se lea en varios
+    monkeypatch.setattr(procesar_masivo_s1, 'CHUNK_SIZE', 1)
+    sizes = []
+    read_json_shard = json_stream.read_json_shard
+
+    def counting_read(*args):
+        records = read_json_shard(*args)
+        sizes.append(len(records))
+        return records
+    monkeypatch.setattr(json_stream, 'read_json_shard', counting_read)
+
+    extractor = S1Extractor(str(source), str(tmp_path / 'salida'), 'Prueba', stream=True, batch_size=20,
+                            decoder=decoder.name)
+    batches = list(extractor.iter_data_batches())
+    assert [record['id'] for batch in batches for record in batch] == [record['id'] for record in records]
+    assert max(len(batch) for batch in batches) <= 20
+    if decoder.name != 'json':
+        # Cada rango trae ~batch_size declaraciones, no el archivo completo
+        assert len(sizes) > 5 and max(sizes) < 60
@@ -0,0 +1,47 @@
+import duckdb
+import pandas as pd
+
+import reglas
+from ingesta_duckdb import CURRENT_TABLE, ensure_tables
+from limpieza_ingresos import STATS_FILE, clean_data_with_audit
+from reglas import RULES_FILE, RuleEngine, load_rules_file, rules_for
+
+
+def names(rules):
+    return [(rule.table, rule.name) for rule in rules]
+
+
+def test_loading_rules_twice_gives_the_same_rule_set():
+    registered = list(reglas.RULES)
+    first = load_rules_file(RULES_FILE)
+    second = load_rules_file(RULES_FILE)
+    assert names(first) == names(second) and first
+    assert reglas.RULES == registered
+    assert names(rules_for('s1_ingresos', second)) == names(rules_for('s1_ingresos', first))
+    # Python primero (prioridad), después las del YAML de la tabla
+    assert names(rules_for('s1_ingresos', first)) == (
+        [('*', 'sin_id')] + [name for name in names(first) if name[0] == 's1_ingresos'])
+
+
+def test_engine_defaults_to_python_rules():
+    assert names(RuleEngine('s1_ingresos').rules) == [('*', 'sin_id')]
+
+
+def test_cleaning_twice_in_one_process_counts_each_rule_once(tmp_path):
+    with duckdb.connect(str(tmp_path / 'dataton_s1.duckdb')) as con:
+        ensure_tables(con)
+        con.execute("""
+            INSERT INTO raw.s1_ingresos (id, state, ingreso_anual_neto, ingreso_mensual_neto, posicion, filename)
+            VALUES ('a', 'Colima', 1000, 100, 0, 'x.csv'), ('b', 'Colima', -5, 10, 1, 'x.csv'),
+                   (NULL, 'Colima', 10, 1, 2, 'x.csv')
+        """)
+        con.execute(f"INSERT INTO {CURRENT_TABLE} VALUES ('a', 'Colima', 0, NULL), ('b', 'Colima', 1, NULL)")
+
+    for run in range(2):
+        output_dir = tmp_path / f"limpio{run}"
+        clean_data_with_audit(str(tmp_path), str(output_dir), tables=['s1_ingresos'])
+        stats = pd.read_csv(output_dir / STATS_FILE)
+        assert not stats.duplicated(['tabla', 'regla']).any()
+        assert set(stats['filas_evaluadas']) == {3}
+        by_rule = stats.set_index('regla')['rechazos']
+        assert by_rule['sin_id'] == 1 and by_rule['ingreso_anual_negativo'] == 1
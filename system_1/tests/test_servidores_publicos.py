@@ -0,0 +1,112 @@
+import duckdb
+import pytest
+
+from servidores_publicos import TABLES_SQL, build_index, resolve, single_server_keys
+
+CURP_A = 'PELJ800101HJCRPN01'
+CURP_B = 'PELJ900101HJCRPN02'
+
+
+def person(id, curp=None, rfc=None):
+    return (id, 'jalisco', '2024-01-01', 'JUAN', 'PEREZ', 'LOPEZ', curp, rfc, None, None, None, 'SECRETARIA DE SALUD')
+
+
+def create_resumen(con):
+    con.execute("CREATE SCHEMA vigente")
+    con.execute("""
+        CREATE TABLE vigente.s1_resumen (
+            id VARCHAR, state VARCHAR, fecha_actualizacion TIMESTAMP, nombre VARCHAR, primer_apellido VARCHAR,
+            segundo_apellido VARCHAR, curp VARCHAR, rfc VARCHAR, rfc_homoclave VARCHAR, correo VARCHAR,
+            correo_personal VARCHAR, institucion VARCHAR)
+    """)
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    create_resumen(con)
+    con.execute(TABLES_SQL)
+    yield con
+    con.close()
+
+
+def add(con, *rows):
+    con.executemany("INSERT INTO vigente.s1_resumen VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", list(rows))
+
+
+def servers(con):
+    return dict(con.execute("SELECT id, servidor_id FROM main.servidores_declaraciones").fetchall())
+
+
+@pytest.mark.parametrize('ids', [('d0', 'd1', 'd3'), ('d3', 'd1', 'd0'), ('d1', 'd0', 'd3')])
+def test_llave_debil_no_encadena_curp_distintas(con, ids):
+    sin_curp, con_a, con_b = ids
+    add(con, person(sin_curp), person(con_a, CURP_A), person(con_b, CURP_B))
+    resolve(con)
+    assigned = servers(con)
+    assert assigned[con_a] != assigned[con_b]
+    # Sin CURP y con dos candidatas distintas: ambigua, queda aparte
+    assert assigned[sin_curp] not in (assigned[con_a], assigned[con_b])
+
+
+def test_llave_debil_une_sin_curp_con_una_sola_curp(con):
+    add(con, person('d0'), person('d1', CURP_A), person('d2', CURP_A), person('d3'))
+    resolve(con)
+    assert len(set(servers(con).values())) == 1
+
+
+def test_llave_fuerte_une_curp_distintas(con):
+    # Mismo RFC con homoclave: se unen aunque la CURP difiera
+    add(con, person('d1', CURP_A, 'PELJ800101AB1'), person('d2', CURP_B, 'PELJ800101AB1'))
+    resolve(con)
+    assert len(set(servers(con).values())) == 1
+
+
+def test_incremental_respeta_curp_de_servidores_conocidos(con):
+    add(con, person('d1', CURP_A), person('d3', CURP_B))
+    resolve(con)
+    before = servers(con)
+    add(con, person('d0'))
+    assert resolve(con) == (1, 1, 0)
+    after = servers(con)
+    assert {k: after[k] for k in before} == before
+    assert after['d0'] not in before.values()
+
+
+def test_incremental_sin_curp_se_une_al_unico_servidor(con):
+    add(con, person('d1', CURP_A))
+    resolve(con)
+    add(con, person('d0'))
+    assert resolve(con) == (1, 0, 0)
+    assert servers(con)['d0'] == servers(con)['d1']
+
+
+def test_fusion_reasigna_llaves(con):
+    otra = person('d2', rfc='PELJ800101AB1')[:-1] + ('OTRA INSTITUCION',)
+    add(con, person('d1', CURP_A), otra)
+    resolve(con)
+    assert servers(con)['d1'] != servers(con)['d2']
+    # Comparte CURP con d1 y RFC con d2: une a los dos servidores
+    add(con, person('d3', CURP_A, 'PELJ800101AB1'))
+    assert resolve(con) == (1, 0, 1)
+    assert len(set(servers(con).values())) == 1
+    assert con.execute("SELECT count(DISTINCT servidor_id) FROM main.servidores_llaves").fetchone()[0] == 1
+
+
+def test_indice_anterior_se_recalcula(tmp_path):
+    db_path = str(tmp_path / 'servidores.duckdb')
+    con = duckdb.connect(db_path)
+    create_resumen(con)
+    add(con, person('d1'))
+    con.execute("CREATE TABLE main.servidores_llaves (tipo VARCHAR, llave UBIGINT, servidor_id VARCHAR, "
+                "PRIMARY KEY (tipo, llave))")
+    con.execute("CREATE TABLE main.servidores_declaraciones (id VARCHAR PRIMARY KEY, state VARCHAR, "
+                "servidor_id VARCHAR)")
+    con.execute("INSERT INTO main.servidores_declaraciones VALUES ('d1', 'jalisco', 'SPVIEJO')")
+    con.close()
+
+    build_index(db_path)
+    con = duckdb.connect(db_path)
+    assert not single_server_keys(con)
+    assert servers(con)['d1'] != 'SPVIEJO'
+    con.close()
@@ -0,0 +1,140 @@
+"""
+Compilación de releases OCDS en un registro vigente por proceso (ocid).
+
+Un proceso de contratación publica varios releases (licitación, adjudicación,
+contrato, enmiendas) con el mismo ocid. El registro compilado se arma con las
+reglas de merge de OCDS, aplicando los releases del más antiguo al más nuevo:
+
+- los objetos se combinan campo por campo y el valor más reciente gana;
+- un campo con null en un release posterior se elimina;
+- los arreglos de objetos con `id` (parties, awards, contracts, items, ...) se
+  combinan por id; cualquier otro arreglo se reemplaza completo;
+- `id`, `date` y `tag` son propios de cada release: el compilado lleva
+  tag ['compiled'], la fecha del último release e id '<ocid>-<fecha>'.
+
+Los archivos por estado no vienen agrupados por ocid, así que los releases se
+guardan primero en un índice sqlite en disco (ReleaseIndex) y se leen en orden
+de (ocid, fecha). En memoria solo están los releases del ocid en curso.
+"""
+import json
+import os
+import sqlite3
+
+# Campos de cada release que no se combinan
+RELEASE_FIELDS = ('id', 'date', 'tag')
+# Releases por transacción al llenar el índice
+INSERT_BATCH = 5000
+# Caché de páginas de sqlite en KB (valor negativo en PRAGMA cache_size)
+CACHE_KB = 64 * 1024
+
+
+def identified(values):
+    """True si es un arreglo de objetos que tienen id (se combina por id)."""
+    return bool(values) and all(isinstance(value, dict) and 'id' in value for value in values)
+
+
+def merge_into(target, release):
+    """Aplica `release` sobre `target` (ambos dicts) según las reglas de merge de OCDS."""
+    for key, value in release.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict):
+            current = target.get(key)
+            if not isinstance(current, dict):
+                current = target[key] = {}
+            merge_into(current, value)
+        elif isinstance(value, list) and identified(value):
+            current = target.get(key)
+            target[key] = merge_by_id(current if isinstance(current, list) else [], value)
+        else:
+            target[key] = value
+
+
+def merge_by_id(current, values):
+    positions = {item.get('id'): i for i, item in enumerate(current) if isinstance(item, dict)}
+    for value in values:
+        position = positions.get(value['id'])
+        if position is None:
+            positions[value['id']] = len(current)
+            current.append({})
+            position = -1
+        merge_into(current[position], value)
+    return current
+
+
+def compile_releases(releases):
+    """Registro compilado de los releases de un ocid, ya ordenados por fecha."""
+    compiled = {}
+    for release in releases:
+        merge_into(compiled, {key: value for key, value in release.items() if key not in RELEASE_FIELDS})
+    ocid = compiled.get('ocid', '')
+    date = next((r['date'] for r in reversed(releases) if r.get('date')), None)
+    compiled['id'] = f"{ocid}-{date}" if date else ocid
+    if date:
+        compiled['date'] = date
+    compiled['tag'] = ['compiled']
+    return compiled
+
+
+class ReleaseIndex:
+    """
+    Releases de un archivo en una tabla sqlite temporal, con índice por
+    (ocid, fecha). add() recibe lotes conforme se leen y records() entrega los
+    registros compilados en orden de ocid. El archivo se borra al cerrar.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.remove()
+        self.con = sqlite3.connect(path)
+        # Índice desechable: sin journal ni fsync
+        self.con.execute('PRAGMA journal_mode = OFF')
+        self.con.execute('PRAGMA synchronous = OFF')
+        self.con.execute(f'PRAGMA cache_size = -{CACHE_KB}')
+        self.con.execute('PRAGMA temp_store = FILE')
+        # seq (el rowid) conserva el orden del archivo para releases con la misma fecha
+        self.con.execute('CREATE TABLE releases (seq INTEGER PRIMARY KEY, ocid TEXT, date TEXT, body TEXT)')
+        self.releases = 0
+
+    def add(self, releases):
+        rows = [(release.get('ocid') or None, release.get('date') or '',
+                 json.dumps(release, ensure_ascii=False, separators=(',', ':')))
+                for release in releases]
+        with self.con:
+            self.con.executemany('INSERT INTO releases (ocid, date, body) VALUES (?, ?, ?)', rows)
+        self.releases += len(rows)
+
+    def records(self):
+        """
+        Genera un registro compilado por ocid. Los releases sin ocid no se pueden
+        agrupar y se entregan tal cual.
+        """
+        # El índice se crea al final de la carga: más rápido que mantenerlo en cada insert
+        self.con.execute('CREATE INDEX IF NOT EXISTS releases_ocid ON releases (ocid, date)')
+        group, current = [], None
+        for ocid, body in self.con.execute('SELECT ocid, body FROM releases ORDER BY ocid, date, seq'):
+            if ocid is None:
+                yield json.loads(body)
+                continue
+            if ocid != current and group:
+                yield compile_releases(group)
+                group = []
+            current = ocid
+            group.append(json.loads(body))
+        if group:
+            yield compile_releases(group)
+
+    def remove(self):
+        for suffix in ('', '-journal'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def close(self):
+        self.con.close()
+        self.remove()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
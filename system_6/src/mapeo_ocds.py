@@ -0,0 +1,92 @@
+"""
+Mapeo declarativo de los releases OCDS a las tablas de salida
+(ver common/mapping.py para el formato).
+"""
+OCID = ('ocid', 'string', ('entry', ('get', 'ocid', '')))
+STATE = ('state', 'dictionary', ('state',))
+TENDER = ('tender',)
+
+OCDS_MAPPING = {
+    'general': {
+        'columns': [
+            ('ocid', 'string', ('get', 'ocid', '')),
+            ('id', 'string', ('get', 'id', '')),
+            ('date', 'timestamp', ('get', 'date', '')),
+            STATE,  # Agregamos columna de origen
+            ('title', 'string', ('at', TENDER, ('get', 'title', ''))),
+            ('description', 'string', ('at', TENDER, ('get', 'description', ''))),
+            ('status', 'dictionary', ('at', TENDER, ('get', 'status', ''))),
+            ('procurementMethod', 'dictionary', ('at', TENDER, ('get', 'procurementMethod', ''))),
+            ('procurementMethodDetails', 'string', ('at', TENDER, ('get', 'procurementMethodDetails', ''))),
+            ('mainProcurementCategory', 'dictionary', ('at', TENDER, ('get', 'mainProcurementCategory', ''))),
+            ('value_amount', 'float64', ('at', TENDER, ('path', ('value', 'amount'), 0))),
+            ('value_currency', 'dictionary', ('at', TENDER, ('path', ('value', 'currency'), ''))),
+            ('tender_start_date', 'timestamp', ('at', TENDER, ('path', ('tenderPeriod', 'startDate'), ''))),
+            ('tender_end_date', 'timestamp', ('at', TENDER, ('path', ('tenderPeriod', 'endDate'), ''))),
+            ('buyer_name', 'string', ('at', ('buyer',), ('get', 'name', ''))),
+            ('buyer_id', 'string', ('at', ('buyer',), ('get', 'id', ''))),
+        ],
+    },
+    'items': {
+        'path': TENDER,
+        'list': ('items',),
+        'any_list': False,
+        'columns': [
+            OCID, STATE,
+            ('item_id', 'string', ('get', 'id', '')),
+            ('description', 'string', ('get', 'description', '')),
+            ('quantity', 'float64', ('get', 'quantity', '')),
+            ('classification_id', 'string', ('path', ('classification', 'id'), '')),
+            ('classification_desc', 'string', ('path', ('classification', 'description'), '')),
+            ('unit_name', 'dictionary', ('path', ('unit', 'name'), '')),
+            ('unit_value_amount', 'float64', ('path', ('unit', 'value', 'amount'), '')),
+            ('unit_value_currency', 'dictionary', ('path', ('unit', 'value', 'currency'), '')),
+        ],
+    },
+    'parties': {
+        'list': ('parties',),
+        'any_list': False,
+        'columns': [
+            OCID, STATE,
+            ('party_id', 'string', ('get', 'id', '')),
+            ('name', 'string', ('get', 'name', '')),
+            ('roles', 'dictionary', ('join', 'roles', None, '')),
+            ('identifier_legalName', 'string', ('path', ('identifier', 'legalName'), '')),
+            ('contact_name', 'string', ('path', ('contactPoint', 'name'), '')),
+            ('contact_email', 'string', ('path', ('contactPoint', 'email'), '')),
+            ('contact_phone', 'string', ('path', ('contactPoint', 'telephone'), '')),
+            ('address_region', 'dictionary', ('path', ('address', 'region'), '')),
+            ('address_locality', 'string', ('path', ('address', 'locality'), '')),
+        ],
+    },
+    'awards': {
+        'list': ('awards',),
+        'any_list': False,
+        'columns': [
+            OCID, STATE,
+            ('award_id', 'string', ('get', 'id', '')),
+            ('title', 'string', ('get', 'title', '')),
+            ('status', 'dictionary', ('get', 'status', '')),
+            ('date', 'timestamp', ('get', 'date', '')),
+            ('value_amount', 'float64', ('path', ('value', 'amount'), '')),
+            ('value_currency', 'dictionary', ('path', ('value', 'currency'), '')),
+            ('suppliers', 'string', ('join', 'suppliers', ('get', 'name', ''), '')),
+        ],
+    },
+    'contracts': {
+        'list': ('contracts',),
+        'any_list': False,
+        'columns': [
+            OCID, STATE,
+            ('contract_id', 'string', ('get', 'id', '')),
+            ('awardID', 'string', ('get', 'awardID', '')),
+            ('title', 'string', ('get', 'title', '')),
+            ('status', 'dictionary', ('get', 'status', '')),
+            ('value_amount', 'float64', ('path', ('value', 'amount'), '')),
+            ('value_currency', 'dictionary', ('path', ('value', 'currency'), '')),
+            ('dateSigned', 'timestamp', ('get', 'dateSigned', '')),
+            ('period_startDate', 'timestamp', ('path', ('period', 'startDate'), '')),
+            ('period_endDate', 'timestamp', ('path', ('period', 'endDate'), '')),
+        ],
+    },
+}
@@ -1,25 +1,68 @@
+import argparse
 import json
 import pandas as pd
 import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from common.instrumentation import configure_run_log, path_bytes, record, stage
+from common.json_stream import iter_batches, iter_json_array, open_source
+from common.mapping import Mapping
+from common.parallel import run_and_report
+from common.writers import OUTPUT_FORMATS, TableBuffers, make_writer, write_stats
+from compilar_ocds import ReleaseIndex
+from mapeo_ocds import OCDS_MAPPING
+
+# Esquema de cada tabla de salida: columnas en orden y su tipo (ver common/writers.py),
+# derivado del mapeo declarativo en mapeo_ocds.py
+OCDS_MAPPER = Mapping(OCDS_MAPPING)
+OCDS_SCHEMAS = OCDS_MAPPER.schemas
+
+# Los objetos de Python más los DataFrames ocupan ~5 veces el tamaño del JSON
+JSON_LOAD_EXPANSION = 5
+# Tamaño aproximado del JSON respecto al archivo comprimido
+COMPRESSION_EXPANSION = {'.gz': 8, '.zst': 10}
+# Releases que se mapean a la vez antes de pasar sus filas a los buffers
+RECORDS_PER_CHUNK = 5000
+# En modo streaming/compilado la memoria depende del lote, no del archivo
+STREAM_BASE_MEMORY = 200 * 1024 ** 2
+STREAM_MEMORY_PER_RECORD = 20 * 1024
+RELEASE_SUFFIXES = ('_releases.json', '_releases.json.gz', '_releases.json.zst')
 
 class OCDSExtractor:
     """
     Clase para procesar y extraer datos de archivos JSON con el estándar OCDS.
-    Genera archivos CSV estandarizados organizados por carpetas.
+    Genera archivos CSV (o Parquet tipado con output_format='parquet')
+    estandarizados organizados por carpetas. Lee .json, .json.gz o .json.zst
+    directamente, sin descomprimir a disco.
+
+    Con stream=True los releases se leen uno por uno (common/json_stream.py) en
+    lugar de con json.load. Con compiled=True (que también lee en streaming) se
+    escribe un registro compilado por ocid en lugar de una fila por release: los
+    releases pasan por un índice sqlite en disco y se combinan con las reglas de
+    merge de OCDS (ver compilar_ocds.py).
+
+    Cada etapa queda en la bitácora de ejecución (common/instrumentation.py).
     """
     
-    def __init__(self, file_path, output_dir, state_name):
+    def __init__(self, file_path, output_dir, state_name, output_format='csv', stream=False,
+                 compiled=False):
         self.file_path = file_path
         self.output_dir = os.path.join(output_dir, state_name)
         self.state_name = state_name
+        self.output_format = output_format
+        self.stream = stream or compiled
+        self.compiled = compiled
         self.data = []
         
         # DataFrames
-        self.df_resumen = pd.DataFrame()
-        self.df_items = pd.DataFrame()
-        self.df_parties = pd.DataFrame()
-        self.df_awards = pd.DataFrame()
-        self.df_contracts = pd.DataFrame()
+        self.dfs = {}
+
+        # Conteos para el reporte de ejecución (records: releases o registros compilados)
+        self.stats = {'records': 0, 'releases': 0, 'rows': {}}
 
         # Crear directorio específico para el estado
         if not os.path.exists(self.output_dir):
@@ -28,152 +71,165 @@ class OCDSExtractor:
     def load_data(self):
         print(f"[{self.state_name}] Cargando {os.path.basename(self.file_path)}...")
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                self.data = json.load(f)
+            with stage('load_data', state=self.state_name, file=os.path.basename(self.file_path)) as s:
+                with open_source(self.file_path) as f:
+                    self.data = json.load(f)
+                s.rows_out = len(self.data)
             print(f"[{self.state_name}] ✅ Datos cargados: {len(self.data)} registros.")
             return True
         except Exception as e:
             print(f"[{self.state_name}] ❌ Error cargando archivo: {e}")
             return False
 
+    def process_tables(self, tables=None):
+        """Llena self.dfs con las tablas indicadas (default: todas) en un solo recorrido."""
+        tables = list(tables or OCDS_SCHEMAS)
+        with stage('process_tables', state=self.state_name, tables=tables) as s:
+            for name, rows in OCDS_MAPPER.extract(self.data, self.state_name, tables).items():
+                self.dfs[name] = pd.DataFrame(rows, columns=OCDS_MAPPER.columns[name])
+            s.rows_in = len(self.data)
+            s.rows_out = sum(len(self.dfs[name]) for name in tables)
+
     def process_general(self):
-        resumen_list = []
-        for entry in self.data:
-            ocid = entry.get('ocid', '')
-            tender = entry.get('tender', {})
-            buyer = entry.get('buyer', {})
-            
-            resumen = {
-                'ocid': ocid,
-                'id': entry.get('id', ''),
-                'date': entry.get('date', ''),
-                'state': self.state_name,  # Agregamos columna de origen
-                'title': tender.get('title', ''),
-                'description': tender.get('description', ''),
-                'status': tender.get('status', ''),
-                'procurementMethod': tender.get('procurementMethod', ''),
-                'procurementMethodDetails': tender.get('procurementMethodDetails', ''),
-                'mainProcurementCategory': tender.get('mainProcurementCategory', ''),
-                'value_amount': tender.get('value', {}).get('amount', 0),
-                'value_currency': tender.get('value', {}).get('currency', ''),
-                'tender_start_date': tender.get('tenderPeriod', {}).get('startDate', ''),
-                'tender_end_date': tender.get('tenderPeriod', {}).get('endDate', ''),
-                'buyer_name': buyer.get('name', ''),
-                'buyer_id': buyer.get('id', '')
-            }
-            resumen_list.append(resumen)
-        self.df_resumen = pd.DataFrame(resumen_list)
+        self.process_tables(['general'])
 
     def process_items(self):
-        items_list = []
-        for entry in self.data:
-            ocid = entry.get('ocid', '')
-            tender = entry.get('tender', {})
-            for item in tender.get('items', []):
-                item_data = {
-                    'ocid': ocid,
-                    'state': self.state_name,
-                    'item_id': item.get('id', ''),
-                    'description': item.get('description', ''),
-                    'quantity': item.get('quantity', ''),
-                    'classification_id': item.get('classification', {}).get('id', ''),
-                    'classification_desc': item.get('classification', {}).get('description', ''),
-                    'unit_name': item.get('unit', {}).get('name', ''),
-                    'unit_value_amount': item.get('unit', {}).get('value', {}).get('amount', ''),
-                    'unit_value_currency': item.get('unit', {}).get('value', {}).get('currency', '')
-                }
-                items_list.append(item_data)
-        self.df_items = pd.DataFrame(items_list)
+        self.process_tables(['items'])
 
     def process_parties(self):
-        parties_list = []
-        for entry in self.data:
-            ocid = entry.get('ocid', '')
-            for party in entry.get('parties', []):
-                roles = ", ".join(party.get('roles', []))
-                party_data = {
-                    'ocid': ocid,
-                    'state': self.state_name,
-                    'party_id': party.get('id', ''),
-                    'name': party.get('name', ''),
-                    'roles': roles,
-                    'identifier_legalName': party.get('identifier', {}).get('legalName', ''),
-                    'contact_name': party.get('contactPoint', {}).get('name', ''),
-                    'contact_email': party.get('contactPoint', {}).get('email', ''),
-                    'contact_phone': party.get('contactPoint', {}).get('telephone', ''),
-                    'address_region': party.get('address', {}).get('region', ''),
-                    'address_locality': party.get('address', {}).get('locality', '')
-                }
-                parties_list.append(party_data)
-        self.df_parties = pd.DataFrame(parties_list)
+        self.process_tables(['parties'])
 
     def process_awards(self):
-        awards_list = []
-        for entry in self.data:
-            ocid = entry.get('ocid', '')
-            for award in entry.get('awards', []):
-                award_data = {
-                    'ocid': ocid,
-                    'state': self.state_name,
-                    'award_id': award.get('id', ''),
-                    'title': award.get('title', ''),
-                    'status': award.get('status', ''),
-                    'date': award.get('date', ''),
-                    'value_amount': award.get('value', {}).get('amount', ''),
-                    'value_currency': award.get('value', {}).get('currency', ''),
-                    'suppliers': ", ".join([s.get('name', '') for s in award.get('suppliers', [])])
-                }
-                awards_list.append(award_data)
-        self.df_awards = pd.DataFrame(awards_list)
+        self.process_tables(['awards'])
 
     def process_contracts(self):
-        contracts_list = []
-        for entry in self.data:
-            ocid = entry.get('ocid', '')
-            for contract in entry.get('contracts', []):
-                contract_data = {
-                    'ocid': ocid,
-                    'state': self.state_name,
-                    'contract_id': contract.get('id', ''),
-                    'awardID': contract.get('awardID', ''),
-                    'title': contract.get('title', ''),
-                    'status': contract.get('status', ''),
-                    'value_amount': contract.get('value', {}).get('amount', ''),
-                    'value_currency': contract.get('value', {}).get('currency', ''),
-                    'dateSigned': contract.get('dateSigned', ''),
-                    'period_startDate': contract.get('period', {}).get('startDate', ''),
-                    'period_endDate': contract.get('period', {}).get('endDate', '')
-                }
-                contracts_list.append(contract_data)
-        self.df_contracts = pd.DataFrame(contracts_list)
+        self.process_tables(['contracts'])
 
     def extract_all(self):
-        if self.load_data():
-            self.process_general()
-            self.process_items()
-            self.process_parties()
-            self.process_awards()
-            self.process_contracts()
-            self.save_to_csv()
-
-    def save_to_csv(self):
-        files_map = {
-            'general': self.df_resumen,
-            'items': self.df_items,
-            'parties': self.df_parties,
-            'awards': self.df_awards,
-            'contracts': self.df_contracts
-        }
-
-        for name, df in files_map.items():
-            if not df.empty:
-                # Nombre estandarizado: general.csv, items.csv, etc.
-                filename = f"{name}.csv"
-                path = os.path.join(self.output_dir, filename)
-                df.to_csv(path, index=False, encoding='utf-8')
-        print(f"[{self.state_name}] ✅ Archivos CSV generados en {self.output_dir}")
+        """Extrae y guarda todas las tablas. Devuelve True si el archivo terminó sin errores."""
+        with stage('extract_all', state=self.state_name, format=self.output_format, stream=self.stream,
+                   compiled=self.compiled) as s:
+            ok = self.extract_streaming() if self.stream else self.extract_loaded()
+            s.status = 'ok' if ok else 'error'
+            s.rows_in = self.stats['records']
+            s.rows_out = sum(self.stats['rows'].values())
+            s.bytes_written = path_bytes(self.output_dir)
+        return ok
+
+    def extract_loaded(self):
+        if not self.load_data():
+            return False
+        # Las filas pasan por buffers por columnas que se escriben cada ROW_GROUP_SIZE filas
+        buffers = TableBuffers(make_writer(self.output_format, self.output_dir, OCDS_SCHEMAS), OCDS_SCHEMAS)
+        try:
+            for start in range(0, len(self.data), RECORDS_PER_CHUNK):
+                chunk = self.data[start:start + RECORDS_PER_CHUNK]
+                for name, rows in OCDS_MAPPER.extract(chunk, self.state_name).items():
+                    buffers.extend(name, rows)
+            self.stats['records'] = self.stats['releases'] = len(self.data)
+        finally:
+            self.data = []
+            self.stats['rows'] = dict(buffers.rows)
+            buffers.close()
+            self.record_writes(buffers.writer, self.stats['rows'])
+        print(f"[{self.state_name}] ✅ Archivos {self.output_format.upper()} generados en {self.output_dir}")
+        return True
+
+    def iter_releases(self):
+        """Releases del archivo uno por uno, sin cargarlo completo."""
+        with open_source(self.file_path) as f:
+            for release in iter_json_array(f):
+                self.stats['releases'] += 1
+                yield release
+
+    def iter_compiled(self):
+        """Un registro compilado por ocid, aunque los releases del archivo no vengan agrupados."""
+        index_path = os.path.join(self.output_dir, '.ocid_index.sqlite')
+        with ReleaseIndex(index_path) as index:
+            with stage('index_releases', state=self.state_name) as s:
+                for batch in iter_batches(self.iter_releases(), RECORDS_PER_CHUNK):
+                    index.add(batch)
+                s.rows_in = s.rows_out = index.releases
+            print(f"[{self.state_name}] ✅ {index.releases} releases indexados por ocid; compilando registros...")
+            yield from index.records()
+
+    def extract_streaming(self):
+        source = self.iter_compiled() if self.compiled else self.iter_releases()
+        kind = 'registros compilados' if self.compiled else 'releases'
+        print(f"[{self.state_name}] Leyendo {os.path.basename(self.file_path)} en modo streaming "
+              f"({kind}, lotes de {RECORDS_PER_CHUNK})...")
+        buffers = TableBuffers(make_writer(self.output_format, self.output_dir, OCDS_SCHEMAS), OCDS_SCHEMAS)
+        try:
+            for batch in iter_batches(source, RECORDS_PER_CHUNK):
+                for name, rows in OCDS_MAPPER.extract(batch, self.state_name).items():
+                    buffers.extend(name, rows)
+                self.stats['records'] += len(batch)
+        except Exception as e:
+            print(f"[{self.state_name}] ❌ Error leyendo archivo tras {self.stats['releases']} releases: {e}")
+            return False
+        finally:
+            source.close()
+            self.stats['rows'] = dict(buffers.rows)
+            buffers.close()
+            self.record_writes(buffers.writer, self.stats['rows'])
+        print(f"[{self.state_name}] ✅ {self.stats['records']} {kind} de {self.stats['releases']} releases.")
+        print(f"[{self.state_name}] ✅ Archivos {self.output_format.upper()} generados en {self.output_dir}")
+        return True
+
+    def record_writes(self, writer, rows):
+        for name, stats in write_stats(writer).items():
+            record('write_table', state=self.state_name, table=name, format=self.output_format,
+                   rows_out=rows.get(name), **stats)
+
+    def tables(self):
+        return self.dfs
+
+    def save_outputs(self):
+        """Escribe las tablas en self.dfs (p.ej. después de llamar a process_*) con el formato elegido."""
+        writer = make_writer(self.output_format, self.output_dir, OCDS_SCHEMAS)
+        with stage('save_outputs', state=self.state_name, format=self.output_format) as s:
+            try:
+                for name, df in self.tables().items():
+                    # Nombre estandarizado: general.csv, items.parquet, etc.
+                    writer.write(name, df)
+            finally:
+                writer.close()
+            s.rows_out = sum(len(df) for df in self.tables().values())
+            s.bytes_written = path_bytes(self.output_dir)
+        self.record_writes(writer, {name: len(df) for name, df in self.tables().items()})
+        print(f"[{self.state_name}] ✅ Archivos {self.output_format.upper()} generados en {self.output_dir}")
+
+
+def process_file(task):
+    """Tarea del pool: extrae un archivo de releases y devuelve su reporte."""
+    extractor = OCDSExtractor(task['file_path'], task['output_dir'], task['name'],
+                              output_format=task['output_format'], stream=task.get('stream', False),
+                              compiled=task.get('compiled', False))
+    ok = extractor.extract_all()
+    return {
+        'status': 'ok' if ok else 'error',
+        'file_path': task['file_path'],
+        'records': extractor.stats['records'],
+        'releases': extractor.stats['releases'],
+        'rows': extractor.stats['rows'],
+    }
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrae los releases OCDS a CSV por estado.")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                        help="Formato de las tablas de salida (default: csv)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Número de archivos a procesar en paralelo (default: 1)")
+    parser.add_argument('--max-memory-gb', type=float, default=None,
+                        help="Tope de memoria estimada en uso simultáneo (default: 75%% de la RAM)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Leer los releases uno por uno en lugar de con json.load")
+    parser.add_argument('--compiled', action='store_true',
+                        help="Escribir un registro compilado por ocid en lugar de una fila por release "
+                             "(lee en streaming)")
+    args = parser.parse_args()
+
     # Configuración de directorios relativos
     CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
     BASE_DIR = os.path.join(CURRENT_DIR, '../PDN_S6')
@@ -182,18 +238,44 @@ if __name__ == "__main__":
     # Asegurar que existan los directorios
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
+    run_log = configure_run_log(os.path.join(OUTPUT_DIR, 'run_log.jsonl'))
+    print(f"Bitácora de ejecución: {run_log}")
     
     # Mapeo automático de archivos json en el directorio
-    files = [f for f in os.listdir(BASE_DIR) if f.endswith('_releases.json')]
+    # (ej: 'puebla_releases.json.gz' -> 'puebla'); si un estado tiene el archivo
+    # descomprimido y el comprimido se usa el primero según RELEASE_SUFFIXES
+    files = {}
+    for suffix in RELEASE_SUFFIXES:
+        for filename in sorted(os.listdir(BASE_DIR)):
+            if filename.endswith(suffix):
+                files.setdefault(filename[:-len(suffix)], filename)
     
     print(f"--- Iniciando Procesamiento Masivo de {len(files)} Archivos ---")
     
-    for filename in files:
-        # Extraer nombre del estado del archivo (ej: 'puebla_releases.json' -> 'puebla')
-        state_name = filename.replace('_releases.json', '')
+    tasks = []
+    for state_name, filename in files.items():
         file_path = os.path.join(BASE_DIR, filename)
+        extension = os.path.splitext(filename)[1]
         
-        extractor = OCDSExtractor(file_path, OUTPUT_DIR, state_name)
-        extractor.extract_all()
+        if args.stream or args.compiled:
+            memory = STREAM_BASE_MEMORY + RECORDS_PER_CHUNK * STREAM_MEMORY_PER_RECORD
+        else:
+            memory = os.path.getsize(file_path) * COMPRESSION_EXPANSION.get(extension, 1) * JSON_LOAD_EXPANSION
+        tasks.append({
+            'name': state_name,
+            'file_path': file_path,
+            'output_dir': OUTPUT_DIR,
+            'output_format': args.format,
+            'stream': args.stream,
+            'compiled': args.compiled,
+            'memory': memory,
+        })
+
+    budget = int(args.max_memory_gb * 1024 ** 3) if args.max_memory_gb else None
+    reports = run_and_report(tasks, process_file, workers=args.workers, memory_budget=budget,
+                             report_path=os.path.join(OUTPUT_DIR, 'reporte_extraccion.json'),
+                             label='Archivos')
         
     print("\n--- Procesamiento Completado ---")
+    if any(r['status'] != 'ok' for r in reports):
+        sys.exit(1)
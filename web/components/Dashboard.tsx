@@ -330,33 +330,35 @@ export default function Dashboard({ view, onViewChange }: DashboardProps) {
         const initTable = async () => {
             if (db && conn) {
                 try {
-                    // Register both files
-                    const urlMaestro = new URL('/data/system_1/s1_dataset_maestro.parquet', window.location.origin).href;
-                    const urlStg = new URL('/data/system_1/stg_s1_declaraciones.parquet', window.location.origin).href;
+                    // s1_unified is pre-joined and partitioned by state (scripts/export_to_parquet.py --web).
+                    // HTTP has no directory listing, so the partition files come from index.json.
+                    const baseUrl = new URL('/data/system_1/s1_unified/', window.location.origin).href;
+                    const index = await fetch(new URL('index.json', baseUrl).href).then(r => r.json());
+                    const partitionFiles: string[] = index.files;
+                    const urlResumen = new URL('/data/system_1/resumen_declaraciones_institucion_anual.parquet', window.location.origin).href;
 
-                    console.log("Registering files:", urlMaestro, urlStg);
+                    console.log(`Registering ${partitionFiles.length} s1_unified partitions from ${baseUrl}`);
 
-                    await db.registerFileURL('s1_dataset_maestro.parquet', urlMaestro, 4, false);
-                    await db.registerFileURL('stg_s1_declaraciones.parquet', urlStg, 4, false);
+                    for (const file of partitionFiles) {
+                        await db.registerFileURL(`s1_unified/${file}`, new URL(encodeURI(file), baseUrl).href, 4, false);
+                    }
+                    await db.registerFileURL('resumen_declaraciones_institucion_anual.parquet', urlResumen, 4, false);
 
                     console.log("Files registered. Creating view...");
 
-                    // Create Unified View
-                    // Note: Joining on ID. Adjust column names to match what the UI expects or what is available.
+                    // Files are sorted by INSTITUCION in small row groups: filters on ENTIDAD_CD / INSTITUCION
+                    // only fetch the matching row groups (min/max statistics) via HTTP range requests
+                    const fileList = partitionFiles.map(file => `'s1_unified/${file.replace(/'/g, "''")}'`).join(', ');
                     await conn.query(`
                         CREATE OR REPLACE VIEW s1_unified AS
-                        SELECT 
-                            m.id,
-                            m.estado as ENTIDAD_CD,
-                            m.institucion as INSTITUCION,
-                            s.nombre as NOMBRE,
-                            s.primer_apellido as PRIMER_APELLIDO,
-                            s.segundo_apellido as SEGUNDO_APELLIDO,
-                            s.empleo_cargo as PUESTO_NOMBRE,
-                            m.ingreso_mensual_neto as TOTAL_INGRESOS_MENSUALES_NETOS,
-                            m.ingreso_anual_neto as REMUNERACION_ANUAL_CARGO_PUBLICO
-                        FROM 's1_dataset_maestro.parquet' m
-                        JOIN 'stg_s1_declaraciones.parquet' s ON m.id = s.id
+                        SELECT * FROM read_parquet([${fileList}])
+                    `);
+
+                    // Precomputed per (entidad, institucion, anio) by system_1/src/analysis/resumen_instituciones.py:
+                    // a few KB instead of grouping every declaration on each click
+                    await conn.query(`
+                        CREATE OR REPLACE VIEW s1_resumen_instituciones AS
+                        SELECT * FROM 'resumen_declaraciones_institucion_anual.parquet'
                     `);
 
                     // Fix: Check if view works
@@ -463,11 +465,11 @@ export default function Dashboard({ view, onViewChange }: DashboardProps) {
                 // Let's use ILIKE to be safe against case differences in DB.
 
                 const q = `
-            SELECT INSTITUCION, COUNT(*) as total_declaraciones 
-            FROM s1_unified 
+            SELECT institucion as INSTITUCION, CAST(SUM(total_declaraciones) AS BIGINT) as total_declaraciones 
+            FROM s1_resumen_instituciones 
             WHERE 
-                upper(ENTIDAD_CD) = '${dbName}'
-            GROUP BY INSTITUCION 
+                upper(entidad_cd) = '${dbName}'
+            GROUP BY institucion 
             ORDER BY total_declaraciones DESC
         `;
 
@@ -493,12 +495,11 @@ export default function Dashboard({ view, onViewChange }: DashboardProps) {
             if (!conn || !selectedInstitution) return;
             setIsQuerying(true);
             try {
-                // Get Total Count first for pagination
+                // Get Total Count first for pagination (precomputed: declarations with income > 0)
                 const countQ = `
-                    SELECT COUNT(*) as total
-                    FROM s1_unified 
-                    WHERE INSTITUCION = '${selectedInstitution}'
-                    AND REMUNERACION_ANUAL_CARGO_PUBLICO > 0
+                    SELECT CAST(COALESCE(SUM(declaraciones_con_ingreso), 0) AS BIGINT) as total
+                    FROM s1_resumen_instituciones 
+                    WHERE institucion = '${selectedInstitution}'
                 `;
                 const countRes = await conn.query(countQ);
                 const total = Number(countRes.toArray()[0].total);